@@ -7,7 +7,7 @@ from sqlalchemy.engine import make_url
 from alembic import context
 
 from app.base import Base
-from app.models import Session, Conversation, IntentLog, ProductClick  # noqa: F401
+from app.models import Session, Conversation, IntentLog, IntentTerm, LLMUsage, ProductClick  # noqa: F401
 from app.config import get_settings
 
 config = context.config
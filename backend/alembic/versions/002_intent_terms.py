@@ -0,0 +1,90 @@
+"""Normalized intent_terms table for intent keywords and dietary tags
+
+Revision ID: 002
+Revises: 001
+Create Date: 2026-10-19
+
+"""
+import json
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+revision: str = "002"
+down_revision: Union[str, None] = "001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH_SIZE = 1000
+
+
+def _normalize(value) -> str:
+    return " ".join(str(value).split()).lower()[:100]
+
+
+def _decode(raw: str | None) -> list:
+    try:
+        values = json.loads(raw or "[]")
+    except (TypeError, ValueError):
+        return []
+    return values if isinstance(values, list) else []
+
+
+def _backfill(intent_terms: sa.Table) -> None:
+    """Copy the JSON keyword/dietary lists of existing intent logs into intent_terms."""
+    conn = op.get_bind()
+    intent_logs = sa.table(
+        "intent_logs",
+        sa.column("id", sa.String),
+        sa.column("dietary", sa.Text),
+        sa.column("keywords", sa.Text),
+    )
+
+    last_id = ""
+    while True:
+        batch = conn.execute(
+            sa.select(intent_logs.c.id, intent_logs.c.dietary, intent_logs.c.keywords)
+            .where(intent_logs.c.id > last_id)
+            .order_by(intent_logs.c.id)
+            .limit(BACKFILL_BATCH_SIZE)
+        ).all()
+        if not batch:
+            break
+
+        rows = []
+        for log_id, dietary, keywords in batch:
+            seen = set()
+            for kind, values in (("dietary", _decode(dietary)), ("keyword", _decode(keywords))):
+                for raw in values:
+                    value = _normalize(raw)
+                    if value and (kind, value) not in seen:
+                        seen.add((kind, value))
+                        rows.append({"intent_log_id": log_id, "kind": kind, "value": value})
+        if rows:
+            conn.execute(intent_terms.insert(), rows)
+        last_id = batch[-1][0]
+
+
+def upgrade() -> None:
+    intent_terms = op.create_table(
+        "intent_terms",
+        sa.Column(
+            "intent_log_id",
+            sa.String(21),
+            sa.ForeignKey("intent_logs.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("kind", sa.String(10), primary_key=True),
+        sa.Column("value", sa.String(100), primary_key=True),
+    )
+    op.create_index("ix_intent_terms_value", "intent_terms", ["value", "kind"])
+
+    if not context.is_offline_mode():
+        _backfill(intent_terms)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_intent_terms_value", table_name="intent_terms")
+    op.drop_table("intent_terms")
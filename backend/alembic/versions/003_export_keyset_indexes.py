@@ -0,0 +1,28 @@
+"""Keyset (created_at, id) indexes for streaming analytics exports
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "003"
+down_revision: Union[str, None] = "002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+EXPORT_TABLES = ("conversations", "intent_logs", "product_clicks")
+
+
+def upgrade() -> None:
+    for table in EXPORT_TABLES:
+        op.create_index(f"ix_{table}_created_at_id", table, ["created_at", "id"])
+
+
+def downgrade() -> None:
+    for table in EXPORT_TABLES:
+        op.drop_index(f"ix_{table}_created_at_id", table_name=table)
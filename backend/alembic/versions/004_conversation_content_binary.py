@@ -0,0 +1,44 @@
+"""Store conversation content as binary for dictionary compression
+
+Existing rows keep their text; they are read as-is and can be rewritten
+compressed afterwards with `python -m scripts.conversation_dict compress-existing`.
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "004"
+down_revision: Union[str, None] = "003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("conversations") as batch_op:
+        batch_op.alter_column(
+            "content",
+            existing_type=sa.Text(),
+            type_=sa.LargeBinary(),
+            existing_nullable=False,
+            postgresql_using="convert_to(content, 'UTF8')",
+        )
+
+
+def downgrade() -> None:
+    # Compressed rows must be decompressed first:
+    #   python -m scripts.conversation_dict decompress-existing
+    with op.batch_alter_table("conversations") as batch_op:
+        batch_op.alter_column(
+            "content",
+            existing_type=sa.LargeBinary(),
+            type_=sa.Text(),
+            existing_nullable=False,
+            postgresql_using="convert_from(content, 'UTF8')",
+        )
@@ -0,0 +1,38 @@
+"""LLM token usage and latency per session
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "005"
+down_revision: Union[str, None] = "004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "llm_usage",
+        sa.Column("id", sa.String(21), primary_key=True),
+        sa.Column("session_id", sa.String(21), sa.ForeignKey("sessions.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("stage", sa.String(20), nullable=False),
+        sa.Column("model", sa.String(50), nullable=False),
+        sa.Column("prompt_tokens", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("completion_tokens", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("cached_prompt_tokens", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("latency_ms", sa.Float(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False, server_default=sa.text("CURRENT_TIMESTAMP")),
+    )
+    op.create_index("ix_llm_usage_session_id", "llm_usage", ["session_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_llm_usage_session_id", table_name="llm_usage")
+    op.drop_table("llm_usage")
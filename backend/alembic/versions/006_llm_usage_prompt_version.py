@@ -0,0 +1,26 @@
+"""Prompt version per LLM call, for prompt-cache hit rates per version
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "006"
+down_revision: Union[str, None] = "005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("llm_usage", sa.Column("prompt_version", sa.String(40), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("llm_usage") as batch_op:
+        batch_op.drop_column("prompt_version")
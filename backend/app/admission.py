@@ -0,0 +1,287 @@
+"""
+Admission control and load shedding for /api/chat.
+
+Every chat turn costs LLM calls, so turns are admitted before any work
+starts:
+
+- at most `admission_max_concurrent` turns run at once, and at most
+  `admission_max_per_session` per session (double submits, retries);
+- token buckets sized from the OpenAI quota (`admission_openai_rpm`,
+  `admission_openai_tpm`) are charged an estimate per turn, so bursts wait
+  instead of running into provider 429s;
+- turns that cannot start immediately wait in a bounded queue, but only while
+  they can still start before their deadline (`admission_deadline_ms`). When
+  the expected wait already exceeds the deadline they are shed straight away.
+
+Shed turns get a fast degraded reply (see `degraded_chat_response` in the
+chat router) rather than an error.
+"""
+import asyncio
+import functools
+import math
+import threading
+import time
+from collections import Counter as TallyCounter, deque
+
+from fastapi.responses import StreamingResponse
+
+from app.config import get_settings
+from app.metrics import ADMISSION_ACTIVE, ADMISSION_QUEUED, ADMISSION_SHED
+
+settings = get_settings()
+
+
+class Shed(Exception):
+    """Raised when a request is not admitted; `reason` labels the cause."""
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class TokenBucket:
+    """Classic token bucket; a rate of 0 disables it."""
+
+    def __init__(self, rate_per_second: float, capacity: float):
+        self.rate = rate_per_second
+        self.capacity = capacity
+        self.tokens = capacity
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        if self.rate:
+            self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until `amount` tokens are available (0 when they already are)."""
+        if not self.rate:
+            return 0.0
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        return 0.0 if self.tokens >= amount else (amount - self.tokens) / self.rate
+
+    def take(self, amount: float, now: float) -> None:
+        if self.rate:
+            self._refill(now)
+            self.tokens -= min(amount, self.capacity)
+
+
+class AdmissionController:
+    """Concurrency caps, token buckets and a deadline-aware wait queue (event-loop only)."""
+
+    def __init__(self, max_concurrent: int, max_per_session: int, max_queue: int, deadline_seconds: float,
+                 rpm: int = 0, tpm: int = 0, calls_per_turn: int = 2, tokens_per_turn: int = 3000,
+                 burst_seconds: float = 10.0):
+        self.max_concurrent = max_concurrent
+        self.max_per_session = max_per_session
+        self.max_queue = max_queue
+        self.deadline_seconds = deadline_seconds
+        self.calls_per_turn = calls_per_turn
+        self.tokens_per_turn = tokens_per_turn
+        self.requests_bucket = TokenBucket(rpm / 60, rpm / 60 * burst_seconds)
+        self.tokens_bucket = TokenBucket(tpm / 60, tpm / 60 * burst_seconds)
+        self.active = 0
+        self.queued = 0
+        self.shed = TallyCounter()
+        self.avg_service_seconds = 0.0
+        self._sessions: dict[str, int] = {}
+        self._cond: asyncio.Condition | None = None
+        self._loop = None
+
+    def _condition(self) -> asyncio.Condition:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._cond, self._loop = asyncio.Condition(), loop
+        return self._cond
+
+    def _bucket_wait(self, now: float, weight: float = 1.0) -> float:
+        return max(
+            self.requests_bucket.wait_time(self.calls_per_turn * weight, now),
+            self.tokens_bucket.wait_time(self.tokens_per_turn * weight, now),
+        )
+
+    def _expected_wait(self, now: float, weight: float = 1.0) -> float:
+        rounds = math.ceil((self.queued + 1) / max(self.max_concurrent, 1))
+        return rounds * self.avg_service_seconds + self._bucket_wait(now, weight)
+
+    def _shed(self, reason: str):
+        self.shed[reason] += 1
+        if settings.metrics_enabled:
+            ADMISSION_SHED.inc(reason=reason)
+        raise Shed(reason)
+
+    def _update_gauges(self) -> None:
+        if settings.metrics_enabled:
+            ADMISSION_ACTIVE.set(self.active)
+            ADMISSION_QUEUED.set(self.queued)
+
+    async def acquire(self, session_id: str | None, weight: float = 1.0) -> float:
+        """
+        Wait for admission; returns the start time to pass to `release`.
+        `weight` is the request's cost in chat turns, charged to the buckets.
+        """
+        cond = self._condition()
+        now = time.monotonic()
+        deadline = now + self.deadline_seconds
+
+        if session_id and self._sessions.get(session_id, 0) >= self.max_per_session:
+            self._shed("session_busy")
+
+        async with cond:
+            must_wait = (
+                self.queued > 0 or self.active >= self.max_concurrent or self._bucket_wait(now, weight) > 0
+            )
+            if must_wait:
+                if self.queued >= self.max_queue:
+                    self._shed("queue_full")
+                if now + self._expected_wait(now, weight) > deadline:
+                    self._shed("rate_limited" if now + self._bucket_wait(now, weight) > deadline else "deadline")
+
+            # Counted from enqueue on, so a double submit cannot queue twice
+            self._session_enter(session_id)
+            self.queued += 1
+            self._update_gauges()
+            try:
+                while True:
+                    now = time.monotonic()
+                    slot_free = self.active < self.max_concurrent
+                    bucket_wait = self._bucket_wait(now, weight) if slot_free else 0.0
+                    if slot_free and bucket_wait == 0:
+                        break
+                    remaining = deadline - now
+                    if remaining <= 0 or bucket_wait > remaining:
+                        self._shed("rate_limited" if bucket_wait else "deadline")
+                    # Wake on a released slot, or when the buckets have refilled
+                    timeout = bucket_wait or remaining
+                    try:
+                        await asyncio.wait_for(cond.wait(), timeout)
+                    except asyncio.TimeoutError:
+                        pass
+            except BaseException:
+                self._session_exit(session_id)
+                raise
+            finally:
+                self.queued -= 1
+
+            self.requests_bucket.take(self.calls_per_turn * weight, now)
+            self.tokens_bucket.take(self.tokens_per_turn * weight, now)
+            self.active += 1
+            self._update_gauges()
+            return now
+
+    def _session_enter(self, session_id: str | None) -> None:
+        if session_id:
+            self._sessions[session_id] = self._sessions.get(session_id, 0) + 1
+
+    def _session_exit(self, session_id: str | None) -> None:
+        if session_id:
+            remaining = self._sessions.get(session_id, 1) - 1
+            if remaining:
+                self._sessions[session_id] = remaining
+            else:
+                self._sessions.pop(session_id, None)
+
+    async def release(self, session_id: str | None, started: float, sample: bool = True) -> None:
+        """Free the slot; `sample=False` keeps a long stream out of the turn duration estimate."""
+        if sample:
+            elapsed = time.monotonic() - started
+            # EWMA of turn duration, used to predict queue waits
+            if self.avg_service_seconds:
+                self.avg_service_seconds = 0.8 * self.avg_service_seconds + 0.2 * elapsed
+            else:
+                self.avg_service_seconds = elapsed
+        cond = self._condition()
+        async with cond:
+            self.active -= 1
+            self._session_exit(session_id)
+            self._update_gauges()
+            cond.notify()
+
+    def snapshot(self) -> dict:
+        return {
+            "active": self.active,
+            "queued": self.queued,
+            "max_concurrent": self.max_concurrent,
+            "avg_service_ms": round(self.avg_service_seconds * 1000, 1),
+            "shed": dict(self.shed),
+        }
+
+
+class RecentRecommendations:
+    """
+    Products recently recommended by full chat turns, for degraded replies.
+
+    Recorded from the chat bulkhead threads and read on the event loop, so
+    both go through a lock.
+    """
+
+    def __init__(self, maxlen: int = 200):
+        self._recent: deque = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+
+    def record(self, products) -> None:
+        with self._lock:
+            self._recent.extend(products)
+
+    def popular(self, limit: int = 3) -> list:
+        with self._lock:
+            items = list(self._recent)
+        counts = TallyCounter(p.sku for p in items)
+        latest = {p.sku: p for p in items}
+        return [latest[sku] for sku, _ in counts.most_common(limit)]
+
+
+chat_admission = AdmissionController(
+    max_concurrent=settings.admission_max_concurrent,
+    max_per_session=settings.admission_max_per_session,
+    max_queue=settings.admission_max_queue,
+    deadline_seconds=settings.admission_deadline_ms / 1000,
+    rpm=settings.admission_openai_rpm,
+    tpm=settings.admission_openai_tpm,
+    calls_per_turn=settings.admission_calls_per_turn,
+    tokens_per_turn=settings.admission_tokens_per_turn,
+)
+recent_recommendations = RecentRecommendations()
+
+
+def admit(controller: AdmissionController, on_shed, weight=None):
+    """
+    Decorator for async chat handlers: admit first, or answer with `on_shed(request, reason)`.
+
+    `weight(request)` is the request's cost in chat turns (default 1). When the
+    handler returns a `StreamingResponse`, the slot is held until the stream
+    has been sent, since the work happens while streaming.
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            request = kwargs["request"]
+            try:
+                started = await controller.acquire(request.session_id, weight(request) if weight else 1.0)
+            except Shed as shed:
+                return on_shed(request, shed.reason)
+            response = None
+            try:
+                response = await func(*args, **kwargs)
+                return response
+            finally:
+                if isinstance(response, StreamingResponse):
+                    response.body_iterator = _release_after(
+                        response.body_iterator, controller, request.session_id, started
+                    )
+                else:
+                    await controller.release(request.session_id, started)
+
+        return wrapper
+
+    return decorator
+
+
+async def _release_after(body, controller: AdmissionController, session_id: str | None, started: float):
+    try:
+        async for chunk in body:
+            yield chunk
+    finally:
+        await controller.release(session_id, started, sample=False)
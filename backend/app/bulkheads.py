@@ -0,0 +1,174 @@
+"""
+Bulkheads: isolated worker pools per workload class.
+
+Sync route bodies normally share Starlette's single threadpool, so slow LLM
+calls in /api/chat can occupy every thread while cheap analytics writes wait.
+Routes decorated with `@run_in("<pool>")` instead run on their pool's own
+threads:
+
+- `chat`: LLM-bound chat turns
+- `search`: Edible-bound catalog searches
+- `analytics`: DB-only analytics reads and writes
+- `gift_plans`: gift-plan response streams, which wait on batch completions
+  for as long as the plan runs (admission, not this pool, bounds them)
+
+Each pool has a fixed number of workers and a bounded wait queue. When the
+queue is full, or a request waits longer than `bulkhead_queue_timeout`, the
+request is rejected with 503 and `Retry-After` instead of piling up. Active,
+queued and rejected counts per pool are exported on /metrics.
+
+The work around a handler runs on the same pool: `dependency_in` wraps a
+sync generator dependency (`get_db`) so opening and closing the session use
+the pool's threads, and `Bulkhead.iterate` steps a `StreamingResponse` body
+on them. Neither is queued or rejected on its own; admission is the
+handler's.
+"""
+import contextlib
+import functools
+import time
+
+import anyio
+from fastapi import HTTPException
+
+from app.config import get_settings
+from app.metrics import BULKHEAD_ACTIVE, BULKHEAD_QUEUE_WAIT, BULKHEAD_QUEUED, BULKHEAD_REJECTIONS
+
+settings = get_settings()
+
+
+class Bulkhead:
+    """A bounded worker pool with a bounded wait queue."""
+
+    def __init__(self, name: str, size: int, max_queue: int, queue_timeout: float):
+        self.name = name
+        self.size = size
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self.queued = 0
+        self.rejected = 0
+        self._slots = anyio.CapacityLimiter(size)
+        # Separate limiter for the worker threads: to_thread.run_sync would
+        # otherwise try to borrow the slot this task already holds.
+        self._threads = anyio.CapacityLimiter(size)
+
+    def _reject(self, reason: str):
+        self.rejected += 1
+        if settings.metrics_enabled:
+            BULKHEAD_REJECTIONS.inc(pool=self.name, reason=reason)
+        raise HTTPException(
+            status_code=503,
+            detail=f"{self.name} capacity exceeded, retry shortly",
+            headers={"Retry-After": str(settings.bulkhead_retry_after)},
+        )
+
+    def _update_gauges(self) -> None:
+        if settings.metrics_enabled:
+            BULKHEAD_ACTIVE.set(self.active, pool=self.name)
+            BULKHEAD_QUEUED.set(self.queued, pool=self.name)
+
+    async def run(self, func, *args):
+        """Run a sync callable on this pool, waiting for a free worker if allowed."""
+        if self._slots.available_tokens == 0 and self.queued >= self.max_queue:
+            self._reject("queue_full")
+
+        self.queued += 1
+        self._update_gauges()
+        start = time.perf_counter()
+        try:
+            with anyio.fail_after(self.queue_timeout):
+                await self._slots.acquire()
+        except TimeoutError:
+            self._reject("queue_timeout")
+        finally:
+            self.queued -= 1
+            self._update_gauges()
+        if settings.metrics_enabled:
+            BULKHEAD_QUEUE_WAIT.observe(time.perf_counter() - start, pool=self.name)
+
+        self.active += 1
+        self._update_gauges()
+        try:
+            return await anyio.to_thread.run_sync(func, *args, limiter=self._threads)
+        finally:
+            self.active -= 1
+            self._slots.release()
+            self._update_gauges()
+
+    async def run_admitted(self, func, *args):
+        """Run a sync callable on this pool's threads, skipping the queue (work of an admitted request)."""
+        return await anyio.to_thread.run_sync(func, *args, limiter=self._threads)
+
+    async def iterate(self, iterator):
+        """Async iterator over a sync one, each step run on this pool's threads."""
+        iterator = iter(iterator)
+        done = object()
+        try:
+            while (item := await self.run_admitted(next, iterator, done)) is not done:
+                yield item
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                with anyio.CancelScope(shield=True):
+                    await self.run_admitted(close)
+
+    def snapshot(self) -> dict:
+        return {
+            "size": self.size,
+            "max_queue": self.max_queue,
+            "active": self.active,
+            "queued": self.queued,
+            "rejected": self.rejected,
+        }
+
+
+BULKHEADS: dict[str, Bulkhead] = {
+    "chat": Bulkhead("chat", settings.bulkhead_chat_size, settings.bulkhead_chat_queue, settings.bulkhead_queue_timeout),
+    "search": Bulkhead(
+        "search", settings.bulkhead_search_size, settings.bulkhead_search_queue, settings.bulkhead_queue_timeout
+    ),
+    "analytics": Bulkhead(
+        "analytics", settings.bulkhead_analytics_size, settings.bulkhead_analytics_queue, settings.bulkhead_queue_timeout
+    ),
+    "gift_plans": Bulkhead("gift_plans", settings.bulkhead_gift_plans_size, 0, settings.bulkhead_queue_timeout),
+}
+
+
+def run_in(pool: str):
+    """Decorator for sync route handlers: run the handler on a bulkhead's threads.
+
+    The wrapper is async (so FastAPI awaits it instead of using the shared
+    threadpool) and keeps the handler's signature for dependency injection.
+    """
+    bulkhead = BULKHEADS[pool]
+
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            return await bulkhead.run(functools.partial(func, *args, **kwargs))
+
+        return wrapper
+
+    return decorator
+
+
+def dependency_in(pool: str, dependency):
+    """Async version of a sync generator dependency whose setup and teardown run on a bulkhead's threads."""
+    bulkhead = BULKHEADS[pool]
+    manager = contextlib.contextmanager(dependency)
+
+    async def wrapper():
+        context = manager()
+        value = await bulkhead.run_admitted(context.__enter__)
+        try:
+            yield value
+        except BaseException as e:
+            with anyio.CancelScope(shield=True):
+                if not await bulkhead.run_admitted(context.__exit__, type(e), e, e.__traceback__):
+                    raise
+        else:
+            with anyio.CancelScope(shield=True):
+                await bulkhead.run_admitted(context.__exit__, None, None, None)
+
+    wrapper.__name__ = f"{dependency.__name__}_in_{pool}"
+    return wrapper
@@ -0,0 +1,437 @@
+"""
+Pluggable cache shared by all workers.
+
+Backends (`cache_backend`):
+
+- `memory`: per-process LRU dict. Each uvicorn worker has its own copy, so
+  with N workers every entry is fetched up to N times.
+- `sqlite`: one SQLite file (`cache_sqlite_path`, WAL mode, memory-mapped
+  reads) that all workers on a host share.
+- `redis`: any Redis-protocol server (`cache_redis_url`), shared across
+  hosts. The client is a small RESP implementation over a socket pool, so no
+  extra dependency is needed; `benchmarks.stubs.RedisStub` stands in for a
+  server in tests.
+- `none`: caching disabled.
+
+Values are cached per namespace (`catalog`, `intent`, `product`), each with its own TTL
+(`cache_ttl_<namespace>`, 0 disables that namespace) and value type. Values are
+serialized with the type's pydantic adapter to JSON, so a list of
+`EdibleProduct` written by one worker reads back identically in another.
+Keys carry `CACHE_FORMAT_VERSION`; bump it when a cached schema changes.
+`get_many` / `set_many` read or write a batch of keys in one backend
+operation (one lock, one SQL statement or transaction, one Redis round trip).
+
+Cache failures never fail a request: they count as a miss and are logged
+through an `EventAggregator`.
+"""
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from queue import Empty, LifoQueue
+from urllib.parse import unquote, urlparse
+
+from pydantic import TypeAdapter, ValidationError
+
+from app.config import get_settings
+from app.log import EventAggregator
+from app.metrics import record_cache_lookup
+from app.schemas import EdibleProduct, ExtractedIntent
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+cache_errors = EventAggregator(logger, "cache_error", "cache backend errors", sample_rate=0.1)
+
+CACHE_FORMAT_VERSION = 1
+
+
+class CacheError(Exception):
+    """A cache backend could not serve a request."""
+
+
+class MemoryBackend:
+    """In-process LRU with per-entry expiry."""
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple[bytes, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def get_many(self, keys: list[str]) -> list[bytes | None]:
+        now = time.time()
+        values = []
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None and entry[1] <= now:
+                    del self._entries[key]
+                    entry = None
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                values.append(entry[0] if entry is not None else None)
+        return values
+
+    def set(self, key: str, value: bytes, ttl_seconds: float) -> None:
+        self.set_many({key: value}, ttl_seconds)
+
+    def set_many(self, items: dict[str, bytes], ttl_seconds: float) -> None:
+        expires_at = time.time() + ttl_seconds
+        with self._lock:
+            for key, value in items.items():
+                self._entries[key] = (value, expires_at)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def add(self, key: str, value: bytes, ttl_seconds: float) -> bool:
+        """Set only if the key is absent (or expired); True when it was set."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > now:
+                return False
+            self._entries[key] = (value, now + ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return True
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+class SQLiteBackend:
+    """Host-wide cache in a SQLite file; safe for concurrent workers and threads."""
+
+    PURGE_EVERY = 500
+
+    def __init__(self, path: str, mmap_bytes: int = 64 * 1024 * 1024):
+        self.path = path
+        self.mmap_bytes = mmap_bytes
+        self._local = threading.local()
+        self._writes = 0
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache_entries "
+                "(key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=1.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA mmap_size={int(self.mmap_bytes)}")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> bytes | None:
+        try:
+            row = self._connect().execute(
+                "SELECT value FROM cache_entries WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+        except sqlite3.Error as e:
+            raise CacheError(str(e)) from e
+        return bytes(row[0]) if row else None
+
+    def get_many(self, keys: list[str]) -> list[bytes | None]:
+        if not keys:
+            return []
+        placeholders = ",".join("?" * len(keys))
+        try:
+            rows = self._connect().execute(
+                f"SELECT key, value FROM cache_entries WHERE key IN ({placeholders}) AND expires_at > ?",
+                (*keys, time.time()),
+            ).fetchall()
+        except sqlite3.Error as e:
+            raise CacheError(str(e)) from e
+        found = {key: bytes(value) for key, value in rows}
+        return [found.get(key) for key in keys]
+
+    def set(self, key: str, value: bytes, ttl_seconds: float) -> None:
+        self.set_many({key: value}, ttl_seconds)
+
+    def set_many(self, items: dict[str, bytes], ttl_seconds: float) -> None:
+        now = time.time()
+        try:
+            conn = self._connect()
+            # One transaction: a batch costs one commit, not one per key
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO cache_entries (key, value, expires_at) VALUES (?, ?, ?)",
+                    [(key, value, now + ttl_seconds) for key, value in items.items()],
+                )
+            before, self._writes = self._writes, self._writes + len(items)
+            if self._writes // self.PURGE_EVERY != before // self.PURGE_EVERY:
+                conn.execute("DELETE FROM cache_entries WHERE expires_at <= ?", (now,))
+        except sqlite3.Error as e:
+            raise CacheError(str(e)) from e
+
+    def add(self, key: str, value: bytes, ttl_seconds: float) -> bool:
+        now = time.time()
+        try:
+            conn = self._connect()
+            conn.execute("DELETE FROM cache_entries WHERE key = ? AND expires_at <= ?", (key, now))
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO cache_entries (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, now + ttl_seconds),
+            )
+        except sqlite3.Error as e:
+            raise CacheError(str(e)) from e
+        return cursor.rowcount == 1
+
+    def delete(self, key: str) -> None:
+        try:
+            self._connect().execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+        except sqlite3.Error as e:
+            raise CacheError(str(e)) from e
+
+
+class RedisBackend:
+    """Minimal Redis (RESP2) client: GET / MGET / SET PX [NX] / DEL over a small socket pool."""
+
+    def __init__(self, url: str, timeout: float = 0.5, pool_size: int = 16):
+        parsed = urlparse(url)
+        if parsed.scheme != "redis":
+            raise ValueError(f"Unsupported cache URL scheme: {parsed.scheme!r}")
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.password = unquote(parsed.password) if parsed.password else None
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.timeout = timeout
+        self._pool: LifoQueue = LifoQueue(maxsize=pool_size)
+
+    def _open(self):
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        conn = (sock, sock.makefile("rb"))
+        if self.password:
+            self._roundtrip(conn, "AUTH", self.password)
+        if self.db:
+            self._roundtrip(conn, "SELECT", str(self.db))
+        return conn
+
+    @staticmethod
+    def _encode(args) -> bytes:
+        out = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode()
+            out.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        return b"".join(out)
+
+    @classmethod
+    def _read_reply(cls, reader):
+        line = reader.readline()
+        if not line.endswith(b"\r\n"):
+            raise CacheError("Connection closed by cache server")
+        kind, rest = line[:1], line[1:-2]
+        if kind == b"+":
+            return rest.decode()
+        if kind == b"-":
+            raise CacheError(rest.decode())
+        if kind == b":":
+            return int(rest)
+        if kind == b"$":
+            length = int(rest)
+            if length < 0:
+                return None
+            data = reader.read(length + 2)
+            if len(data) != length + 2:
+                raise CacheError("Connection closed by cache server")
+            return data[:-2]
+        if kind == b"*":
+            length = int(rest)
+            return None if length < 0 else [cls._read_reply(reader) for _ in range(length)]
+        raise CacheError(f"Unexpected reply from cache server: {line[:20]!r}")
+
+    def _roundtrip(self, conn, *args):
+        return self._pipeline(conn, [args])[0]
+
+    def _pipeline(self, conn, commands: list[tuple]) -> list:
+        sock, reader = conn
+        sock.sendall(b"".join(self._encode(args) for args in commands))
+        return [self._read_reply(reader) for _ in commands]
+
+    def command(self, *args):
+        return self.pipeline([args])[0]
+
+    def pipeline(self, commands: list[tuple]) -> list:
+        """Send several commands in one round trip; their replies in order."""
+        try:
+            conn = self._pool.get_nowait()
+        except Empty:
+            conn = None
+        try:
+            conn = conn or self._open()
+            replies = self._pipeline(conn, commands)
+        except CacheError:
+            if conn is not None:
+                conn[0].close()
+            raise
+        except (OSError, ValueError) as e:
+            if conn is not None:
+                conn[0].close()
+            raise CacheError(str(e)) from e
+        try:
+            self._pool.put_nowait(conn)
+        except Exception:
+            conn[0].close()
+        return replies
+
+    def get(self, key: str) -> bytes | None:
+        return self.command("GET", key)
+
+    def get_many(self, keys: list[str]) -> list[bytes | None]:
+        return self.command("MGET", *keys) if keys else []
+
+    def set(self, key: str, value: bytes, ttl_seconds: float) -> None:
+        self.command("SET", key, value, "PX", max(int(ttl_seconds * 1000), 1))
+
+    def set_many(self, items: dict[str, bytes], ttl_seconds: float) -> None:
+        ttl_ms = max(int(ttl_seconds * 1000), 1)
+        if items:
+            self.pipeline([("SET", key, value, "PX", ttl_ms) for key, value in items.items()])
+
+    def add(self, key: str, value: bytes, ttl_seconds: float) -> bool:
+        return self.command("SET", key, value, "PX", max(int(ttl_seconds * 1000), 1), "NX") == "OK"
+
+    def delete(self, key: str) -> None:
+        self.command("DEL", key)
+
+
+def build_backend(kind: str):
+    if kind == "memory":
+        return MemoryBackend(settings.cache_memory_max_entries)
+    if kind == "sqlite":
+        return SQLiteBackend(settings.cache_sqlite_path)
+    if kind == "redis":
+        return RedisBackend(settings.cache_redis_url)
+    if kind == "none":
+        return None
+    raise ValueError(f"Unknown cache backend: {kind!r}")
+
+
+@lru_cache
+def get_backend():
+    """The configured backend, created on first use."""
+    return build_backend(settings.cache_backend)
+
+
+class NamespacedCache:
+    """Typed, TTL-bound view of the shared backend for one kind of value."""
+
+    def __init__(self, namespace: str, value_type, ttl_seconds: float, backend=None):
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds
+        self.adapter = TypeAdapter(value_type)
+        self._backend = backend
+
+    @property
+    def backend(self):
+        return self._backend if self._backend is not None else get_backend()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.backend is not None
+
+    def key(self, key: str) -> str:
+        return f"{settings.cache_key_prefix}:{self.namespace}:v{CACHE_FORMAT_VERSION}:{key}"
+
+    def encode(self, value) -> bytes:
+        return self.adapter.dump_json(value)
+
+    def decode(self, data: bytes):
+        return self.adapter.validate_json(data)
+
+    def get(self, key: str):
+        """Cached value, or None on a miss (or when the backend fails)."""
+        if not self.enabled:
+            return None
+        try:
+            data = self.backend.get(self.key(key))
+            value = None if data is None else self.decode(data)
+        except (CacheError, ValidationError) as e:
+            cache_errors.hit(f"Cache read failed: {e}", namespace=self.namespace)
+            value = None
+        record_cache_lookup(self.namespace, value is not None)
+        return value
+
+    def get_many(self, keys: list[str]) -> dict:
+        """Cached values by key for the keys that hit; one backend operation."""
+        if not self.enabled or not keys:
+            return {}
+        values = {}
+        try:
+            for key, data in zip(keys, self.backend.get_many([self.key(k) for k in keys])):
+                if data is not None:
+                    values[key] = self.decode(data)
+        except (CacheError, ValidationError) as e:
+            cache_errors.hit(f"Cache read failed: {e}", namespace=self.namespace)
+            values = {}
+        for key in keys:
+            record_cache_lookup(self.namespace, key in values)
+        return values
+
+    def set(self, key: str, value, ttl_seconds: float | None = None) -> None:
+        """Store a value for the namespace TTL (or `ttl_seconds` when given)."""
+        if not self.enabled:
+            return
+        try:
+            self.backend.set(self.key(key), self.encode(value), ttl_seconds or self.ttl_seconds)
+        except CacheError as e:
+            cache_errors.hit(f"Cache write failed: {e}", namespace=self.namespace)
+
+    def set_many(self, values: dict, ttl_seconds: float | None = None) -> None:
+        """Store several values in one backend operation."""
+        if not self.enabled or not values:
+            return
+        try:
+            items = {self.key(key): self.encode(value) for key, value in values.items()}
+            self.backend.set_many(items, ttl_seconds or self.ttl_seconds)
+        except CacheError as e:
+            cache_errors.hit(f"Cache write failed: {e}", namespace=self.namespace)
+
+    def add(self, key: str, value, ttl_seconds: float | None = None) -> bool:
+        """
+        Store only if absent; True when stored. With the sqlite or redis backend
+        this is a lock shared by the workers using it; the memory backend only
+        excludes callers in the same process. False when disabled or on errors.
+        """
+        if not self.enabled:
+            return False
+        try:
+            return self.backend.add(self.key(key), self.encode(value), ttl_seconds or self.ttl_seconds)
+        except CacheError as e:
+            cache_errors.hit(f"Cache write failed: {e}", namespace=self.namespace)
+            return False
+
+
+catalog_cache = NamespacedCache("catalog", list[EdibleProduct], settings.cache_ttl_catalog)
+intent_cache = NamespacedCache("intent", ExtractedIntent, settings.cache_ttl_intent)
+# SKU -> product record for every parsed product. With the memory backend it gets its own
+# LRU so product records don't evict catalog pages.
+product_cache = NamespacedCache(
+    "product",
+    EdibleProduct,
+    settings.cache_ttl_product,
+    backend=MemoryBackend(settings.cache_product_max_entries) if settings.cache_backend == "memory" else None,
+)
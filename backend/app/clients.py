@@ -0,0 +1,77 @@
+"""
+Registry of shared upstream clients.
+
+Clients are built on first use instead of at import, so importing the app
+stays cheap (the `openai` package alone is a large share of import time) and
+every module shares one pooled client per upstream:
+
+- `openai`: the OpenAI (or OpenAI-compatible, `OPENAI_BASE_URL`) client
+- `edible`: a keep-alive `httpx.Client` for the Edible search API
+
+`app.warmup` builds them up front when warm-up is enabled, and the app's
+lifespan closes them on shutdown.
+"""
+import threading
+from typing import Callable
+
+import httpx
+
+from app.config import get_settings
+
+settings = get_settings()
+
+
+class ClientRegistry:
+    """Named, lazily constructed, process-wide clients."""
+
+    def __init__(self):
+        self._factories: dict[str, tuple[Callable, Callable | None]] = {}
+        self._instances: dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, factory: Callable, close: Callable | None = None) -> None:
+        self._factories[name] = (factory, close)
+
+    def get(self, name: str):
+        client = self._instances.get(name)
+        if client is None:
+            with self._lock:
+                client = self._instances.get(name)
+                if client is None:
+                    client = self._instances[name] = self._factories[name][0]()
+        return client
+
+    def created(self) -> list[str]:
+        return sorted(self._instances)
+
+    def close_all(self) -> None:
+        with self._lock:
+            instances, self._instances = self._instances, {}
+        for name, client in instances.items():
+            close = self._factories[name][1]
+            if close is not None:
+                close(client)
+
+
+def _build_openai_client():
+    # Deferred import: `openai` is slow to import and only needed once a chat runs
+    from openai import OpenAI
+
+    return OpenAI(api_key=settings.openai_api_key, base_url=settings.openai_base_url or None)
+
+
+def _build_edible_client() -> httpx.Client:
+    return httpx.Client(timeout=15.0)
+
+
+registry = ClientRegistry()
+registry.register("openai", _build_openai_client, close=lambda client: client.close())
+registry.register("edible", _build_edible_client, close=lambda client: client.close())
+
+
+def get_openai_client():
+    return registry.get("openai")
+
+
+def get_edible_client() -> httpx.Client:
+    return registry.get("edible")
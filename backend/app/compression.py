@@ -0,0 +1,188 @@
+"""
+Shared-dictionary compression for conversation message bodies.
+
+Stored values are either plain UTF-8 (legacy rows, or compression disabled) or
+`MAGIC + dict_id + raw deflate stream`, where the deflate stream was produced
+with a zlib preset dictionary. Dictionaries are never deleted, so rows written
+with an older dictionary stay readable after retraining.
+"""
+import os
+import re
+import threading
+import zlib
+from collections import Counter
+from typing import Iterable
+
+from app.config import get_settings
+from app.prompts.product_curator import CLOSING_LINE
+
+MAGIC = b"\x00Z"
+HEADER_SIZE = len(MAGIC) + 1
+MIN_COMPRESS_BYTES = 64
+COMPRESSION_LEVEL = 6
+MAX_TRAINING_CANDIDATES = 20000
+DICT_FILE_PATTERN = re.compile(r"^conversation-(\d+)\.zdict$")
+
+# Dictionary 1 ships with the code: recurring curation phrasing. zlib favours
+# matches near the end of the dictionary, so the most common text goes last.
+BUILTIN_DICT_ID = 1
+BUILTIN_DICTIONARY = "\n".join(
+    [
+        "chocolate dipped strawberries, fresh fruit, cookies, flowers, balloons, gift box, bundle",
+        "It's a thoughtful choice for someone who loves something sweet.",
+        "A cheerful and colorful option that makes a great birthday surprise.",
+        "a comforting gesture during a difficult time. sympathy",
+        "Perfect for sharing with the whole team or office. corporate",
+        "Here are a few options that fit what you're looking for:",
+        "Fresh Fruit Arrangement (SKU: ",
+        "Chocolate Dipped Strawberries (SKU: ",
+        "): This ",
+        CLOSING_LINE,
+    ]
+).encode("utf-8")
+
+_lock = threading.Lock()
+_dictionaries: dict[int, bytes] | None = None
+
+
+def dictionary_path(dict_id: int, directory: str | None = None) -> str:
+    return os.path.join(directory or get_settings().compression_dict_dir, f"conversation-{dict_id}.zdict")
+
+
+def load_dictionaries(directory: str | None = None) -> dict[int, bytes]:
+    """Read every trained dictionary from the dictionary directory."""
+    dictionaries = {BUILTIN_DICT_ID: BUILTIN_DICTIONARY}
+    directory = directory or get_settings().compression_dict_dir
+    if os.path.isdir(directory):
+        for name in os.listdir(directory):
+            match = DICT_FILE_PATTERN.match(name)
+            if match:
+                with open(os.path.join(directory, name), "rb") as f:
+                    dictionaries[int(match.group(1))] = f.read()
+    return dictionaries
+
+
+def get_dictionaries() -> dict[int, bytes]:
+    global _dictionaries
+    if _dictionaries is None:
+        with _lock:
+            if _dictionaries is None:
+                _dictionaries = load_dictionaries()
+    return _dictionaries
+
+
+def reload_dictionaries(directory: str | None = None) -> None:
+    global _dictionaries
+    with _lock:
+        _dictionaries = load_dictionaries(directory)
+
+
+def get_dictionary(dict_id: int) -> bytes:
+    """
+    Dictionary by id. An id this process hasn't seen was trained by another
+    process (`scripts.conversation_dict train`), so the directory is re-read once.
+    """
+    dictionary = get_dictionaries().get(dict_id)
+    if dictionary is None:
+        reload_dictionaries()
+        dictionary = get_dictionaries().get(dict_id)
+    if dictionary is None:
+        raise LookupError(
+            f"Compression dictionary {dict_id} not found in {get_settings().compression_dict_dir}; "
+            "the dictionary directory must be shared by every worker"
+        )
+    return dictionary
+
+
+def active_dictionary_id() -> int:
+    return max(get_dictionaries())
+
+
+def compress_text(text: str, dict_id: int | None = None) -> bytes:
+    """Compress text with a preset dictionary; short or incompressible text stays plain."""
+    raw = text.encode("utf-8")
+    if len(raw) < MIN_COMPRESS_BYTES:
+        return raw
+
+    dict_id = active_dictionary_id() if dict_id is None else dict_id
+    compressor = zlib.compressobj(COMPRESSION_LEVEL, zlib.DEFLATED, -15, zdict=get_dictionary(dict_id))
+    packed = MAGIC + bytes([dict_id]) + compressor.compress(raw) + compressor.flush()
+    return packed if len(packed) < len(raw) else raw
+
+
+def decompress_value(value: bytes | str) -> str:
+    """Decode a stored message body, whichever format it was written in."""
+    if isinstance(value, str):
+        return value
+    value = bytes(value)
+    if not value.startswith(MAGIC):
+        return value.decode("utf-8")
+
+    dictionary = get_dictionary(value[len(MAGIC)])
+    decompressor = zlib.decompressobj(-15, zdict=dictionary)
+    return (decompressor.decompress(value[HEADER_SIZE:]) + decompressor.flush()).decode("utf-8")
+
+
+def is_compressed(value: bytes | str | None) -> bool:
+    return isinstance(value, (bytes, bytearray, memoryview)) and bytes(value[: len(MAGIC)]) == MAGIC
+
+
+def _segments(text: str) -> set[str]:
+    """Candidate dictionary strings: whole lines, sentences and word n-grams."""
+    found = set()
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        found.add(line)
+        found.update(s.strip() for s in re.split(r"(?<=[.!?:])\s+", line) if s.strip())
+        words = line.split()
+        for n in (3, 5, 8):
+            for i in range(len(words) - n + 1):
+                found.add(" ".join(words[i : i + n]))
+    return {s for s in found if len(s) >= 8}
+
+
+def train_dictionary(samples: Iterable[str], size: int = 16384) -> bytes:
+    """
+    Build a zlib preset dictionary from sample messages.
+
+    Segments are scored by (documents containing them) * length; the best ones
+    are packed until `size` bytes, highest scoring last so zlib can reach them
+    with the shortest distances.
+    """
+    doc_freq: Counter[str] = Counter()
+    for text in samples:
+        doc_freq.update(_segments(text))
+
+    ranked = sorted(
+        (seg for seg, freq in doc_freq.items() if freq >= 2),
+        key=lambda seg: doc_freq[seg] * len(seg),
+        reverse=True,
+    )[:MAX_TRAINING_CANDIDATES]
+
+    chosen: list[str] = []
+    used = 0
+    for seg in ranked:
+        if any(seg in other for other in chosen):
+            continue
+        cost = len(seg.encode("utf-8")) + 1
+        if used + cost > size:
+            continue
+        chosen.append(seg)
+        used += cost
+
+    return "\n".join(reversed(chosen)).encode("utf-8")
+
+
+def save_dictionary(dictionary: bytes, directory: str | None = None) -> int:
+    """Store a new dictionary under the next free id and make it active."""
+    directory = directory or get_settings().compression_dict_dir
+    os.makedirs(directory, exist_ok=True)
+    dict_id = max(load_dictionaries(directory)) + 1
+    if dict_id > 255:
+        raise ValueError("Dictionary ids are exhausted (max 255)")
+    with open(dictionary_path(dict_id, directory), "wb") as f:
+        f.write(dictionary)
+    reload_dictionaries(directory)
+    return dict_id
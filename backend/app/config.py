@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings
 from functools import lru_cache
 
@@ -5,13 +7,133 @@ from functools import lru_cache
 class Settings(BaseSettings):
     database_url: str = "sqlite:///./edible_poc.db"
     openai_api_key: str = ""
+    # OpenAI-compatible endpoint override (proxies, local stubs); empty uses the default
+    openai_base_url: str = ""
     edible_api_url: str = "https://www.ediblearrangements.com/api/search/"
     cors_origins: str = "http://localhost:3000"
-    sqlalchemy_echo: bool = True
+    # Engine profile: "dev" | "sqlite-prod" | "server-db" (see app/database.py)
+    db_profile: Literal["dev", "sqlite-prod", "server-db"] = "dev"
+    # Statement logging in any profile; off by default
+    sqlalchemy_echo: bool = False
+    # Optional replica for analytics reads; defaults to database_url
+    analytics_database_url: str = ""
+    # Rows fetched per server-side cursor batch in analytics exports
+    export_chunk_size: int = 1000
 
     # Model configuration
     intent_model: str = "gpt-4o"  # Strong reasoning for intent
     curation_model: str = "gpt-4o-mini"  # Fast for curation
+    # Send the prompt version as OpenAI's `prompt_cache_key` (routes same-prefix requests together)
+    llm_prompt_cache_key: bool = True
+
+    # Bulkheads: worker threads / max waiting requests per workload class (app/bulkheads.py)
+    bulkhead_chat_size: int = 24
+    bulkhead_chat_queue: int = 100
+    bulkhead_search_size: int = 12
+    bulkhead_search_queue: int = 50
+    bulkhead_analytics_size: int = 8
+    bulkhead_analytics_queue: int = 200
+    # Threads stepping gift-plan streams (each blocks on its batch completions)
+    bulkhead_gift_plans_size: int = 4
+    bulkhead_queue_timeout: float = 10.0
+    bulkhead_retry_after: int = 2
+
+    # Chat admission control (app/admission.py); keep max_concurrent <= bulkhead_chat_size.
+    # OpenAI rpm/tpm of 0 disable the token buckets.
+    admission_max_concurrent: int = 24
+    admission_max_per_session: int = 1
+    admission_max_queue: int = 100
+    admission_deadline_ms: int = 8000
+    admission_openai_rpm: int = 0
+    admission_openai_tpm: int = 0
+    admission_calls_per_turn: int = 2
+    admission_tokens_per_turn: int = 3000
+
+    # Idempotency-Key replay window for /api/chat (app/idempotency.py); 0 disables
+    idempotency_ttl_seconds: int = 600
+    idempotency_max_keys: int = 10000
+
+    # Shared cache (app/cache.py): memory | sqlite (one file per host) | redis | none.
+    # Per-namespace TTLs in seconds; 0 disables a namespace.
+    cache_backend: Literal["memory", "sqlite", "redis", "none"] = "memory"
+    cache_sqlite_path: str = "./cache/shared-cache.sqlite3"
+    cache_redis_url: str = "redis://localhost:6379/0"
+    cache_key_prefix: str = "edible"
+    cache_memory_max_entries: int = 10000
+    cache_ttl_catalog: int = 300
+    cache_ttl_intent: int = 0
+    # SKU -> product records (GET/POST /api/products); own LRU of this size with the memory backend
+    cache_ttl_product: int = 86400
+    cache_product_max_entries: int = 50000
+    product_lookup_max_skus: int = 100
+    # Encoded (JSON + gzip/brotli) /api/search responses with ETags, per keyword; 0 disables keeping them
+    search_response_ttl_seconds: int = 300
+    search_response_max_entries: int = 2000
+    # Answer follow-ups about one shown/known product from its stored record (no LLM calls)
+    product_mentions_enabled: bool = True
+
+    # Warm-up before the worker reports ready (app/warmup.py); keywords are comma-separated
+    warmup_enabled: bool = False
+    warmup_keywords: str = ""
+    warmup_timeout_seconds: float = 10.0
+
+    # Catalog prewarm from recent intent logs (app/prewarm.py); schedule is "HH:MM,..." in UTC
+    prewarm_on_startup: bool = False
+    prewarm_schedule: str = ""
+    prewarm_window_hours: float = 24.0
+    prewarm_top_n: int = 50
+    prewarm_concurrency: int = 4
+    prewarm_rate_per_second: float = 5.0
+    prewarm_ttl_seconds: int = 3600
+
+    # Collapse size/packaging variants before curation (app/services/variants.py)
+    variant_collapse_enabled: bool = True
+    variant_max_price_ratio: float = 3.0
+    # Jaccard similarity of marker-free name shingles for two names to be variants
+    variant_min_similarity: float = 0.6
+
+    # Local BM25 index over products seen in searches (app/services/catalog_index.py);
+    # saved to catalog_index_path at shutdown and loaded at start-up
+    catalog_index_enabled: bool = False
+    catalog_index_path: str = "./cache/catalog-index.json.gz"
+    catalog_index_top_k: int = 15
+
+    # Bulk gift plans (app/services/gift_planning.py): recipients per request and per LLM call
+    gift_plan_max_recipients: int = 500
+    gift_plan_recipients_per_call: int = 8
+    gift_plan_llm_concurrency: int = 4
+    gift_plan_fetch_concurrency: int = 8
+
+    # Logging: queue-backed, one JSON object per line unless log_format="text"
+    log_level: str = "INFO"
+    log_format: Literal["json", "text"] = "json"
+    log_queue_size: int = 10000
+
+    # Instrumentation: Prometheus /metrics + histograms, and Server-Timing headers
+    metrics_enabled: bool = False
+    server_timing_enabled: bool = True
+
+    # Opt-in request profiling: signed X-Profile header and/or random sampling
+    profiling_secret: str = ""
+    profiling_sample_rate: float = 0.0
+    profiling_interval_ms: float = 5.0
+    profiling_dir: str = "./profiles"
+    profiling_max_files: int = 50
+    # Sampled, anonymized recording of /api/chat traffic for benchmarks/replay.py
+    traffic_record_rate: float = 0.0
+    traffic_record_path: str = "./traces/chat-traffic.ndjson"
+    # Shared secret for /api/admin endpoints (disabled when empty)
+    admin_token: str = ""
+
+    # Primary key generation: "random" nanoids or "time_sortable" (timestamp prefix)
+    id_strategy: Literal["random", "time_sortable"] = "random"
+
+    # Store conversation bodies compressed with a shared zlib dictionary
+    conversation_compression: bool = False
+    compression_dict_dir: str = "./zdicts"
+
+    # Intent keyword/dietary storage: "json" columns too, or "normalized" (intent_terms rows only)
+    intent_storage: Literal["json", "normalized"] = "json"
 
     class Config:
         env_file = ".env"
@@ -1,47 +1,186 @@
+import logging
+from dataclasses import dataclass, field
+
 from sqlalchemy import create_engine, event
-from sqlalchemy.engine import make_url
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.orm import sessionmaker, Session
 
 from app.config import get_settings
+from app.metrics import span
+from app.profiling import attach_current_thread
 from app.base import Base  # noqa: F401 - re-export for convenience
 
 settings = get_settings()
 
+
+@dataclass(frozen=True)
+class EngineProfile:
+    """Connection pool and per-connection tuning for one deployment shape."""
+    name: str
+    echo: bool = False
+    sqlite_pragmas: dict[str, str | int] = field(default_factory=dict)
+    pool_size: int | None = None  # None keeps SQLAlchemy's default
+    max_overflow: int | None = None
+    pool_timeout: float = 30.0
+    pool_recycle: int = -1
+    pool_pre_ping: bool = False
+    query_cache_size: int = 500
+    read_pool_size: int | None = None
+
+
+ENGINE_PROFILES: dict[str, EngineProfile] = {
+    # Local development: default pooling, FK enforcement only (SQLALCHEMY_ECHO=true logs statements)
+    "dev": EngineProfile(
+        name="dev",
+        sqlite_pragmas={"foreign_keys": "ON"},
+    ),
+    # Single-host SQLite: WAL so readers never block the writer, NORMAL sync
+    # (durable at checkpoint), waits on locks instead of failing, larger cache
+    # and memory-mapped reads.
+    "sqlite-prod": EngineProfile(
+        name="sqlite-prod",
+        sqlite_pragmas={
+            "journal_mode": "WAL",
+            "synchronous": "NORMAL",
+            "busy_timeout": 5000,
+            "cache_size": -65536,  # KiB, i.e. 64 MiB
+            "mmap_size": 268435456,
+            "temp_store": "MEMORY",
+            "foreign_keys": "ON",
+        },
+        pool_size=8,
+        max_overflow=8,
+        query_cache_size=1200,
+        read_pool_size=4,
+    ),
+    # Postgres/MySQL: sized pool, stale-connection checks, recycling behind LBs
+    "server-db": EngineProfile(
+        name="server-db",
+        pool_size=20,
+        max_overflow=10,
+        pool_timeout=10.0,
+        pool_recycle=1800,
+        pool_pre_ping=True,
+        query_cache_size=1200,
+        read_pool_size=10,
+    ),
+}
+
+
 def _to_sync_database_url(raw_url: str) -> str:
     url = make_url(raw_url)
     if url.drivername == "sqlite+aiosqlite":
         url = url.set(drivername="sqlite")
     return str(url)
 
+
+def _is_sqlite_memory(database_url: str) -> bool:
+    url = make_url(database_url)
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+def build_engine(
+    database_url: str,
+    profile: EngineProfile,
+    read_only: bool = False,
+    echo: bool | None = None,
+) -> Engine:
+    """Create an engine configured according to an engine profile."""
+    url = make_url(database_url)
+    is_sqlite = url.get_backend_name() == "sqlite"
+
+    # Statement logging goes through the app's logging queue (app/log.py) rather
+    # than SQLAlchemy's own synchronous stdout handler.
+    if profile.echo if echo is None else echo:
+        logging.getLogger("sqlalchemy.engine").setLevel(logging.INFO)
+
+    kwargs: dict = {
+        "echo": False,
+        "pool_pre_ping": profile.pool_pre_ping,
+        "query_cache_size": profile.query_cache_size,
+    }
+    if is_sqlite:
+        kwargs["connect_args"] = {"check_same_thread": False}
+
+    pool_size = profile.read_pool_size if read_only else profile.pool_size
+    if pool_size is not None and not _is_sqlite_memory(database_url):
+        kwargs.update(
+            pool_size=pool_size,
+            max_overflow=0 if read_only else (profile.max_overflow or 0),
+            pool_timeout=profile.pool_timeout,
+            pool_recycle=profile.pool_recycle,
+        )
+
+    new_engine = create_engine(database_url, **kwargs)
+
+    if is_sqlite:
+        pragmas = dict(profile.sqlite_pragmas)
+        if read_only:
+            pragmas["query_only"] = "ON"
+
+        @event.listens_for(new_engine, "connect")
+        def set_sqlite_pragma(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+            cursor.close()
+
+    elif read_only:
+        backend = url.get_backend_name()
+
+        @event.listens_for(new_engine, "connect")
+        def set_read_only(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            if backend == "postgresql":
+                cursor.execute("SET SESSION CHARACTERISTICS AS TRANSACTION READ ONLY")
+            elif backend in ("mysql", "mariadb"):
+                cursor.execute("SET SESSION TRANSACTION READ ONLY")
+            cursor.close()
+
+    return new_engine
+
+
 DATABASE_URL = _to_sync_database_url(settings.database_url)
-_url = make_url(DATABASE_URL)
-_is_sqlite = _url.get_backend_name() == "sqlite"
-
-engine = create_engine(
-    DATABASE_URL,
-    echo=settings.sqlalchemy_echo,
-    connect_args={"check_same_thread": False} if _is_sqlite else {},
-)
-
-if _is_sqlite:
-    # Enable foreign key support for SQLite
-    @event.listens_for(engine, "connect")
-    def set_sqlite_pragma(dbapi_connection, connection_record):
-        cursor = dbapi_connection.cursor()
-        cursor.execute("PRAGMA foreign_keys=ON")
-        cursor.close()
+ENGINE_PROFILE = ENGINE_PROFILES[settings.db_profile]
+
+engine = build_engine(DATABASE_URL, ENGINE_PROFILE, echo=settings.sqlalchemy_echo)
+
+# Analytics reads go through their own read-only pool (optionally a replica) so
+# long scans never hold connections the chat write path is waiting on.
+if _is_sqlite_memory(DATABASE_URL) and not settings.analytics_database_url:
+    read_engine = engine
+else:
+    read_engine = build_engine(
+        _to_sync_database_url(settings.analytics_database_url or settings.database_url),
+        ENGINE_PROFILE,
+        read_only=True,
+        echo=settings.sqlalchemy_echo,
+    )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
 
 
 def get_db():
     """Dependency for FastAPI routes to get a database session."""
+    attach_current_thread()
     db = SessionLocal()
     try:
         yield db
-        db.commit()
+        with span("db_commit"):
+            db.commit()
     except Exception:
         db.rollback()
         raise
     finally:
         db.close()
+
+
+def get_read_db():
+    """Dependency for analytics reads; uses the read-only connection pool."""
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.rollback()
+        db.close()
@@ -0,0 +1,170 @@
+"""
+Idempotency keys for /api/chat.
+
+The frontend sends an `Idempotency-Key` header with each submitted message and
+reuses it when it retries the same submit. For one key (scoped to the
+session):
+
+- the first request runs the full chat turn;
+- duplicates arriving while it runs wait for it and get the same result;
+- duplicates within `idempotency_ttl_seconds` after it finished get the
+  stored `ChatResponse` replayed, marked with `Idempotent-Replayed: true`,
+  without any LLM/catalog calls or database writes.
+
+A turn counts as completed when the handler returns, so handlers commit their
+writes before returning (see `commit_turn` in app/routers/chat.py); a failed
+commit raises and leaves nothing stored. Only full successful turns are
+stored. Errors and degraded (shed) replies are shared with concurrent
+duplicates but not kept, so a later retry runs again. Reusing a key with a
+different message is rejected with 422.
+
+Keys live in process memory: with several workers a retry that lands on a
+different worker runs again (no worse than without a key).
+"""
+import asyncio
+import functools
+import hashlib
+import json
+import time
+from collections import OrderedDict
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse, Response
+
+from app.config import get_settings
+from app.metrics import IDEMPOTENT_REQUESTS
+
+settings = get_settings()
+
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+
+
+def request_fingerprint(request) -> str:
+    """Hash of the request body, to detect a key reused for a different request."""
+    body = json.dumps(request.model_dump(mode="json"), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(body.encode()).hexdigest()
+
+
+class _Entry:
+    __slots__ = ("fingerprint", "future", "response", "expires_at")
+
+    def __init__(self, fingerprint: str, future: asyncio.Future):
+        self.fingerprint = fingerprint
+        self.future = future
+        self.response = None
+        self.expires_at = 0.0
+
+
+class IdempotencyStore:
+    """In-flight turns and recently completed responses by key (event-loop only)."""
+
+    def __init__(self, ttl_seconds: float, max_keys: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_keys = max_keys
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self.outcomes: dict[str, int] = {}
+
+    def _count(self, outcome: str) -> None:
+        self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+        if settings.metrics_enabled:
+            IDEMPOTENT_REQUESTS.inc(outcome=outcome)
+
+    def _prune(self, now: float) -> None:
+        # Completed entries are moved to the end on completion, so they are in
+        # expiry order; in-flight entries in between are skipped.
+        expired = []
+        for key, entry in self._entries.items():
+            if entry.response is None:
+                continue
+            if entry.expires_at > now:
+                break
+            expired.append(key)
+        for key in expired:
+            del self._entries[key]
+        while len(self._entries) > self.max_keys:
+            key = next((k for k, e in self._entries.items() if e.response is not None), None)
+            if key is None:
+                break
+            del self._entries[key]
+
+    async def run(self, key: str, fingerprint: str, func):
+        """Run `func()` once per key; duplicates share or replay its result."""
+        now = time.monotonic()
+        self._prune(now)
+        entry = self._entries.get(key)
+        if entry is not None and entry.fingerprint != fingerprint:
+            self._count("conflict")
+            raise HTTPException(status_code=422, detail="Idempotency-Key was already used for a different request")
+        if entry is not None and entry.response is not None:
+            self._count("replayed")
+            return JSONResponse(entry.response, headers={REPLAYED_HEADER: "true"})
+        if entry is not None:
+            self._count("joined")
+            try:
+                # shield: a cancelled duplicate must not cancel the shared turn
+                result = await asyncio.shield(entry.future)
+            except asyncio.CancelledError:
+                if entry.future.cancelled():
+                    # The first request was abandoned (client went away); run this one instead
+                    return await self.run(key, fingerprint, func)
+                raise
+            if isinstance(result, Response):
+                return result
+            return JSONResponse(result.model_dump(mode="json"), headers={REPLAYED_HEADER: "true"})
+
+        self._count("executed")
+        entry = _Entry(fingerprint, asyncio.get_running_loop().create_future())
+        self._entries[key] = entry
+        try:
+            result = await func()
+        except asyncio.CancelledError:
+            del self._entries[key]
+            entry.future.cancel()
+            raise
+        except Exception as exc:
+            del self._entries[key]
+            entry.future.set_exception(exc)
+            # Nobody may be waiting; mark the exception as retrieved
+            entry.future.exception()
+            raise
+        entry.future.set_result(result)
+        if isinstance(result, Response):
+            # Degraded or custom responses are shared with waiters but not stored
+            del self._entries[key]
+        else:
+            entry.response = result.model_dump(mode="json")
+            entry.expires_at = time.monotonic() + self.ttl_seconds
+            self._entries.move_to_end(key)
+            self._prune(time.monotonic())
+        return result
+
+    def snapshot(self) -> dict:
+        return {
+            "keys": len(self._entries),
+            "in_flight": sum(1 for e in self._entries.values() if e.response is None),
+            "outcomes": dict(self.outcomes),
+        }
+
+
+chat_idempotency = IdempotencyStore(settings.idempotency_ttl_seconds, settings.idempotency_max_keys)
+
+
+def idempotent(store: IdempotencyStore):
+    """Decorator for async chat handlers taking an `idempotency_key` header parameter."""
+
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            key = kwargs.get("idempotency_key")
+            if not key or not store.ttl_seconds:
+                return await func(*args, **kwargs)
+            if len(key) > MAX_KEY_LENGTH:
+                raise HTTPException(status_code=400, detail=f"Idempotency-Key longer than {MAX_KEY_LENGTH} characters")
+            request = kwargs["request"]
+            scoped_key = f"{request.session_id or ''}:{key}"
+            return await store.run(scoped_key, request_fingerprint(request), functools.partial(func, *args, **kwargs))
+
+        return wrapper
+
+    return decorator
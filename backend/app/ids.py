@@ -0,0 +1,60 @@
+import os
+import time
+from typing import Callable
+
+from nanoid import generate
+
+from app.config import get_settings
+
+ID_SIZE = 21
+
+# ASCII-ordered base62 alphabet so that lexical order == numeric order.
+_SORTABLE_ALPHABET = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+_TIMESTAMP_CHARS = 8  # 62**8 ms ~= 6900 years of headroom
+_RANDOM_CHARS = ID_SIZE - _TIMESTAMP_CHARS  # 13 chars ~= 77 bits of randomness
+
+
+def random_id() -> str:
+    """Random 21-char nanoid (the original key format)."""
+    return generate(size=ID_SIZE)
+
+
+def _encode_base62(value: int, width: int) -> str:
+    chars = []
+    for _ in range(width):
+        value, rem = divmod(value, 62)
+        chars.append(_SORTABLE_ALPHABET[rem])
+    return "".join(reversed(chars))
+
+
+def time_sortable_id(now_ms: int | None = None) -> str:
+    """
+    21-char key with a millisecond timestamp prefix followed by random chars.
+
+    Keys generated later sort after earlier ones, so inserts append to the
+    right edge of the primary key B-tree instead of landing on random pages.
+    """
+    if now_ms is None:
+        now_ms = time.time_ns() // 1_000_000
+    prefix = _encode_base62(now_ms, _TIMESTAMP_CHARS)
+    suffix = _encode_base62(int.from_bytes(os.urandom(10), "big"), _RANDOM_CHARS)
+    return prefix + suffix
+
+
+def id_timestamp_ms(value: str) -> int:
+    """Decode the millisecond timestamp prefix of a time-sortable id."""
+    result = 0
+    for char in value[:_TIMESTAMP_CHARS]:
+        result = result * 62 + _SORTABLE_ALPHABET.index(char)
+    return result
+
+
+ID_STRATEGIES: dict[str, Callable[[], str]] = {
+    "random": random_id,
+    "time_sortable": time_sortable_id,
+}
+
+
+def generate_id() -> str:
+    """Generate a primary key using the configured `id_strategy`."""
+    return ID_STRATEGIES[get_settings().id_strategy]()
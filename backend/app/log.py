@@ -0,0 +1,256 @@
+"""
+Non-blocking structured logging.
+
+- Every record goes through a bounded queue; a `QueueListener` thread does the
+  formatting and the actual I/O. Enqueueing never blocks: when the queue is
+  full the record is dropped and counted (`log_records_dropped_total`).
+- Records carry the request's correlation id (`X-Request-ID`, set by
+  `RequestIdMiddleware`) and any structured fields passed as
+  `extra={"fields": {...}}`. Output is one JSON object per line by default.
+- `EventAggregator` handles high-volume events (e.g. per-product parse
+  failures): every occurrence is counted, only a sample is logged
+  individually, and a summary ("N parse errors in last 10s") is emitted once
+  per window.
+
+`configure_logging()` is called at app start-up. Uvicorn's loggers and
+SQLAlchemy statement logging (`SQLALCHEMY_ECHO`) go through the same queue.
+Calling it again with the same arguments does nothing; with other arguments
+it drains and replaces its own queue handler and listener, and reuses the
+aggregate flusher thread.
+"""
+import atexit
+import copy
+import json
+import logging
+import queue
+import random
+import sys
+import threading
+import time
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+from app.ids import random_id
+from app.metrics import LOG_RECORDS_DROPPED
+
+REQUEST_ID_HEADER = b"x-request-id"
+# Servers that install their own synchronous handlers; routed through the queue too
+PROPAGATED_LOGGERS = ("uvicorn", "uvicorn.error", "uvicorn.access")
+# Per-call INFO lines from HTTP clients; only shown at DEBUG
+CHATTY_LOGGERS = ("httpx", "httpcore")
+
+_request_id: ContextVar[str | None] = ContextVar("request_id", default=None)
+_listener: QueueListener | None = None
+_handler: QueueHandler | None = None
+_configured: tuple | None = None
+_flusher: threading.Thread | None = None
+_aggregators: list["EventAggregator"] = []
+_flusher_stop = threading.Event()
+
+
+def get_request_id() -> str | None:
+    return _request_id.get()
+
+
+class RequestContextFilter(logging.Filter):
+    """Stamps the correlation id on records in the calling thread."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = _request_id.get()
+        return True
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """QueueHandler that drops (and counts) records instead of blocking on a full queue."""
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.inc()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Render the message and traceback now (args may not survive the thread
+        # hop) but leave JSON formatting to the listener thread.
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.msg, record.args, record.exc_info = record.message, None, None
+        return record
+
+
+class JSONFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        request_id = getattr(record, "request_id", None)
+        if request_id:
+            payload["request_id"] = request_id
+        fields = getattr(record, "fields", None)
+        if fields:
+            payload.update(fields)
+        if record.exc_text:
+            payload["exc"] = record.exc_text
+        return json.dumps(payload, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s%(fields_text)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        record.request_id = getattr(record, "request_id", None) or "-"
+        fields = getattr(record, "fields", None)
+        record.fields_text = "".join(f" {k}={v}" for k, v in fields.items()) if fields else ""
+        return super().format(record)
+
+
+class EventAggregator:
+    """Counts a high-volume event, logs a sample of occurrences and one summary per window."""
+
+    def __init__(self, logger: logging.Logger, event: str, description: str, window_seconds: float = 10.0,
+                 sample_rate: float = 0.01, level: int = logging.WARNING):
+        self.logger = logger
+        self.event = event
+        self.description = description
+        self.window_seconds = window_seconds
+        self.sample_rate = sample_rate
+        self.level = level
+        self._count = 0
+        self._example: dict | None = None
+        self._window_start = time.monotonic()
+        self._lock = threading.Lock()
+        _aggregators.append(self)
+
+    def hit(self, message: str, **fields) -> None:
+        with self._lock:
+            self._count += 1
+            if self._example is None:
+                self._example = {"example": message, **fields}
+        if self.sample_rate and random.random() < self.sample_rate:
+            self.logger.log(self.level, message, extra={"fields": {"event": self.event, "sampled": True, **fields}})
+        if time.monotonic() - self._window_start >= self.window_seconds:
+            self.flush()
+
+    def flush(self, force: bool = False) -> None:
+        now = time.monotonic()
+        with self._lock:
+            elapsed = now - self._window_start
+            if not force and elapsed < self.window_seconds:
+                return
+            count, example = self._count, self._example
+            self._count, self._example, self._window_start = 0, None, now
+        if count:
+            self.logger.log(
+                self.level,
+                f"{count} {self.description} in last {elapsed:.0f}s",
+                extra={"fields": {"event": self.event, "count": count, **(example or {})}},
+            )
+
+
+def _flush_aggregators() -> None:
+    while not _flusher_stop.wait(1.0):
+        for aggregator in list(_aggregators):
+            aggregator.flush()
+
+
+def configure_logging(level: str = "INFO", fmt: str = "json", queue_size: int = 10000, stream=None) -> None:
+    """Route all logging through a bounded queue drained by a background thread."""
+    global _listener, _handler, _configured, _flusher
+    config = (level.upper(), fmt, queue_size, stream)
+    if config == _configured and _listener is not None:
+        return
+    first = _handler is None
+
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(JSONFormatter() if fmt == "json" else TextFormatter())
+
+    log_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+    handler = NonBlockingQueueHandler(log_queue)
+    handler.addFilter(RequestContextFilter())
+
+    root = logging.getLogger()
+    # Handlers installed before us would write synchronously; later ones are the caller's
+    for existing in list(root.handlers) if first else [_handler]:
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level.upper())
+    if first:
+        for name in PROPAGATED_LOGGERS:
+            server_logger = logging.getLogger(name)
+            for existing in list(server_logger.handlers):
+                server_logger.removeHandler(existing)
+            server_logger.propagate = True
+    for name in CHATTY_LOGGERS:
+        logging.getLogger(name).setLevel(logging.DEBUG if level.upper() == "DEBUG" else logging.WARNING)
+
+    # Drain the replaced queue only once nothing enqueues into it any more
+    _stop_listener()
+    _listener = QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    _handler, _configured = handler, config
+
+    if _flusher is None:
+        _flusher_stop.clear()
+        _flusher = threading.Thread(target=_flush_aggregators, name="log-aggregator-flush", daemon=True)
+        _flusher.start()
+
+
+def _stop_listener() -> None:
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def stop_logging() -> None:
+    """Flush pending aggregates, stop the flusher thread and drain the queue."""
+    global _flusher
+    _flusher_stop.set()
+    if _flusher is not None:
+        _flusher.join()
+        _flusher = None
+    for aggregator in list(_aggregators):
+        aggregator.flush(force=True)
+    _stop_listener()
+
+
+atexit.register(stop_logging)
+
+
+class RequestIdMiddleware:
+    """Pure ASGI middleware: reuse or assign a correlation id and echo it in `X-Request-ID`."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for key, value in scope.get("headers", ()):
+            if key == REQUEST_ID_HEADER:
+                request_id = value.decode("latin-1")[:64]
+                break
+        request_id = request_id or random_id()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((REQUEST_ID_HEADER, request_id.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        token = _request_id.set(request_id)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_id.reset(token)
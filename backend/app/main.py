@@ -1,10 +1,25 @@
-from fastapi import FastAPI
+import logging
+from contextlib import asynccontextmanager
+
+import anyio
+from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 
+from app.clients import registry as clients
 from app.config import get_settings
-from app.routers import chat, search, analytics
+from app.log import RequestIdMiddleware, configure_logging
+from app.metrics import MetricsMiddleware, render_prometheus
+from app.prewarm import PrewarmScheduler
+from app.profiling import ProfilingMiddleware
+from app.routers import chat, gift_plans, products, search, analytics, admin
+from app.services.catalog_index import catalog_index, load_catalog_index
+from app.traffic import TraceWriter, TrafficRecorderMiddleware
+from app.warmup import warm_up
 
 settings = get_settings()
+configure_logging(settings.log_level, settings.log_format, settings.log_queue_size)
+logger = logging.getLogger(__name__)
 
 raw_origins = (settings.cors_origins or "").strip()
 if raw_origins == "*":
@@ -16,10 +31,34 @@ else:
         cors_allow_origins = ["http://localhost:3000"]
     cors_allow_credentials = True
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Uvicorn starts accepting requests only after this start-up phase returns
+    if settings.catalog_index_enabled:
+        try:
+            await anyio.to_thread.run_sync(load_catalog_index, settings.catalog_index_path)
+        except Exception:
+            logger.exception("Loading the catalog index failed; starting empty")
+    if settings.warmup_enabled:
+        await anyio.to_thread.run_sync(warm_up)
+    # Catalog prewarm runs in the background; the worker is ready meanwhile
+    scheduler = None
+    if settings.prewarm_on_startup or settings.prewarm_schedule:
+        scheduler = PrewarmScheduler(settings.prewarm_schedule, settings.prewarm_on_startup).start()
+    yield
+    if scheduler is not None:
+        scheduler.stop()
+    if settings.catalog_index_enabled and len(catalog_index):
+        catalog_index.save(settings.catalog_index_path)
+    clients.close_all()
+
+
 app = FastAPI(
     title="Edible Gift Concierge API",
     description="AI-powered gift discovery for Edible Arrangements",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 # CORS middleware for frontend
@@ -29,14 +68,50 @@ app.add_middleware(
     allow_credentials=cors_allow_credentials,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "X-Request-ID", "X-Degraded", "Idempotent-Replayed"],
 )
 
+# Per-stage timings (Server-Timing header) and Prometheus metrics
+app.add_middleware(MetricsMiddleware)
+
+# Correlation id for logs (X-Request-ID in and out)
+app.add_middleware(RequestIdMiddleware)
+
+# Opt-in sampling profiler; not installed at all unless configured
+if settings.profiling_secret or settings.profiling_sample_rate > 0:
+    app.add_middleware(
+        ProfilingMiddleware,
+        store=admin.profile_store,
+        secret=settings.profiling_secret,
+        sample_rate=settings.profiling_sample_rate,
+        interval_ms=settings.profiling_interval_ms,
+    )
+
+# Sampled chat traffic recording for offline replay
+if settings.traffic_record_rate > 0:
+    app.add_middleware(
+        TrafficRecorderMiddleware,
+        writer=TraceWriter(settings.traffic_record_path),
+        sample_rate=settings.traffic_record_rate,
+    )
+
 # Include routers
 app.include_router(chat.router, prefix="/api", tags=["chat"])
+app.include_router(gift_plans.router, prefix="/api", tags=["gift-plans"])
 app.include_router(search.router, prefix="/api", tags=["search"])
+app.include_router(products.router, prefix="/api", tags=["products"])
 app.include_router(analytics.router, prefix="/api", tags=["analytics"])
+app.include_router(admin.router, prefix="/api", tags=["admin"], include_in_schema=False)
 
 
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus scrape endpoint (enabled with METRICS_ENABLED)."""
+    if not settings.metrics_enabled:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
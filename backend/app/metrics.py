@@ -0,0 +1,277 @@
+"""
+Lightweight hot-path instrumentation.
+
+- `span(stage)` times a pipeline stage. Durations go to the current request's
+  Server-Timing header and, when `metrics_enabled`, to a latency histogram.
+- `track_upstream(name)` maintains in-flight gauges and error counters for
+  calls to the Edible API and OpenAI.
+- `MetricsMiddleware` collects per-request timings and writes Server-Timing.
+- `render_prometheus()` renders every metric in the Prometheus text format.
+
+When both metrics and Server-Timing are off, a span costs a context-variable
+lookup and a flag check.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from app.config import get_settings
+from app.profiling import attach_current_thread
+
+settings = get_settings()
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_request_timings: ContextVar[list | None] = ContextVar("request_timings", default=None)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _format_labels(self, key: tuple, extra: str = "") -> str:
+        parts = [f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, key)]
+        if extra:
+            parts.append(extra)
+        return "{" + ",".join(parts) + "}" if parts else ""
+
+    def render(self) -> list[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{self._format_labels(key)} {_num(value)}" for key, value in items]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, *args, buckets: tuple[float, ...] = DEFAULT_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = buckets
+        self._series: dict[tuple, list] = {}  # key -> [bucket counts..., sum, count]
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * len(self.buckets) + [0.0, 0]
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = [(key, list(series)) for key, series in self._series.items()]
+        lines = []
+        for key, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                le = 'le="%s"' % _num(bound)
+                lines.append(f"{self.name}_bucket{self._format_labels(key, le)} {cumulative}")
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{self._format_labels(key, le)} {series[-1]}")
+            lines.append(f"{self.name}_sum{self._format_labels(key)} {_num(series[-2])}")
+            lines.append(f"{self.name}_count{self._format_labels(key)} {series[-1]}")
+        return lines
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _num(value: float) -> str:
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+REGISTRY: list[_Metric] = []
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "HTTP request latency.", ("route", "method", "status")
+)
+HTTP_IN_FLIGHT = Gauge("http_requests_in_flight", "HTTP requests currently being served.")
+STAGE_DURATION = Histogram("pipeline_stage_duration_seconds", "Chat pipeline stage latency.", ("stage",))
+UPSTREAM_IN_FLIGHT = Gauge("upstream_requests_in_flight", "Calls currently waiting on an upstream.", ("upstream",))
+UPSTREAM_ERRORS = Counter("upstream_errors_total", "Failed upstream calls.", ("upstream", "kind"))
+LLM_TOKENS = Counter("llm_tokens_total", "LLM tokens by type (prompt/completion/cached_prompt).", ("model", "stage", "type"))
+LLM_LATENCY = Histogram("llm_request_duration_seconds", "LLM completion latency.", ("model", "stage"))
+LLM_COST = Counter("llm_cost_usd_total", "Estimated LLM spend in USD.", ("model", "stage"))
+CACHE_REQUESTS = Counter("cache_requests_total", "Cache lookups by result (hit/miss).", ("cache", "result"))
+BULKHEAD_ACTIVE = Gauge("bulkhead_active", "Requests running in a bulkhead pool.", ("pool",))
+BULKHEAD_QUEUED = Gauge("bulkhead_queued", "Requests waiting for a bulkhead worker.", ("pool",))
+BULKHEAD_REJECTIONS = Counter("bulkhead_rejections_total", "Requests rejected by a bulkhead.", ("pool", "reason"))
+BULKHEAD_QUEUE_WAIT = Histogram("bulkhead_queue_wait_seconds", "Time spent waiting for a bulkhead worker.", ("pool",))
+ADMISSION_ACTIVE = Gauge("chat_admission_active", "Chat turns admitted and running.")
+ADMISSION_QUEUED = Gauge("chat_admission_queued", "Chat turns waiting for admission.")
+ADMISSION_SHED = Counter("chat_admission_shed_total", "Chat turns shed with a degraded reply.", ("reason",))
+LOG_RECORDS_DROPPED = Counter("log_records_dropped_total", "Log records dropped because the log queue was full.")
+IDEMPOTENT_REQUESTS = Counter(
+    "chat_idempotent_requests_total", "Chat requests carrying an Idempotency-Key, by outcome.", ("outcome",)
+)
+
+
+def render_prometheus() -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.render())
+
+    # Derived hit ratio per cache, for dashboards without PromQL
+    lines.append("# HELP cache_hit_ratio Cache hits / lookups since start.")
+    lines.append("# TYPE cache_hit_ratio gauge")
+    caches = sorted({key[0] for key, _ in CACHE_REQUESTS._values.items()})
+    for cache in caches:
+        hits = CACHE_REQUESTS.value(cache=cache, result="hit")
+        total = hits + CACHE_REQUESTS.value(cache=cache, result="miss")
+        lines.append(f'cache_hit_ratio{{cache="{_escape(cache)}"}} {_num(hits / total if total else 0.0)}')
+    return "\n".join(lines) + "\n"
+
+
+class span:
+    """Time a pipeline stage: `with span("curate_products"): ...`."""
+    __slots__ = ("stage", "_timings", "_start")
+
+    def __init__(self, stage: str):
+        self.stage = stage
+
+    def __enter__(self):
+        attach_current_thread()
+        self._timings = _request_timings.get()
+        self._start = time.perf_counter() if self._timings is not None or settings.metrics_enabled else None
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._start is None:
+            return False
+        duration = time.perf_counter() - self._start
+        if self._timings is not None:
+            self._timings.append((self.stage, duration))
+        if settings.metrics_enabled:
+            STAGE_DURATION.observe(duration, stage=self.stage)
+        return False
+
+
+def record_cache_lookup(cache: str, hit: bool) -> None:
+    if settings.metrics_enabled:
+        CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+@contextmanager
+def track_upstream(upstream: str):
+    """In-flight gauge and error counter around one upstream call."""
+    if not settings.metrics_enabled:
+        yield
+        return
+    UPSTREAM_IN_FLIGHT.inc(upstream=upstream)
+    try:
+        yield
+    except Exception as exc:
+        UPSTREAM_ERRORS.inc(upstream=upstream, kind=type(exc).__name__)
+        raise
+    finally:
+        UPSTREAM_IN_FLIGHT.dec(upstream=upstream)
+
+
+def record_upstream_error(upstream: str, kind: str) -> None:
+    if settings.metrics_enabled:
+        UPSTREAM_ERRORS.inc(upstream=upstream, kind=kind)
+
+
+def format_server_timing(timings: list[tuple[str, float]], total: float) -> str:
+    entries = [f"{stage};dur={duration * 1000:.1f}" for stage, duration in timings]
+    entries.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(entries)
+
+
+def _route_label(scope: dict) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware: request latency metrics and the Server-Timing header."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        server_timing = settings.server_timing_enabled
+        if scope["type"] != "http" or not (server_timing or settings.metrics_enabled):
+            await self.app(scope, receive, send)
+            return
+
+        timings: list[tuple[str, float]] = []
+        token = _request_timings.set(timings if server_timing else None)
+        start = time.perf_counter()
+        status = {"code": 500}
+        record_metrics = settings.metrics_enabled
+        if record_metrics:
+            HTTP_IN_FLIGHT.inc()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                if server_timing:
+                    headers = list(message.get("headers", []))
+                    value = format_server_timing(timings, time.perf_counter() - start)
+                    headers.append((b"server-timing", value.encode("latin-1")))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_timings.reset(token)
+            if record_metrics:
+                HTTP_IN_FLIGHT.dec()
+                HTTP_REQUEST_DURATION.observe(
+                    time.perf_counter() - start,
+                    route=_route_label(scope),
+                    method=scope["method"],
+                    status=status["code"],
+                )
@@ -1,15 +1,13 @@
 import json
 from datetime import datetime
 from typing import Any
-from sqlalchemy import String, Boolean, Float, Integer, ForeignKey, Text, TypeDecorator
+from sqlalchemy import String, Boolean, Float, Integer, ForeignKey, Index, LargeBinary, Text, TypeDecorator
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from nanoid import generate
 
 from app.base import Base
-
-
-def generate_id() -> str:
-    return generate(size=21)
+from app.compression import compress_text, decompress_value
+from app.config import get_settings
+from app.ids import generate_id
 
 
 class JSONList(TypeDecorator):
@@ -28,6 +26,27 @@ class JSONList(TypeDecorator):
         return json.loads(value)
 
 
+class CompressedText(TypeDecorator):
+    """
+    Text stored as bytes, compressed with a shared zlib dictionary when
+    `conversation_compression` is enabled. Reads accept every stored format.
+    """
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value: str | None, dialect: Any) -> bytes | None:
+        if value is None:
+            return None
+        if get_settings().conversation_compression:
+            return compress_text(value)
+        return value.encode("utf-8")
+
+    def process_result_value(self, value: bytes | str | None, dialect: Any) -> str | None:
+        if value is None:
+            return None
+        return decompress_value(value)
+
+
 class Session(Base):
     __tablename__ = "sessions"
 
@@ -45,15 +64,19 @@ class Session(Base):
     product_clicks: Mapped[list["ProductClick"]] = relationship(
         back_populates="session", cascade="all, delete-orphan"
     )
+    llm_usage: Mapped[list["LLMUsage"]] = relationship(
+        back_populates="session", cascade="all, delete-orphan"
+    )
 
 
 class Conversation(Base):
     __tablename__ = "conversations"
+    __table_args__ = (Index("ix_conversations_created_at_id", "created_at", "id"),)
 
     id: Mapped[str] = mapped_column(String(21), primary_key=True, default=generate_id)
     session_id: Mapped[str] = mapped_column(ForeignKey("sessions.id", ondelete="CASCADE"))
     role: Mapped[str] = mapped_column(String(10))  # "user" | "assistant"
-    content: Mapped[str] = mapped_column(Text)
+    content: Mapped[str] = mapped_column(CompressedText)
     created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
 
     session: Mapped["Session"] = relationship(back_populates="conversations")
@@ -61,6 +84,7 @@ class Conversation(Base):
 
 class IntentLog(Base):
     __tablename__ = "intent_logs"
+    __table_args__ = (Index("ix_intent_logs_created_at_id", "created_at", "id"),)
 
     id: Mapped[str] = mapped_column(String(21), primary_key=True, default=generate_id)
     session_id: Mapped[str] = mapped_column(ForeignKey("sessions.id", ondelete="CASCADE"))
@@ -74,10 +98,28 @@ class IntentLog(Base):
     created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
 
     session: Mapped["Session"] = relationship(back_populates="intent_logs")
+    terms: Mapped[list["IntentTerm"]] = relationship(
+        back_populates="intent_log", cascade="all, delete-orphan"
+    )
+
+
+class IntentTerm(Base):
+    """One keyword or dietary tag of an intent log, stored as a queryable row."""
+    __tablename__ = "intent_terms"
+    __table_args__ = (Index("ix_intent_terms_value", "value", "kind"),)
+
+    intent_log_id: Mapped[str] = mapped_column(
+        ForeignKey("intent_logs.id", ondelete="CASCADE"), primary_key=True
+    )
+    kind: Mapped[str] = mapped_column(String(10), primary_key=True)  # "dietary" | "keyword"
+    value: Mapped[str] = mapped_column(String(100), primary_key=True)
+
+    intent_log: Mapped["IntentLog"] = relationship(back_populates="terms")
 
 
 class ProductClick(Base):
     __tablename__ = "product_clicks"
+    __table_args__ = (Index("ix_product_clicks_created_at_id", "created_at", "id"),)
 
     id: Mapped[str] = mapped_column(String(21), primary_key=True, default=generate_id)
     session_id: Mapped[str] = mapped_column(ForeignKey("sessions.id", ondelete="CASCADE"))
@@ -87,3 +129,21 @@ class ProductClick(Base):
     created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
 
     session: Mapped["Session"] = relationship(back_populates="product_clicks")
+
+
+class LLMUsage(Base):
+    """Token usage and latency of one LLM completion within a session."""
+    __tablename__ = "llm_usage"
+
+    id: Mapped[str] = mapped_column(String(21), primary_key=True, default=generate_id)
+    session_id: Mapped[str] = mapped_column(ForeignKey("sessions.id", ondelete="CASCADE"), index=True)
+    stage: Mapped[str] = mapped_column(String(20))  # "intent" | "curation"
+    model: Mapped[str] = mapped_column(String(50))
+    prompt_tokens: Mapped[int] = mapped_column(Integer, default=0)
+    completion_tokens: Mapped[int] = mapped_column(Integer, default=0)
+    cached_prompt_tokens: Mapped[int] = mapped_column(Integer, default=0)
+    latency_ms: Mapped[float] = mapped_column(Float)
+    prompt_version: Mapped[str | None] = mapped_column(String(40), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
+
+    session: Mapped["Session"] = relationship(back_populates="llm_usage")
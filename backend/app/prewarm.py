@@ -0,0 +1,228 @@
+"""
+Catalog cache pre-warming from recent intent logs.
+
+A prewarm run mines keyword and occasion demand from `intent_logs` over the
+last `prewarm_window_hours` (see `keyword_demand`), then fetches the top
+`prewarm_top_n` keywords from Edible into the catalog cache with at most
+`prewarm_concurrency` requests in flight and `prewarm_rate_per_second`
+requests per second, so a warm-up never bursts the upstream. Prewarmed
+entries are kept for `prewarm_ttl_seconds`.
+
+Runs happen in the background at start-up (`prewarm_on_startup`) and daily
+at the UTC times in `prewarm_schedule` (e.g. "07:30,11:30" ahead of the
+lunch and evening peaks). With a shared cache backend only one worker runs a
+given slot; with the in-process backend every worker warms its own cache.
+
+Coverage: after a run, every catalog lookup in the next `PREWARM_HORIZON`
+counts towards the share of keyword requests that were already warm, shown
+by `GET /api/admin/prewarm`. `backtest_coverage` computes the same share
+offline from history (see scripts/prewarm.py).
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from app.admission import TokenBucket
+from app.cache import NamespacedCache
+from app.config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+PREWARM_HORIZON = timedelta(hours=1)
+# One run per schedule slot across workers sharing a cache backend
+prewarm_locks = NamespacedCache("prewarm-lock", str, ttl_seconds=15 * 60)
+
+
+class RateLimiter:
+    """Blocking token bucket shared by the prefetch threads."""
+
+    def __init__(self, rate_per_second: float):
+        self._bucket = TokenBucket(rate_per_second, max(rate_per_second, 1.0))
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                wait = self._bucket.wait_time(1, now)
+                if wait == 0:
+                    self._bucket.take(1, now)
+                    return
+            time.sleep(wait)
+
+
+class CoverageTracker:
+    """Share of catalog lookups after a prewarm run whose keyword had been prewarmed."""
+
+    def __init__(self, horizon: timedelta = PREWARM_HORIZON):
+        self.horizon = horizon
+        self._lock = threading.Lock()
+        self._warm: frozenset = frozenset()
+        self._until = 0.0
+        self._started_at: datetime | None = None
+        self._requests = 0
+        self._hits = 0
+        self.previous: dict | None = None
+
+    def start(self, keywords) -> None:
+        with self._lock:
+            if self._started_at is not None:
+                self.previous = self._snapshot()
+            self._warm = frozenset(keywords)
+            self._started_at = datetime.utcnow()
+            self._until = time.monotonic() + self.horizon.total_seconds()
+            self._requests = self._hits = 0
+
+    def observe(self, keyword: str) -> None:
+        if not self._warm or time.monotonic() >= self._until:
+            return
+        with self._lock:
+            self._requests += 1
+            self._hits += keyword in self._warm
+
+    def _snapshot(self) -> dict:
+        return {
+            "started_at": self._started_at.isoformat() if self._started_at else None,
+            "window_open": time.monotonic() < self._until,
+            "warm_keywords": len(self._warm),
+            "requests": self._requests,
+            "warm_requests": self._hits,
+            "coverage": round(self._hits / self._requests, 3) if self._requests else None,
+        }
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {"current": self._snapshot(), "previous": self.previous}
+
+
+prewarm_coverage = CoverageTracker()
+last_run: dict | None = None
+
+
+def hot_keywords(window_hours: float, top_n: int, now: datetime | None = None) -> list[tuple[str, int]]:
+    from app.database import ReadSessionLocal
+    from app.services.intent_analytics import keyword_demand
+
+    since = (now or datetime.utcnow()) - timedelta(hours=window_hours)
+    db = ReadSessionLocal()
+    try:
+        return keyword_demand(db, since=since, until=now, limit=top_n)
+    finally:
+        db.close()
+
+
+def prefetch_keywords(keywords: list[str], concurrency: int, rate_per_second: float,
+                      ttl_seconds: float | None = None) -> dict:
+    """Fetch keywords into the catalog cache under a concurrency and rate limit."""
+    # app.services imports this module (via edible_client), so import lazily
+    from app.services.edible_client import refresh_keyword
+
+    limiter = RateLimiter(rate_per_second)
+
+    def fetch(keyword: str) -> bool:
+        limiter.acquire()
+        return refresh_keyword(keyword, ttl_seconds)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(concurrency, 1), thread_name_prefix="prewarm") as pool:
+        results = list(pool.map(fetch, keywords))
+    return {
+        "keywords": len(keywords),
+        "fetched": sum(results),
+        "failed": len(results) - sum(results),
+        "duration_ms": round((time.perf_counter() - start) * 1000, 1),
+    }
+
+
+def run_prewarm(slot: str | None = None) -> dict | None:
+    """
+    One prewarm run; returns its summary, or None when the slot is not ours:
+    another worker took it, or the lock backend failed. Without a cache
+    backend there is nothing to coordinate through and every worker runs.
+    """
+    global last_run
+    if slot and prewarm_locks.enabled and not prewarm_locks.add(slot, "taken"):
+        logger.info("Prewarm slot skipped", extra={"fields": {"slot": slot}})
+        return None
+    demand = hot_keywords(settings.prewarm_window_hours, settings.prewarm_top_n)
+    keywords = [keyword for keyword, _ in demand]
+    summary = prefetch_keywords(
+        keywords, settings.prewarm_concurrency, settings.prewarm_rate_per_second, settings.prewarm_ttl_seconds
+    )
+    prewarm_coverage.start(keywords)
+    last_run = {"at": datetime.utcnow().isoformat(), "slot": slot, **summary, "top": demand[:10]}
+    logger.info("Catalog prewarm finished", extra={"fields": {k: v for k, v in last_run.items() if k != "top"}})
+    return last_run
+
+
+def parse_schedule(schedule: str) -> list[tuple[int, int]]:
+    """Parse "07:30,17:00" into [(7, 30), (17, 0)] (UTC times of day)."""
+    times = []
+    for item in schedule.split(","):
+        item = item.strip()
+        if item:
+            hour, _, minute = item.partition(":")
+            times.append((int(hour), int(minute or 0)))
+    return sorted(times)
+
+
+def next_run_at(times: list[tuple[int, int]], now: datetime) -> datetime:
+    candidates = [now.replace(hour=h, minute=m, second=0, microsecond=0) for h, m in times]
+    candidates += [c + timedelta(days=1) for c in candidates]
+    return min(c for c in candidates if c > now)
+
+
+class PrewarmScheduler:
+    """Background thread running prewarms at start-up and at scheduled times of day."""
+
+    def __init__(self, schedule: str, on_startup: bool):
+        self.times = parse_schedule(schedule)
+        self.on_startup = on_startup
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="catalog-prewarm", daemon=True)
+
+    def start(self) -> "PrewarmScheduler":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _safe_run(self, slot: str | None) -> None:
+        try:
+            run_prewarm(slot)
+        except Exception:
+            logger.exception("Catalog prewarm failed")
+
+    def _run(self) -> None:
+        if self.on_startup:
+            self._safe_run(None)
+        while self.times:
+            at = next_run_at(self.times, datetime.utcnow())
+            if self._stop.wait((at - datetime.utcnow()).total_seconds()):
+                return
+            self._safe_run(at.strftime("%Y-%m-%dT%H:%M"))
+
+
+def backtest_coverage(db, at: datetime, window_hours: float, top_n: int,
+                      horizon: timedelta = PREWARM_HORIZON) -> dict:
+    """Coverage a prewarm at `at` would have had over the following horizon, from history."""
+    from app.services.intent_analytics import keyword_demand
+
+    warm = {keyword for keyword, _ in keyword_demand(db, since=at - timedelta(hours=window_hours), until=at,
+                                                     limit=top_n)}
+    # Only keywords are searched; occasions are just a hint for what to warm
+    upcoming = keyword_demand(db, since=at, until=at + horizon, limit=None, include_occasions=False)
+    requests = sum(count for _, count in upcoming)
+    warm_requests = sum(count for keyword, count in upcoming if keyword in warm)
+    return {
+        "at": at.isoformat(),
+        "window_hours": window_hours,
+        "top_n": top_n,
+        "requests": requests,
+        "warm_requests": warm_requests,
+        "coverage": round(warm_requests / requests, 3) if requests else None,
+    }
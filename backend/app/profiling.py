@@ -0,0 +1,176 @@
+"""
+Opt-in per-request statistical profiling.
+
+A request is profiled when it carries a valid signed `X-Profile` header or is
+picked by `profiling_sample_rate`. While it runs, a sampler thread records the
+stacks of the threads working on it: the event loop thread, plus threadpool
+workers that attach themselves when they enter a pipeline `span` or open a DB
+session for the profiled request. Samples are written as folded stacks
+(flamegraph.pl / speedscope compatible) into a bounded on-disk ring.
+
+The middleware is only installed when profiling is configured, so normal
+requests pay nothing.
+"""
+import hashlib
+import hmac
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+import anyio
+
+from app.ids import generate_id
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_FILE_PATTERN = re.compile(r"^\d+-[A-Z]+-[\w.-]+-[\w-]+\.folded$")
+MAX_TOKEN_TTL_SECONDS = 24 * 3600
+
+_active_profile: ContextVar["RequestProfile | None"] = ContextVar("active_profile", default=None)
+
+
+def sign_profile_token(secret: str, ttl_seconds: int = 600, now: float | None = None) -> str:
+    """Header value that triggers profiling until it expires."""
+    expires = int((now or time.time()) + ttl_seconds)
+    digest = hmac.new(secret.encode(), str(expires).encode(), hashlib.sha256).hexdigest()
+    return f"{expires}.{digest}"
+
+
+def verify_profile_token(secret: str, token: str, now: float | None = None) -> bool:
+    if not secret or "." not in token:
+        return False
+    expires, digest = token.split(".", 1)
+    if not expires.isdigit():
+        return False
+    now = now or time.time()
+    if not now <= int(expires) <= now + MAX_TOKEN_TTL_SECONDS:
+        return False
+    expected = hmac.new(secret.encode(), expires.encode(), hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, digest)
+
+
+class RequestProfile:
+    """Samples the stacks of the threads attached to one request."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.threads: set[int] = set()
+        self.counts: Counter[str] = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def attach(self, ident: int | None = None) -> None:
+        self.threads.add(ident or threading.get_ident())
+
+    def start(self) -> None:
+        self._sampler.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._sampler.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            self.samples += 1
+            for ident in tuple(self.threads):
+                frame = frames.get(ident)
+                if frame is None:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                self.counts[";".join(reversed(stack))] += 1
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.counts.most_common())
+
+
+def attach_current_thread() -> None:
+    """Called from instrumented code; attaches this thread to an active profile."""
+    profile = _active_profile.get()
+    if profile is not None:
+        profile.attach()
+
+
+class ProfileStore:
+    """Bounded ring of profile files in a directory; the oldest files are evicted."""
+
+    def __init__(self, directory: str, max_files: int):
+        self.directory = directory
+        self.max_files = max_files
+        self._lock = threading.Lock()
+
+    def save(self, method: str, path: str, content: str) -> str:
+        slug = re.sub(r"[^\w.-]+", "_", path.strip("/")) or "root"
+        name = f"{int(time.time() * 1000)}-{method}-{slug[:60]}-{generate_id()}.folded"
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(os.path.join(self.directory, name), "w", encoding="utf-8") as f:
+                f.write(content)
+            for old in self.list()[self.max_files :]:
+                os.remove(os.path.join(self.directory, old["name"]))
+        return name
+
+    def list(self) -> list[dict]:
+        """Stored profiles, newest first."""
+        if not os.path.isdir(self.directory):
+            return []
+        entries = []
+        for name in os.listdir(self.directory):
+            if PROFILE_FILE_PATTERN.match(name):
+                stat = os.stat(os.path.join(self.directory, name))
+                entries.append({"name": name, "size": stat.st_size, "created_ms": int(name.split("-", 1)[0])})
+        return sorted(entries, key=lambda e: e["name"], reverse=True)
+
+    def path(self, name: str) -> str | None:
+        if not PROFILE_FILE_PATTERN.match(name):
+            return None
+        full = os.path.join(self.directory, name)
+        return full if os.path.isfile(full) else None
+
+
+class ProfilingMiddleware:
+    """Pure ASGI middleware that profiles signed or sampled requests."""
+
+    def __init__(self, app, store: ProfileStore, secret: str = "", sample_rate: float = 0.0, interval_ms: float = 5.0):
+        self.app = app
+        self.store = store
+        self.secret = secret
+        self.sample_rate = sample_rate
+        self.interval = interval_ms / 1000
+
+    def _triggered(self, scope) -> bool:
+        if self.secret:
+            for key, value in scope.get("headers", ()):
+                if key == PROFILE_HEADER:
+                    return verify_profile_token(self.secret, value.decode("latin-1"))
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._triggered(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(self.interval)
+        profile.attach()  # event loop thread
+        token = _active_profile.set(profile)
+        profile.start()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _active_profile.reset(token)
+            # Joining the sampler and writing the file would block the event loop
+            with anyio.CancelScope(shield=True):
+                await anyio.to_thread.run_sync(self._finish, profile, scope["method"], scope["path"])
+
+    def _finish(self, profile: RequestProfile, method: str, path: str) -> None:
+        profile.stop()
+        self.store.save(method, path, profile.folded())
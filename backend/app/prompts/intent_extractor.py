@@ -1,3 +1,7 @@
+# Bump when INTENT_SYSTEM_PROMPT changes: recorded per LLM call (llm_usage.prompt_version)
+# and used as the provider prompt-cache key, so cache hit rates are comparable per version.
+INTENT_PROMPT_VERSION = "intent-v1"
+
 INTENT_SYSTEM_PROMPT = """
 You are an intent extraction engine for a gift shop (Edible Arrangements). Your job is to analyze
 a customer conversation and extract structured gifting intent.
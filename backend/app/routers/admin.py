@@ -0,0 +1,39 @@
+import hmac
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import FileResponse
+
+from app import prewarm
+from app.config import get_settings
+from app.profiling import ProfileStore
+
+router = APIRouter()
+settings = get_settings()
+profile_store = ProfileStore(settings.profiling_dir, settings.profiling_max_files)
+
+
+def require_admin(x_admin_token: str = Header(default="")):
+    """Admin endpoints are hidden (404) unless ADMIN_TOKEN is set and matches."""
+    if not settings.admin_token or not hmac.compare_digest(x_admin_token, settings.admin_token):
+        raise HTTPException(status_code=404, detail="Not Found")
+
+
+@router.get("/admin/profiles", dependencies=[Depends(require_admin)])
+def list_profiles():
+    """Stored request profiles, newest first."""
+    return {"profiles": profile_store.list()}
+
+
+@router.get("/admin/profiles/{name}", dependencies=[Depends(require_admin)])
+def download_profile(name: str):
+    """Download one profile as folded stacks (flamegraph.pl / speedscope)."""
+    path = profile_store.path(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="text/plain", filename=name)
+
+
+@router.get("/admin/prewarm", dependencies=[Depends(require_admin)])
+def prewarm_status():
+    """Last catalog prewarm run on this worker and the share of keyword lookups it covered."""
+    return {"last_run": prewarm.last_run, "coverage": prewarm.prewarm_coverage.snapshot()}
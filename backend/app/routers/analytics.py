@@ -1,16 +1,38 @@
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import datetime
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from sqlalchemy import update
 
-from app.database import get_db
+from app.bulkheads import BULKHEADS, dependency_in, run_in
+from app.config import get_settings
+from app.database import get_db, get_read_db
 from app.models import Session as DBSession, ProductClick
-from app.schemas import ClickRequest, ConvertRequest, StatusResponse
+from app.schemas import (
+    ClickRequest,
+    ConvertRequest,
+    LLMStageUsage,
+    PromptCacheResponse,
+    PromptCacheUsage,
+    SessionCostResponse,
+    StatusResponse,
+    TermFrequency,
+    TermFrequencyResponse,
+)
+from app.services.export_service import EXPORT_FORMATS, stream_export
+from app.services.intent_analytics import term_frequencies
+from app.services.llm import prompt_cache_usage, session_usage_breakdown
 
 router = APIRouter()
+analytics_db = dependency_in("analytics", get_db)
+analytics_read_db = dependency_in("analytics", get_read_db)
 
 
 @router.post("/analytics/click", response_model=StatusResponse)
-def track_click(request: ClickRequest, db: Session = Depends(get_db)):
+@run_in("analytics")
+def track_click(request: ClickRequest, db: Session = Depends(analytics_db)):
     """
     Track when a user clicks on a product card.
 
@@ -42,7 +64,8 @@ def track_click(request: ClickRequest, db: Session = Depends(get_db)):
 
 
 @router.post("/analytics/convert", response_model=StatusResponse)
-def mark_converted(request: ConvertRequest, db: Session = Depends(get_db)):
+@run_in("analytics")
+def mark_converted(request: ConvertRequest, db: Session = Depends(analytics_db)):
     """
     Mark a session as converted (user proceeded toward purchase).
 
@@ -64,3 +87,106 @@ def mark_converted(request: ConvertRequest, db: Session = Depends(get_db)):
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/analytics/intents/terms", response_model=TermFrequencyResponse)
+@run_in("analytics")
+def intent_term_frequencies(
+    kind: Literal["dietary", "keyword"] = "keyword",
+    since: datetime | None = None,
+    until: datetime | None = None,
+    limit: int = Query(default=20, ge=1, le=500),
+    db: Session = Depends(analytics_read_db),
+):
+    """
+    Most frequently requested keywords or dietary tags.
+
+    Aggregated in SQL over the normalized intent_terms table.
+    """
+    try:
+        rows = term_frequencies(db, kind, since=since, until=until, limit=limit)
+        return TermFrequencyResponse(
+            kind=kind,
+            terms=[TermFrequency(value=value, count=count) for value, count in rows],
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/analytics/export/{table}")
+@run_in("analytics")
+def export_table(
+    table: Literal["product_clicks", "intent_logs", "conversations"],
+    format: Literal["csv", "ndjson"] = "ndjson",
+    start: datetime | None = None,
+    end: datetime | None = None,
+    after_created_at: datetime | None = None,
+    after_id: str | None = None,
+):
+    """
+    Stream an analytics table as CSV or NDJSON, ordered by (created_at, id).
+
+    Filter with `start`/`end` on created_at. To resume a dropped export, pass the
+    `created_at` and `id` of the last row received as `after_created_at` and
+    `after_id`.
+    """
+    if after_id is not None and after_created_at is None:
+        raise HTTPException(status_code=422, detail="after_id requires after_created_at")
+
+    rows = stream_export(
+        table,
+        format,
+        start=start,
+        end=end,
+        after_created_at=after_created_at,
+        after_id=after_id,
+        chunk_size=get_settings().export_chunk_size,
+    )
+    return StreamingResponse(
+        BULKHEADS["analytics"].iterate(rows),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{table}.{format}"'},
+    )
+
+
+@router.get("/analytics/sessions/{session_id}/cost", response_model=SessionCostResponse)
+@run_in("analytics")
+def session_cost(session_id: str, db: Session = Depends(analytics_read_db)):
+    """
+    LLM token usage, latency and estimated cost for a session, per stage and model.
+    """
+    try:
+        session = db.get(DBSession, session_id)
+        if not session:
+            raise HTTPException(status_code=404, detail="Session not found")
+
+        stages = [LLMStageUsage(**row) for row in session_usage_breakdown(db, session_id)]
+        return SessionCostResponse(
+            session_id=session_id,
+            total_cost_usd=round(sum(s.cost_usd for s in stages), 6),
+            total_tokens=sum(s.prompt_tokens + s.completion_tokens for s in stages),
+            stages=stages,
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/analytics/llm/prompt-cache", response_model=PromptCacheResponse)
+@run_in("analytics")
+def prompt_cache_report(
+    since: datetime | None = None,
+    until: datetime | None = None,
+    db: Session = Depends(analytics_read_db),
+):
+    """
+    Share of prompt tokens served from the provider's prompt cache, per stage,
+    prompt version and model, with average latency (compare across versions).
+    """
+    try:
+        rows = prompt_cache_usage(db, since=since, until=until)
+        return PromptCacheResponse(since=since, until=until, usage=[PromptCacheUsage(**row) for row in rows])
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -1,28 +1,58 @@
-from fastapi import APIRouter, Depends, HTTPException
+import re
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import select
+from sqlalchemy import insert, select
 
+from app.admission import admit, chat_admission, recent_recommendations
+from app.bulkheads import dependency_in, run_in
+from app.config import get_settings
 from app.database import get_db
-from app.models import Session as DBSession, Conversation, IntentLog
+from app.ids import ID_SIZE, generate_id
+from app.idempotency import chat_idempotency, idempotent
+from app.metrics import span
+from app.models import Session as DBSession, Conversation, IntentLog, IntentTerm, LLMUsage
 from app.schemas import ChatRequest, ChatResponse, ExtractedIntent, Message
 from app.services.intent_service import extract_intent
+from app.services.variants import collapse_variants
 from app.services.curation_service import curate_products
+from app.services.catalog_index import rank_products
 from app.services.edible_client import search_products
+from app.services.intent_analytics import build_intent_term_rows
+from app.services.llm import LLMCall, collect_llm_usage
+from app.services.product_mentions import find_mentioned_product, product_detail_reply
 
 router = APIRouter()
+chat_db = dependency_in("chat", get_db)
+
+ISSUED_ID = re.compile(rf"[A-Za-z0-9_-]{{{ID_SIZE}}}")
+
+BUSY_CLARIFYING_QUESTION = (
+    "We're helping a lot of shoppers right now, so bear with me for a moment! "
+    "While I catch up: what's the occasion, and who is the gift for?"
+)
+BUSY_POPULAR_PICKS_REPLY = (
+    "We're helping a lot of shoppers right now, so here are a few popular picks while I catch up. "
+    "Send your message again in a moment and I'll tailor recommendations to you."
+)
 
 
 def get_or_create_session(db: Session, session_id: str | None) -> DBSession:
-    """Get existing session or create a new one."""
+    """
+    Get existing session or create a new one. An unknown id in our own format
+    (issued by a degraded turn, which writes nothing) becomes the new session's id.
+    """
     if session_id:
         session = db.query(DBSession).filter(DBSession.id == session_id).first()
         if session:
             return session
 
     # Create new session
-    session = DBSession()
+    session = DBSession(id=session_id) if session_id and ISSUED_ID.fullmatch(session_id) else DBSession()
     db.add(session)
-    db.flush()
+    with span("db_flush"):
+        db.flush()
     return session
 
 
@@ -30,27 +60,73 @@ def save_conversation(db: Session, session_id: str, role: str, content: str) ->
     """Save a message to the conversation history."""
     conversation = Conversation(session_id=session_id, role=role, content=content)
     db.add(conversation)
-    db.flush()
+    with span("db_flush"):
+        db.flush()
     return conversation
 
 
 def save_intent_log(db: Session, session_id: str, intent: ExtractedIntent) -> IntentLog:
-    """Save extracted intent to the database."""
+    """
+    Save extracted intent to the database.
+
+    Keywords and dietary tags are always written as intent_terms rows (one bulk
+    insert) for the SQL aggregates behind /api/analytics/intents/terms. The
+    default "json" intent storage mode also keeps them in the JSON columns;
+    "normalized" mode leaves those empty.
+    """
+    normalized = get_settings().intent_storage == "normalized"
     intent_log = IntentLog(
         session_id=session_id,
         occasion=intent.occasion.value if intent.occasion else None,
         urgency=intent.urgency.value if intent.urgency else None,
         recipient=intent.recipient,
         budget=intent.budget.value if intent.budget else None,
-        dietary=intent.dietary,
-        keywords=intent.keywords,
+        dietary=[] if normalized else intent.dietary,
+        keywords=[] if normalized else intent.keywords,
         confidence=intent.confidence,
     )
     db.add(intent_log)
-    db.flush()
+    with span("db_flush"):
+        db.flush()
+
+        rows = build_intent_term_rows(intent_log.id, intent.dietary, intent.keywords)
+        if rows:
+            db.execute(insert(IntentTerm), rows)
     return intent_log
 
 
+def save_llm_usage(db: Session, session_id: str, calls: list[LLMCall]) -> None:
+    """Save token usage and latency of the LLM calls made during this turn."""
+    if not calls:
+        return
+    db.add_all(
+        LLMUsage(
+            session_id=session_id,
+            stage=call.stage,
+            model=call.model,
+            prompt_tokens=call.prompt_tokens,
+            completion_tokens=call.completion_tokens,
+            cached_prompt_tokens=call.cached_prompt_tokens,
+            latency_ms=call.latency_ms,
+            prompt_version=call.prompt_version,
+        )
+        for call in calls
+    )
+    with span("db_flush"):
+        db.flush()
+
+
+def commit_turn(db: Session) -> None:
+    """
+    Commit the turn before the handler returns.
+
+    `@idempotent` stores the response as soon as the handler returns, so a
+    retry must not be able to replay a turn whose commit later failed.
+    """
+    with span("db_commit"):
+        db.commit()
+
+
 def build_history_for_llm(history: list[Message], new_message: str) -> list[dict]:
     """Build conversation history in format for Anthropic API."""
     messages = []
@@ -60,68 +136,134 @@ def build_history_for_llm(history: list[Message], new_message: str) -> list[dict
     return messages
 
 
+def degraded_chat_response(request: ChatRequest, reason: str) -> JSONResponse:
+    """
+    Fast reply for a shed chat turn: no LLM calls and no DB writes. A first
+    turn still gets a session id; the session row is created by the next
+    admitted turn that sends it.
+
+    First turns get a clarifying question; later turns get recently popular
+    picks when there are any. `X-Degraded` tells clients the reply is generic.
+    """
+    session_id = request.session_id or generate_id()
+    popular = recent_recommendations.popular(3) if request.history else []
+    if popular:
+        response = ChatResponse(
+            reply=BUSY_POPULAR_PICKS_REPLY,
+            products=popular,
+            intent=ExtractedIntent(),
+            session_id=session_id,
+        )
+    else:
+        response = ChatResponse(
+            reply=BUSY_CLARIFYING_QUESTION,
+            intent=ExtractedIntent(needs_clarification=True, clarifying_question=BUSY_CLARIFYING_QUESTION),
+            session_id=session_id,
+        )
+    return JSONResponse(response.model_dump(mode="json"), headers={"X-Degraded": reason})
+
+
 @router.post("/chat", response_model=ChatResponse)
-def chat(request: ChatRequest, db: Session = Depends(get_db)):
+@idempotent(chat_idempotency)
+@admit(chat_admission, on_shed=degraded_chat_response)
+@run_in("chat")
+def chat(
+    request: ChatRequest,
+    db: Session = Depends(chat_db),
+    idempotency_key: str | None = Header(default=None),
+):
     """
     Main chat endpoint for the gift concierge.
 
+    An `Idempotency-Key` header makes resubmits of the same message safe: they
+    share or replay the first response instead of running the turn again
+    (handled by `@idempotent`, see app/idempotency.py).
+
     Flow:
     1. Get or create session
     2. Save user message
-    3. Extract intent (Stage 1)
-    4. If clarification needed, return question
-    5. Search Edible catalog with keywords
-    6. Curate products (Stage 2)
-    7. Save assistant reply
-    8. Return response
+    3. If the message asks about one shown or known product, answer from its
+       stored record (see app/services/product_mentions.py)
+    4. Extract intent (Stage 1)
+    5. If clarification needed, return question
+    6. Search Edible catalog with keywords
+    7. Curate products (Stage 2)
+    8. Save assistant reply
+    9. Return response
     """
     try:
-        # 1. Get or create session
-        session = get_or_create_session(db, request.session_id)
+        with collect_llm_usage() as llm_calls:
+            # 1. Get or create session
+            session = get_or_create_session(db, request.session_id)
+
+            # 2. Save user message
+            save_conversation(db, session.id, "user", request.message)
+
+            # 3. Follow-ups about one product skip intent extraction, search and curation
+            if get_settings().product_mentions_enabled:
+                with span("product_mention"):
+                    product = find_mentioned_product(request.message, request.history)
+                if product is not None:
+                    reply = product_detail_reply(product)
+                    save_conversation(db, session.id, "assistant", reply)
+                    commit_turn(db)
+                    return ChatResponse(
+                        reply=reply,
+                        products=[product],
+                        intent=ExtractedIntent(),
+                        session_id=session.id,
+                    )
+
+            # 4. Build conversation history and extract intent
+            messages = build_history_for_llm(request.history, request.message)
+            intent = extract_intent(messages)
 
-        # 2. Save user message
-        save_conversation(db, session.id, "user", request.message)
+            # 5. If clarification needed, return the question
+            if intent.needs_clarification and intent.clarifying_question:
+                reply = intent.clarifying_question
+                save_conversation(db, session.id, "assistant", reply)
+                save_intent_log(db, session.id, intent)
+                save_llm_usage(db, session.id, llm_calls)
+                commit_turn(db)
 
-        # 3. Build conversation history and extract intent
-        messages = build_history_for_llm(request.history, request.message)
-        intent = extract_intent(messages)
+                return ChatResponse(
+                    reply=reply,
+                    products=[],
+                    intent=intent,
+                    session_id=session.id,
+                )
 
-        # 4. If clarification needed, return the question
-        if intent.needs_clarification and intent.clarifying_question:
-            reply = intent.clarifying_question
+            # 6. Search for products if we have keywords and sufficient confidence
+            products = []
+            if intent.keywords and intent.confidence >= 0.6:
+                products = search_products(intent.keywords)
+                # Rank everything seen so far against the whole intent, not just these keywords
+                if get_settings().catalog_index_enabled:
+                    products = rank_products(intent, products, get_settings().catalog_index_top_k)
+                if get_settings().variant_collapse_enabled:
+                    products = collapse_variants(products)
+
+            # 7. Curate products and generate response
+            if products:
+                reply, curated_products = curate_products(intent, products)
+                recent_recommendations.record(curated_products)
+            else:
+                # No products found or low confidence - ask for more info
+                reply = "I'd love to help you find the perfect gift! Could you tell me a bit more about the occasion and who you're shopping for?"
+                curated_products = []
+
+            # 8. Save assistant reply and intent log
             save_conversation(db, session.id, "assistant", reply)
             save_intent_log(db, session.id, intent)
+            save_llm_usage(db, session.id, llm_calls)
+            commit_turn(db)
 
             return ChatResponse(
                 reply=reply,
-                products=[],
+                products=curated_products,
                 intent=intent,
                 session_id=session.id,
             )
 
-        # 5. Search for products if we have keywords and sufficient confidence
-        products = []
-        if intent.keywords and intent.confidence >= 0.6:
-            products = search_products(intent.keywords)
-
-        # 6. Curate products and generate response
-        if products:
-            reply, curated_products = curate_products(intent, products)
-        else:
-            # No products found or low confidence - ask for more info
-            reply = "I'd love to help you find the perfect gift! Could you tell me a bit more about the occasion and who you're shopping for?"
-            curated_products = []
-
-        # 7. Save assistant reply and intent log
-        save_conversation(db, session.id, "assistant", reply)
-        save_intent_log(db, session.id, intent)
-
-        return ChatResponse(
-            reply=reply,
-            products=curated_products,
-            intent=intent,
-            session_id=session.id,
-        )
-
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,131 @@
+import json
+import logging
+import math
+import time
+from collections.abc import Iterator
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy.orm import Session
+
+from app.admission import admit, chat_admission
+from app.bulkheads import BULKHEADS, run_in
+from app.config import get_settings
+from app.database import SessionLocal
+from app.routers.chat import chat_db, get_or_create_session, save_conversation, save_intent_log, save_llm_usage
+from app.schemas import ExtractedIntent, GiftPlanRequest, GiftRecipient
+from app.services.gift_planning import plan_gifts
+from app.services.intent_service import extract_intent
+from app.services.llm import LLMCall, collect_llm_usage
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+
+def assign_recipient_ids(recipients: list[GiftRecipient]) -> list[tuple[str, GiftRecipient]]:
+    """Recipient ids as given, else "r<position>"; ids must be unique within a plan."""
+    assigned = [(recipient.id or f"r{i}", recipient) for i, recipient in enumerate(recipients, start=1)]
+    ids = [recipient_id for recipient_id, _ in assigned]
+    if len(set(ids)) != len(ids):
+        raise HTTPException(status_code=422, detail="Recipient ids must be unique")
+    return assigned
+
+
+def stream_gift_plan(
+    session_id: str,
+    intent: ExtractedIntent,
+    recipients: list[tuple[str, GiftRecipient]],
+) -> Iterator[str]:
+    """NDJSON lines: one `plan`, one `recipient` per recipient as it is ready, then `done`."""
+    start = time.perf_counter()
+    yield json.dumps({
+        "type": "plan",
+        "session_id": session_id,
+        "intent": intent.model_dump(mode="json"),
+        "recipients": len(recipients),
+    }) + "\n"
+
+    llm_calls: list[LLMCall] = []
+    results = []
+    try:
+        for result in plan_gifts(intent, recipients, llm_calls):
+            results.append(result)
+            yield json.dumps({"type": "recipient", **result.model_dump(mode="json")}) + "\n"
+    except Exception as e:
+        logger.exception("Gift plan failed", extra={"fields": {"session_id": session_id}})
+        yield json.dumps({"type": "error", "detail": str(e)}) + "\n"
+
+    # The response has started, so persistence failures are logged, not raised
+    db = SessionLocal()
+    try:
+        summary = "\n\n".join(f"{r.name or r.recipient_id}:\n{r.reply}" for r in results)
+        save_conversation(db, session_id, "assistant", summary)
+        save_llm_usage(db, session_id, llm_calls)
+        db.commit()
+    except Exception:
+        db.rollback()
+        logger.exception("Saving gift plan failed", extra={"fields": {"session_id": session_id}})
+    finally:
+        db.close()
+
+    yield json.dumps({
+        "type": "done",
+        "recipients": len(results),
+        "fallbacks": sum(r.fallback for r in results),
+        "llm_calls": len(llm_calls),
+        "duration_ms": round((time.perf_counter() - start) * 1000, 1),
+    }) + "\n"
+
+
+def shed_gift_plan(request: GiftPlanRequest, reason: str) -> JSONResponse:
+    """Plans have no useful degraded form: a shed plan is a 503 the client retries."""
+    return JSONResponse(
+        {"detail": f"chat capacity exceeded ({reason}), retry shortly"},
+        status_code=503,
+        headers={"Retry-After": str(get_settings().bulkhead_retry_after)},
+    )
+
+
+def gift_plan_weight(request: GiftPlanRequest) -> float:
+    """Admission cost in chat turns: the intent extraction plus one completion per batch."""
+    settings = get_settings()
+    batches = math.ceil(len(request.recipients) / max(settings.gift_plan_recipients_per_call, 1))
+    return max((1 + batches) / max(settings.admission_calls_per_turn, 1), 1.0)
+
+
+@router.post("/gift-plans")
+@admit(chat_admission, on_shed=shed_gift_plan, weight=gift_plan_weight)
+@run_in("chat")
+def create_gift_plan(request: GiftPlanRequest, db: Session = Depends(chat_db)):
+    """
+    Plan gifts for many recipients from one brief (corporate orders).
+
+    The brief's intent is extracted once; catalog searches and curation are
+    shared across recipients (see app/services/gift_planning.py). Results
+    stream back as newline-delimited JSON, one `recipient` line per recipient
+    in completion order. The plan holds a chat admission slot, charged for all
+    of its completions, until the stream ends; the stream runs on the
+    `gift_plans` bulkhead rather than on chat threads.
+    """
+    max_recipients = get_settings().gift_plan_max_recipients
+    if len(request.recipients) > max_recipients:
+        raise HTTPException(status_code=422, detail=f"At most {max_recipients} recipients per plan")
+    recipients = assign_recipient_ids(request.recipients)
+
+    try:
+        with collect_llm_usage() as llm_calls:
+            intent = extract_intent([{"role": "user", "content": request.message}])
+
+        session = get_or_create_session(db, request.session_id)
+        save_conversation(db, session.id, "user", request.message)
+        save_intent_log(db, session.id, intent)
+        save_llm_usage(db, session.id, llm_calls)
+        # Commit now: the stream writes the reply in its own session before get_db exits
+        db.commit()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return StreamingResponse(
+        BULKHEADS["gift_plans"].iterate(stream_gift_plan(session.id, intent, recipients)),
+        media_type="application/x-ndjson",
+    )
@@ -0,0 +1,47 @@
+from fastapi import APIRouter, HTTPException, Query
+
+from app.bulkheads import run_in
+from app.config import get_settings
+from app.schemas import ProductLookupRequest, ProductLookupResponse
+from app.services.edible_client import get_products_by_sku
+
+router = APIRouter()
+settings = get_settings()
+
+
+def lookup_products(skus: list[str]) -> ProductLookupResponse:
+    skus = list(dict.fromkeys(sku.strip() for sku in skus if sku.strip()))
+    if not skus:
+        raise HTTPException(status_code=422, detail="At least one SKU is required")
+    if len(skus) > settings.product_lookup_max_skus:
+        raise HTTPException(
+            status_code=422,
+            detail=f"At most {settings.product_lookup_max_skus} SKUs per lookup",
+        )
+    try:
+        found = get_products_by_sku(skus)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return ProductLookupResponse(
+        products=[found[sku] for sku in skus if sku in found],
+        missing=[sku for sku in skus if sku not in found],
+    )
+
+
+@router.get("/products", response_model=ProductLookupResponse)
+@run_in("search")
+def get_products(sku: list[str] = Query(default=[])):
+    """
+    Products by SKU (`?sku=A&sku=B`), in request order.
+
+    Served from the product store filled by catalog fetches; SKUs that
+    were never fetched (or have expired) are listed in `missing`.
+    """
+    return lookup_products(sku)
+
+
+@router.post("/products", response_model=ProductLookupResponse)
+@run_in("search")
+def post_products(request: ProductLookupRequest):
+    """Same lookup as GET, for SKU lists too long for a query string."""
+    return lookup_products(request.skus)
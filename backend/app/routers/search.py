@@ -1,21 +1,54 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Header, HTTPException, Query
 
+from app.bulkheads import run_in
 from app.schemas import SearchRequest, EdibleProduct
+from app.search_responses import EncodedResponse, search_responses
 from app.services.edible_client import search_products
 
 router = APIRouter()
 
 
+@run_in("search")
+def encode_search(keyword: str) -> EncodedResponse:
+    return EncodedResponse.from_products(search_products([keyword]), search_responses.ttl_seconds)
+
+
+async def encoded_search(keyword: str) -> EncodedResponse:
+    """Pre-encoded response for a keyword; only a miss runs the search (on the search bulkhead)."""
+    encoded = search_responses.get(keyword)
+    if encoded is None:
+        try:
+            encoded = await encode_search(keyword)
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+        search_responses.put(keyword, encoded)
+    return encoded
+
+
+@router.get("/search", response_model=list[EdibleProduct])
+async def search_get(
+    keyword: str = Query(min_length=1),
+    accept_encoding: str | None = Header(default=None),
+    if_none_match: str | None = Header(default=None),
+):
+    """
+    Cacheable catalog search: gzip/brotli-encoded JSON with a strong ETag.
+
+    A request whose `If-None-Match` matches the current ETag gets 304.
+    """
+    encoded = await encoded_search(keyword)
+    return encoded.response(accept_encoding, if_none_match)
+
+
 @router.post("/search", response_model=list[EdibleProduct])
-def search(request: SearchRequest):
+async def search(request: SearchRequest, accept_encoding: str | None = Header(default=None)):
     """
     Proxy endpoint for Edible catalog search.
 
     Accepts a keyword and returns matching products from the Edible API.
-    This keeps API calls server-side and enables caching later.
+    Responses are pre-encoded per keyword (see app/search_responses.py).
     """
-    try:
-        products = search_products([request.keyword])
-        return products
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    encoded = await encoded_search(request.keyword)
+    return encoded.response(accept_encoding)
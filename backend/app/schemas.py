@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from enum import Enum
 from datetime import datetime
 
@@ -36,6 +36,13 @@ class ExtractedIntent(BaseModel):
     confidence: float = 0.0
 
 
+class ProductVariant(BaseModel):
+    sku: str
+    name: str
+    price: float
+    pdp_url: str
+
+
 class EdibleProduct(BaseModel):
     sku: str
     name: str
@@ -44,6 +51,8 @@ class EdibleProduct(BaseModel):
     description: str
     tags: list[str] = []
     pdp_url: str
+    # Size/packaging variants of this product, cheapest first (see app/services/variants.py)
+    variants: list[ProductVariant] = []
 
 
 class Message(BaseModel):
@@ -65,11 +74,44 @@ class ChatResponse(BaseModel):
     session_id: str
 
 
+# Gift plan endpoint schemas
+class GiftRecipient(BaseModel):
+    id: str | None = Field(default=None, pattern=r"^[A-Za-z0-9_-]{1,40}$")
+    name: str | None = Field(default=None, max_length=120)
+    budget: Budget | None = None
+    dietary: list[str] = []
+    notes: str | None = Field(default=None, max_length=500)
+
+
+class GiftPlanRequest(BaseModel):
+    message: str
+    session_id: str | None = None
+    recipients: list[GiftRecipient] = Field(min_length=1)
+
+
+class GiftPlanResult(BaseModel):
+    recipient_id: str
+    name: str | None = None
+    reply: str
+    products: list[EdibleProduct] = []
+    fallback: bool = False
+
+
 # Search endpoint schemas
 class SearchRequest(BaseModel):
     keyword: str
 
 
+# Product lookup schemas
+class ProductLookupRequest(BaseModel):
+    skus: list[str] = Field(min_length=1)
+
+
+class ProductLookupResponse(BaseModel):
+    products: list[EdibleProduct]
+    missing: list[str] = []
+
+
 # Analytics endpoint schemas
 class ClickRequest(BaseModel):
     session_id: str
@@ -82,6 +124,52 @@ class ConvertRequest(BaseModel):
     session_id: str
 
 
+class TermFrequency(BaseModel):
+    value: str
+    count: int
+
+
+class TermFrequencyResponse(BaseModel):
+    kind: str
+    terms: list[TermFrequency] = []
+
+
+class LLMStageUsage(BaseModel):
+    stage: str
+    model: str
+    calls: int
+    prompt_tokens: int
+    completion_tokens: int
+    cached_prompt_tokens: int
+    cached_prompt_ratio: float
+    avg_latency_ms: float
+    cost_usd: float
+
+
+class SessionCostResponse(BaseModel):
+    session_id: str
+    total_cost_usd: float
+    total_tokens: int
+    stages: list[LLMStageUsage] = []
+
+
+class PromptCacheUsage(BaseModel):
+    stage: str
+    prompt_version: str | None = None
+    model: str
+    calls: int
+    prompt_tokens: int
+    cached_prompt_tokens: int
+    cached_prompt_ratio: float
+    avg_latency_ms: float
+
+
+class PromptCacheResponse(BaseModel):
+    since: datetime | None = None
+    until: datetime | None = None
+    usage: list[PromptCacheUsage] = []
+
+
 # Generic response
 class StatusResponse(BaseModel):
     status: str = "ok"
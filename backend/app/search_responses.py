@@ -0,0 +1,141 @@
+"""
+Pre-encoded /api/search responses.
+
+Searches for hot keywords used to re-validate the cached products through the
+route's `response_model`, re-serialize them and ship uncompressed JSON on
+every call. Instead the final bytes are built once per canonical keyword
+(`normalize_term`) and kept in process memory for
+`search_response_ttl_seconds`:
+
+- the JSON body, serialized without re-validating the (already parsed) products;
+- a gzip copy, and a brotli copy when the optional `brotli` package is installed;
+- a strong ETag per encoding, derived from a hash of the JSON body.
+
+Hits are served on the event loop: a dict lookup, then either a 304 (GET with
+a matching `If-None-Match`) or the stored bytes for the client's preferred
+encoding. Only misses go to the search bulkhead. Empty results (including
+failed upstream fetches) are encoded but not kept.
+"""
+import gzip
+import hashlib
+import time
+from collections import OrderedDict
+
+from fastapi.responses import Response
+from pydantic import TypeAdapter
+
+from app.config import get_settings
+from app.metrics import record_cache_lookup
+from app.schemas import EdibleProduct
+from app.services.intent_analytics import normalize_term
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+settings = get_settings()
+
+# Bodies smaller than this are sent as is; compression would not pay off
+MIN_COMPRESS_BYTES = 256
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+CACHE_CONTROL = "no-cache"
+
+_PRODUCTS = TypeAdapter(list[EdibleProduct])
+
+
+class EncodedResponse:
+    """The JSON body of one search and its compressed copies, by content coding."""
+
+    __slots__ = ("bodies", "etags", "expires_at")
+
+    def __init__(self, body: bytes, expires_at: float = 0.0):
+        self.bodies = {"identity": body}
+        if len(body) >= MIN_COMPRESS_BYTES:
+            self.bodies["gzip"] = gzip.compress(body, GZIP_LEVEL, mtime=0)
+            if brotli is not None:
+                self.bodies["br"] = brotli.compress(body, quality=BROTLI_QUALITY)
+        digest = hashlib.blake2b(body, digest_size=16).hexdigest()
+        self.etags = {
+            coding: f'"{digest}"' if coding == "identity" else f'"{digest}-{coding}"' for coding in self.bodies
+        }
+        self.expires_at = expires_at
+
+    @classmethod
+    def from_products(cls, products: list[EdibleProduct], ttl_seconds: float = 0.0) -> "EncodedResponse":
+        return cls(_PRODUCTS.dump_json(products), time.monotonic() + ttl_seconds)
+
+    def choose_coding(self, accept_encoding: str | None) -> str:
+        """Best stored coding the client accepts: br, then gzip, then identity."""
+        accepted = set()
+        for part in (accept_encoding or "").lower().split(","):
+            coding, _, params = part.strip().partition(";")
+            q = params.strip()
+            if q.startswith("q=") and q[2:].strip() in ("0", "0.0", "0.00", "0.000"):
+                continue
+            accepted.add(coding.strip())
+        for coding in ("br", "gzip"):
+            if coding in self.bodies and (coding in accepted or "*" in accepted):
+                return coding
+        return "identity"
+
+    def not_modified(self, if_none_match: str | None) -> bool:
+        if not if_none_match:
+            return False
+        if if_none_match.strip() == "*":
+            return True
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return not tags.isdisjoint(self.etags.values())
+
+    def response(self, accept_encoding: str | None = None, if_none_match: str | None = None) -> Response:
+        coding = self.choose_coding(accept_encoding)
+        headers = {"ETag": self.etags[coding], "Vary": "Accept-Encoding", "Cache-Control": CACHE_CONTROL}
+        if self.not_modified(if_none_match):
+            return Response(status_code=304, headers=headers)
+        if coding != "identity":
+            headers["Content-Encoding"] = coding
+        return Response(self.bodies[coding], media_type="application/json", headers=headers)
+
+
+class SearchResponseCache:
+    """Encoded responses by canonical keyword, LRU-bounded (event-loop only)."""
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, EncodedResponse]" = OrderedDict()
+
+    @staticmethod
+    def key(keyword: str) -> str:
+        return normalize_term(keyword)
+
+    def get(self, keyword: str) -> EncodedResponse | None:
+        key = self.key(keyword)
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires_at <= time.monotonic():
+            del self._entries[key]
+            entry = None
+        if entry is not None:
+            self._entries.move_to_end(key)
+        record_cache_lookup("search_response", entry is not None)
+        return entry
+
+    def put(self, keyword: str, encoded: EncodedResponse) -> None:
+        """Keep an encoded search result unless it is empty or caching is off."""
+        if self.ttl_seconds <= 0 or encoded.bodies["identity"] == b"[]":
+            return
+        key = self.key(keyword)
+        self._entries[key] = encoded
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+search_responses = SearchResponseCache(settings.search_response_ttl_seconds, settings.search_response_max_entries)
@@ -0,0 +1,226 @@
+"""
+Local BM25 retrieval over every catalog product seen in Edible searches.
+
+The keyword endpoint only answers for the (at most 3) keywords of a turn. The
+index remembers every product parsed from a search and ranks all of them
+against the whole intent: keywords and dietary tags at full weight, the
+occasion at half weight.
+
+Products are scored with BM25 over one weighted bag of words per product
+(name x3, tags x2, description x1), kept as an inverted index of posting
+dicts: a query only touches the postings of its own terms, so it costs
+milliseconds for a catalog of thousands of products. Adding a product whose
+SKU is already indexed replaces it in place.
+
+The on-disk format is gzip'd JSON holding the products and the postings, so
+loading at start-up does not re-tokenize the catalog.
+"""
+import gzip
+import heapq
+import json
+import math
+import os
+import re
+import tempfile
+import threading
+
+from app.config import get_settings
+from app.schemas import EdibleProduct, ExtractedIntent
+
+settings = get_settings()
+
+INDEX_FORMAT_VERSION = 1
+FIELD_WEIGHTS = {"name": 3, "tags": 2, "description": 1}
+OCCASION_WEIGHT = 0.5
+K1 = 1.2
+B = 0.75
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from gift gifts in is it its of on or our that the this to with you your".split()
+)
+
+
+def _stem(token: str) -> str:
+    """Fold simple plurals onto one form: berry/berries -> berrie, cookie/cookies -> cookie, box/boxes -> box."""
+    if len(token) > 3 and token.endswith("y") and token[-2] not in "aeiouy":
+        return token[:-1] + "ie"
+    if len(token) > 4 and token.endswith(("xes", "ches", "shes")):
+        return token[:-2]
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def tokenize(text: str) -> list[str]:
+    return [_stem(t) for t in _TOKEN.findall(text.lower()) if t not in STOPWORDS]
+
+
+def product_terms(product: EdibleProduct) -> dict[str, int]:
+    """Weighted term frequencies of a product across its fields."""
+    terms: dict[str, int] = {}
+    fields = {"name": product.name, "tags": " ".join(product.tags), "description": product.description}
+    for field, text in fields.items():
+        weight = FIELD_WEIGHTS[field]
+        for term in tokenize(text):
+            terms[term] = terms.get(term, 0) + weight
+    return terms
+
+
+def intent_query(intent: ExtractedIntent) -> dict[str, float]:
+    """Query term weights for an intent."""
+    query: dict[str, float] = {}
+    for text in [*intent.keywords, *intent.dietary]:
+        for term in tokenize(text):
+            query[term] = query.get(term, 0.0) + 1.0
+    if intent.occasion and intent.occasion.value != "other":
+        for term in tokenize(intent.occasion.value.replace("_", " ")):
+            query[term] = query.get(term, 0.0) + OCCASION_WEIGHT
+    return query
+
+
+class CatalogIndex:
+    """Incremental in-memory BM25 index keyed by SKU."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._products: list[EdibleProduct] = []
+        self._doc_ids: dict[str, int] = {}
+        self._lengths: list[int] = []
+        self._total_length = 0
+        self._postings: dict[str, dict[int, int]] = {}
+        # Bumped whenever indexed products change
+        self.version = 0
+
+    def __len__(self) -> int:
+        return len(self._products)
+
+    def add(self, products: list[EdibleProduct]) -> int:
+        """Index new products and replace changed ones; returns how many were (re)indexed."""
+        changed = 0
+        with self._lock:
+            for product in products:
+                doc = self._doc_ids.get(product.sku)
+                if doc is not None:
+                    if self._products[doc] == product:
+                        continue
+                    self._remove_postings(doc)
+                    self._products[doc] = product
+                else:
+                    doc = len(self._products)
+                    self._doc_ids[product.sku] = doc
+                    self._products.append(product)
+                    self._lengths.append(0)
+                terms = product_terms(product)
+                for term, tf in terms.items():
+                    self._postings.setdefault(term, {})[doc] = tf
+                length = sum(terms.values())
+                self._lengths[doc] = length
+                self._total_length += length
+                changed += 1
+            self.version += changed
+        return changed
+
+    def products(self) -> list[EdibleProduct]:
+        with self._lock:
+            return list(self._products)
+
+    def _remove_postings(self, doc: int) -> None:
+        for term in product_terms(self._products[doc]):
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(doc, None)
+                if not postings:
+                    del self._postings[term]
+        self._total_length -= self._lengths[doc]
+
+    def search(self, query: dict[str, float], k: int = 15) -> list[tuple[EdibleProduct, float]]:
+        """Top-k products for weighted query terms, best first."""
+        with self._lock:
+            count = len(self._products)
+            if not count or not query:
+                return []
+            avg_length = self._total_length / count
+            scores: dict[int, float] = {}
+            for term, weight in query.items():
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                df = len(postings)
+                idf = math.log(1 + (count - df + 0.5) / (df + 0.5)) * weight
+                for doc, tf in postings.items():
+                    norm = K1 * (1 - B + B * self._lengths[doc] / avg_length)
+                    scores[doc] = scores.get(doc, 0.0) + idf * tf * (K1 + 1) / (tf + norm)
+            # Ties go to the product indexed first
+            top = heapq.nlargest(k, scores.items(), key=lambda item: (item[1], -item[0]))
+            return [(self._products[doc], score) for doc, score in top]
+
+    def query(self, intent: ExtractedIntent, k: int = 15) -> list[EdibleProduct]:
+        return [product for product, _ in self.search(intent_query(intent), k)]
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {"products": len(self._products), "terms": len(self._postings)}
+
+    def save(self, path: str) -> None:
+        """Write the index atomically (gzip'd JSON)."""
+        with self._lock:
+            data = {
+                "version": INDEX_FORMAT_VERSION,
+                "products": [p.model_dump() for p in self._products],
+                "lengths": list(self._lengths),
+                "postings": {term: [list(p.keys()), list(p.values())] for term, p in self._postings.items()},
+            }
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        # A temp file of its own per save: workers shutting down together must not share one
+        with tempfile.NamedTemporaryFile(dir=directory, prefix=".catalog-index-", suffix=".tmp", delete=False) as raw:
+            tmp = raw.name
+            try:
+                with gzip.open(raw, "wt", encoding="utf-8", compresslevel=6) as f:
+                    json.dump(data, f, separators=(",", ":"))
+            except BaseException:
+                raw.close()
+                os.unlink(tmp)
+                raise
+        os.replace(tmp, path)
+
+    def load(self, path: str) -> None:
+        """Replace the index contents with the index saved at `path`."""
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != INDEX_FORMAT_VERSION:
+            raise ValueError(f"Unsupported catalog index version {data.get('version')}")
+        products = [EdibleProduct.model_validate(p) for p in data["products"]]
+        postings = {term: dict(zip(docs, tfs)) for term, (docs, tfs) in data["postings"].items()}
+        with self._lock:
+            self._products = products
+            self._doc_ids = {p.sku: doc for doc, p in enumerate(products)}
+            self._lengths = data["lengths"]
+            self._total_length = sum(self._lengths)
+            self._postings = postings
+            self.version += 1
+
+
+catalog_index = CatalogIndex()
+
+
+def index_products(products: list[EdibleProduct]) -> None:
+    """Add freshly seen products to the index when it is enabled."""
+    if settings.catalog_index_enabled and products:
+        catalog_index.add(products)
+
+
+def load_catalog_index(path: str) -> bool:
+    """Load the saved index at `path` into `catalog_index`; False if there is none."""
+    if not os.path.exists(path):
+        return False
+    catalog_index.load(path)
+    return True
+
+
+def rank_products(intent: ExtractedIntent, fetched: list[EdibleProduct], k: int) -> list[EdibleProduct]:
+    """Index results for the whole intent first, then fetched products the index did not return."""
+    ranked = catalog_index.query(intent, k)
+    seen = {p.sku for p in ranked}
+    return ranked + [p for p in fetched if p.sku not in seen]
@@ -1,13 +1,14 @@
 import re
 import json
-from openai import OpenAI
 
 from app.config import get_settings
+from app.metrics import span
 from app.schemas import ExtractedIntent, EdibleProduct
-from app.prompts.product_curator import CURATION_SYSTEM_PROMPT, build_curation_prompt
+from app.prompts.product_curator import CURATION_PROMPT_VERSION, CURATION_SYSTEM_PROMPT, build_curation_prompt
+from app.services.llm import chat_completion
+from app.services.product_mentions import SKU_MENTION, MentionMatcher, longest_matches, words
 
 settings = get_settings()
-client = OpenAI(api_key=settings.openai_api_key)
 
 def sanitize_concierge_reply(text: str) -> str:
     """
@@ -48,13 +49,9 @@ def build_intent_summary(intent: ExtractedIntent) -> str:
 def extract_recommended_skus(response_text: str, products: list[EdibleProduct]) -> list[EdibleProduct]:
     """Extract recommended products from the response by matching SKUs."""
     # Find SKUs mentioned in the response (format: SKU: XXXXX)
-    # Edible catalog codes often contain dashes/underscores and are case-insensitive.
-    sku_pattern = r"\bSKU:\s*([A-Za-z0-9_-]{3,40})\b"
-    mentioned_skus = {s.strip() for s in re.findall(sku_pattern, response_text, re.IGNORECASE)}
+    mentioned_skus = {s.strip() for s in SKU_MENTION.findall(response_text)}
 
-    # Also try to match product names
     product_map = {p.sku.strip().upper(): p for p in products if p.sku}
-    name_to_sku = {p.name.lower(): p.sku for p in products}
 
     recommended = []
     seen_skus = set()
@@ -66,13 +63,21 @@ def extract_recommended_skus(response_text: str, products: list[EdibleProduct])
             recommended.append(product_map[sku_key])
             seen_skus.add(sku_key)
 
-    # If we didn't find SKUs, try matching by product name
+    # If we didn't find SKUs, match whole product names in reply order; the longest
+    # name wins where names overlap ("Berry Box" inside "Dipped Berry Box")
     if not recommended:
-        response_lower = response_text.lower()
-        for name, sku in name_to_sku.items():
-            sku_key = (sku or "").strip().upper()
-            if name in response_lower and sku_key and sku_key not in seen_skus and sku_key in product_map:
-                recommended.append(product_map[sku_key])
+        tokens = words(response_text)
+        vocabulary = set(tokens)
+        matcher = MentionMatcher()
+        for product in products:
+            name = words(product.name)
+            # Names using a word the reply lacks can't match; skipping them keeps the automaton small
+            if product.sku and vocabulary.issuperset(name):
+                matcher.add_words(name, product)
+        for _, _, product in longest_matches(matcher.find(tokens)):
+            sku_key = product.sku.strip().upper()
+            if sku_key not in seen_skus:
+                recommended.append(product)
                 seen_skus.add(sku_key)
                 if len(recommended) >= 5:
                     break
@@ -95,26 +100,30 @@ def curate_products(
     """
     # Build the prompt
     intent_summary = build_intent_summary(intent)
+    shown = products[:15]  # Limit to top 15 for context
     products_json = json.dumps(
-        [p.model_dump() for p in products[:15]],  # Limit to top 15 for context
+        [p.model_dump(exclude={"variants"}) for p in shown],
         indent=2,
     )
     user_message = build_curation_prompt(intent_summary, products_json)
 
-    response = client.chat.completions.create(
-        model=settings.curation_model,
-        max_tokens=800,
-        messages=[
-            {"role": "system", "content": CURATION_SYSTEM_PROMPT},
-            {"role": "user", "content": user_message},
-        ],
-    )
+    with span("curate_products"):
+        response = chat_completion(
+            "curation",
+            model=settings.curation_model,
+            max_tokens=800,
+            messages=[
+                {"role": "system", "content": CURATION_SYSTEM_PROMPT},
+                {"role": "user", "content": user_message},
+            ],
+            prompt_version=CURATION_PROMPT_VERSION,
+        )
 
     reply = response.choices[0].message.content
 
     reply = sanitize_concierge_reply(reply or "")
 
-    # Extract recommended products from the response
-    recommended_products = extract_recommended_skus(reply, products)
+    # Extract recommended products from the response; only the products the LLM saw can be meant
+    recommended_products = extract_recommended_skus(reply, shown)
 
     return reply, recommended_products
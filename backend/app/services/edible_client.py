@@ -1,9 +1,22 @@
+import logging
+import time
+
 import httpx
 
+from app.cache import catalog_cache, product_cache
+from app.clients import get_edible_client
 from app.config import get_settings
+from app.log import EventAggregator
+from app.metrics import record_upstream_error, span, track_upstream
+from app.prewarm import prewarm_coverage
 from app.schemas import EdibleProduct
+from app.services.catalog_index import index_products
+from app.services.intent_analytics import normalize_term
+from app.traffic import is_recording, record_upstream_call
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
+parse_errors = EventAggregator(logger, "edible_parse_error", "Edible product parse errors")
 
 # Headers required by Edible API
 HEADERS = {
@@ -83,20 +96,66 @@ def parse_edible_product(raw: dict) -> EdibleProduct | None:
             pdp_url=pdp_url,
         )
     except (KeyError, TypeError, ValueError) as e:
-        print(f"Error parsing product: {e}")
+        record_upstream_error("edible", "parse_error")
+        sku = str(raw.get("catalogCode") or raw.get("id") or "") if isinstance(raw, dict) else ""
+        parse_errors.hit(f"Error parsing product: {e}", sku=sku)
         return None
 
 
 def fetch_single_keyword(keyword: str) -> list[EdibleProduct]:
-    """Fetch products for a single keyword from Edible API."""
+    """
+    Fetch products for a single keyword from Edible API.
+
+    Successful results are kept in the shared catalog cache (CACHE_TTL_CATALOG),
+    keyed by the normalized keyword, and added to the local catalog index when
+    it is enabled. Sampled requests being recorded for replay
+    skip the cache read, so their trace contains the upstream response.
+    """
+    with span("fetch_single_keyword"):
+        cache_key = normalize_term(keyword)
+        prewarm_coverage.observe(cache_key)
+        if not is_recording():
+            cached = catalog_cache.get(cache_key)
+            if cached is not None:
+                index_products(cached)
+                return cached
+        products = _fetch_single_keyword(keyword)
+        if products is None:
+            return []
+        catalog_cache.set(cache_key, products)
+        index_products(products)
+        return products
+
+
+def refresh_keyword(keyword: str, ttl_seconds: float | None = None) -> bool:
+    """Fetch a keyword from upstream into the catalog cache; False if the fetch failed."""
+    products = _fetch_single_keyword(keyword)
+    if products is None:
+        return False
+    catalog_cache.set(normalize_term(keyword), products, ttl_seconds)
+    index_products(products)
+    return True
+
+
+def _fetch_single_keyword(keyword: str) -> list[EdibleProduct] | None:
+    """Products for a keyword, or None when the request failed."""
     try:
-        with httpx.Client() as client:
-            response = client.post(
+        start = time.perf_counter()
+        with track_upstream("edible"):
+            response = get_edible_client().post(
                 settings.edible_api_url,
                 json={"keyword": keyword},
                 headers=HEADERS,
                 timeout=15.0,
             )
+            if is_recording():
+                record_upstream_call(
+                    "edible",
+                    {"keyword": keyword},
+                    response.status_code,
+                    (time.perf_counter() - start) * 1000,
+                    response.json() if response.is_success else None,
+                )
             response.raise_for_status()
             data = response.json()
 
@@ -109,15 +168,27 @@ def fetch_single_keyword(keyword: str) -> list[EdibleProduct]:
             if product:
                 products.append(product)
 
-        print(f"Fetched {len(products)} products for keyword '{keyword}'")
+        # Every parsed product is also kept by SKU for /api/products lookups
+        product_cache.set_many({product.sku: product for product in products})
+        logger.debug("Fetched products", extra={"fields": {"keyword": keyword, "count": len(products)}})
         return products
 
     except httpx.HTTPError as e:
-        print(f"HTTP error fetching products for keyword '{keyword}': {e}")
-        return []
+        logger.warning("HTTP error fetching products: %s", e, extra={"fields": {"keyword": keyword}})
+        return None
     except Exception as e:
-        print(f"Error fetching products for keyword '{keyword}': {e}")
-        return []
+        logger.exception("Error fetching products", extra={"fields": {"keyword": keyword}})
+        return None
+
+
+def get_products_by_sku(skus: list[str]) -> dict[str, EdibleProduct]:
+    """
+    Stored products by SKU for the SKUs seen in earlier catalog fetches.
+
+    One batch read of the product store; never calls the Edible API.
+    """
+    with span("get_products_by_sku"):
+        return product_cache.get_many(skus)
 
 
 def search_products(keywords: list[str]) -> list[EdibleProduct]:
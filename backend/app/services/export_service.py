@@ -0,0 +1,137 @@
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Iterator
+
+from sqlalchemy import and_, or_, select
+
+from app.database import read_engine
+from app.models import Conversation, IntentLog, IntentTerm, ProductClick
+
+EXPORT_TABLES = {
+    "product_clicks": ProductClick,
+    "intent_logs": IntentLog,
+    "conversations": Conversation,
+}
+
+EXPORT_FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Unserializable export value: {type(value).__name__}")
+
+
+def _csv_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, list):
+        return json.dumps(value)
+    return value
+
+
+def _with_intent_terms(conn, column_names: list[str], rows) -> list:
+    """
+    Fill keywords/dietary of intent_logs rows written in "normalized" storage
+    mode (empty JSON columns) from their intent_terms, one query per chunk.
+    """
+    id_at, keywords_at, dietary_at = (column_names.index(c) for c in ("id", "keywords", "dietary"))
+    missing = [row[id_at] for row in rows if not row[keywords_at] and not row[dietary_at]]
+    if not missing:
+        return rows
+    terms: dict[tuple[str, str], list[str]] = {}
+    stmt = (
+        select(IntentTerm.intent_log_id, IntentTerm.kind, IntentTerm.value)
+        .where(IntentTerm.intent_log_id.in_(missing))
+        .order_by(IntentTerm.intent_log_id, IntentTerm.kind, IntentTerm.value)
+    )
+    for log_id, kind, value in conn.execute(stmt):
+        terms.setdefault((log_id, kind), []).append(value)
+
+    filled = []
+    for row in rows:
+        if not row[keywords_at] and not row[dietary_at]:
+            row = list(row)
+            row[keywords_at] = terms.get((row[id_at], "keyword"), [])
+            row[dietary_at] = terms.get((row[id_at], "dietary"), [])
+        filled.append(row)
+    return filled
+
+
+def build_export_query(
+    table: str,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    after_created_at: datetime | None = None,
+    after_id: str | None = None,
+):
+    """
+    Keyset-ordered select over one export table.
+
+    Rows come back ordered by (created_at, id); passing the last received row's
+    created_at and id resumes the export right after it.
+    """
+    columns = EXPORT_TABLES[table].__table__.c
+    stmt = select(*columns)
+    if start is not None:
+        stmt = stmt.where(columns.created_at >= start)
+    if end is not None:
+        stmt = stmt.where(columns.created_at < end)
+    if after_created_at is not None:
+        stmt = stmt.where(
+            or_(
+                columns.created_at > after_created_at,
+                and_(columns.created_at == after_created_at, columns.id > (after_id or "")),
+            )
+        )
+    return stmt.order_by(columns.created_at, columns.id)
+
+
+def stream_export(
+    table: str,
+    fmt: str,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    after_created_at: datetime | None = None,
+    after_id: str | None = None,
+    chunk_size: int = 1000,
+) -> Iterator[str]:
+    """
+    Yield an export as CSV or NDJSON text, one chunk of rows at a time.
+
+    Rows are fetched with a server-side cursor (`yield_per`) on the read-only
+    pool, so memory stays bounded by `chunk_size` regardless of table size.
+    intent_logs rows carry their keywords and dietary tags whichever intent
+    storage mode wrote them.
+    """
+    stmt = build_export_query(table, start, end, after_created_at, after_id)
+    column_names = [c.name for c in EXPORT_TABLES[table].__table__.c]
+
+    with read_engine.connect() as conn:
+        result = conn.execution_options(yield_per=chunk_size).execute(stmt)
+        partitions = result.partitions()
+        if table == "intent_logs":
+            partitions = (_with_intent_terms(conn, column_names, partition) for partition in partitions)
+
+        if fmt == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(column_names)
+            yield buffer.getvalue()
+
+            for partition in partitions:
+                buffer.seek(0)
+                buffer.truncate()
+                writer.writerows([_csv_value(v) for v in row] for row in partition)
+                yield buffer.getvalue()
+        else:
+            for partition in partitions:
+                yield "".join(
+                    json.dumps(dict(zip(column_names, row)), default=_json_default) + "\n"
+                    for row in partition
+                )
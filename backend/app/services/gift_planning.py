@@ -0,0 +1,273 @@
+"""
+Bulk gift planning for multi-recipient (corporate) orders.
+
+A plan shares work across recipients instead of running one chat turn each:
+
+1. The brief's intent is extracted once (by the caller).
+2. Every recipient searches the brief's top keywords plus their own dietary
+   terms; the union of keywords is fetched once through the catalog cache.
+3. Candidates per recipient are collapsed to one product per variant group and
+   narrowed locally by budget and dietary needs.
+4. Recipients are curated `gift_plan_recipients_per_call` to a completion,
+   and results are yielded per batch as soon as its completion returns.
+
+Fetches and completions run on two process-wide pools, so concurrent plans
+share `gift_plan_fetch_concurrency` fetch threads and at most
+`gift_plan_llm_concurrency` batch completions are in flight per worker,
+however many plans are streaming.
+
+A recipient whose section is missing from the reply, or whose batch failed,
+still gets their top candidates with a generic reply and `fallback=True`.
+"""
+import json
+import logging
+import math
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections.abc import Iterator
+
+from app.config import get_settings
+from app.metrics import span
+from app.prompts.product_curator import (
+    BATCH_CURATION_PROMPT_VERSION,
+    BATCH_CURATION_SYSTEM_PROMPT,
+    build_batch_curation_prompt,
+)
+from app.schemas import Budget, EdibleProduct, ExtractedIntent, GiftPlanResult, GiftRecipient
+from app.services.curation_service import build_intent_summary, extract_recommended_skus, sanitize_concierge_reply
+from app.services.edible_client import fetch_single_keyword
+from app.services.intent_analytics import normalize_term
+from app.services.llm import LLMCall, chat_completion, collect_llm_usage
+from app.services.variants import collapse_variants
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Price band per budget tier, in USD (low inclusive, high exclusive)
+BUDGET_PRICE_RANGES: dict[Budget, tuple[float, float]] = {
+    Budget.low: (0.0, 50.0),
+    Budget.mid: (50.0, 100.0),
+    Budget.high: (100.0, math.inf),
+}
+SHARED_KEYWORDS = 3
+MAX_CANDIDATES = 8
+MIN_IN_BUDGET = 3
+DEFAULT_KEYWORD = "gift baskets"
+FALLBACK_REPLY = "Here are a few options that fit this recipient's budget and dietary needs."
+NO_PRODUCTS_REPLY = "I couldn't find products that fit this recipient yet. Could you share a bit more about them?"
+
+_fetch_pool = ThreadPoolExecutor(
+    max_workers=max(settings.gift_plan_fetch_concurrency, 1), thread_name_prefix="gift-plan-fetch"
+)
+_curate_pool = ThreadPoolExecutor(
+    max_workers=max(settings.gift_plan_llm_concurrency, 1), thread_name_prefix="gift-plan-curate"
+)
+
+_RECIPIENT_HEADER = re.compile(r"^\s*RECIPIENT\s+([A-Za-z0-9_-]{1,40})\s*:?\s*$", re.MULTILINE | re.IGNORECASE)
+
+
+def shared_keywords(intent: ExtractedIntent) -> list[str]:
+    """Keywords every recipient searches: the brief's top keywords, else its occasion."""
+    if intent.keywords:
+        return intent.keywords[:SHARED_KEYWORDS]
+    if intent.occasion and intent.occasion.value != "other":
+        return [intent.occasion.value.replace("_", " ")]
+    return [DEFAULT_KEYWORD]
+
+
+def recipient_dietary(intent: ExtractedIntent, recipient: GiftRecipient) -> list[str]:
+    terms = [normalize_term(term) for term in [*intent.dietary, *recipient.dietary]]
+    return list(dict.fromkeys(term for term in terms if term))
+
+
+def recipient_keywords(intent: ExtractedIntent, recipient: GiftRecipient) -> list[str]:
+    keywords = [normalize_term(keyword) for keyword in shared_keywords(intent)]
+    keywords += recipient_dietary(intent, recipient)
+    return list(dict.fromkeys(keyword for keyword in keywords if keyword))
+
+
+def fetch_catalog(keywords: list[str]) -> dict[str, list[EdibleProduct]]:
+    """Products per keyword, fetched concurrently through the catalog cache."""
+    return dict(zip(keywords, _fetch_pool.map(fetch_single_keyword, keywords)))
+
+
+def _budget_distance(price: float, budget: Budget | None) -> float:
+    if budget is None:
+        return 0.0
+    low, high = BUDGET_PRICE_RANGES[budget]
+    if price < low:
+        return low - price
+    if price >= high:
+        return price - high
+    return 0.0
+
+
+def _matches_dietary(product: EdibleProduct, dietary: list[str]) -> bool:
+    tags = {normalize_term(tag) for tag in product.tags}
+    return all(term in tags for term in dietary)
+
+
+def recipient_candidates(
+    intent: ExtractedIntent,
+    recipient: GiftRecipient,
+    catalog: dict[str, list[EdibleProduct]],
+) -> list[EdibleProduct]:
+    """
+    The recipient's shortlist: products for their keywords, in budget and
+    matching all their dietary tags first. Closest-priced products fill in
+    when fewer than MIN_IN_BUDGET are in budget.
+    """
+    seen = set()
+    pool = []
+    for keyword in recipient_keywords(intent, recipient):
+        for product in catalog.get(keyword, []):
+            if product.sku not in seen:
+                seen.add(product.sku)
+                pool.append(product)
+    if settings.variant_collapse_enabled:
+        pool = collapse_variants(pool)
+
+    budget = recipient.budget or intent.budget
+    dietary = recipient_dietary(intent, recipient)
+    in_budget = [p for p in pool if _budget_distance(p.price, budget) == 0]
+    if len(in_budget) < MIN_IN_BUDGET:
+        in_budget = sorted(pool, key=lambda p: _budget_distance(p.price, budget))
+    # Stable sort: dietary matches first, otherwise keep search order
+    return sorted(in_budget, key=lambda p: not _matches_dietary(p, dietary))[:MAX_CANDIDATES]
+
+
+def _one_line(value: str | None) -> str:
+    return " ".join((value or "").replace("|", "/").split()) or "-"
+
+
+def build_batch_prompt(
+    intent: ExtractedIntent,
+    batch: list[tuple[str, GiftRecipient, list[EdibleProduct]]],
+) -> str:
+    """User message for one batch: the shared catalog once, then each recipient's shortlist."""
+    catalog = {}
+    for _, _, candidates in batch:
+        for product in candidates:
+            catalog.setdefault(product.sku, product)
+    catalog_lines = "\n".join(
+        json.dumps({
+            "sku": p.sku,
+            "name": p.name,
+            "price": p.price,
+            "tags": p.tags,
+            "description": p.description[:160],
+        })
+        for p in catalog.values()
+    )
+    recipient_lines = "\n".join(
+        f"- id: {recipient_id} | name: {_one_line(recipient.name)}"
+        f" | budget: {(recipient.budget or intent.budget).value if (recipient.budget or intent.budget) else '-'}"
+        f" | dietary: {', '.join(recipient_dietary(intent, recipient)) or '-'}"
+        f" | notes: {_one_line(recipient.notes)}"
+        f" | candidates: {', '.join(p.sku for p in candidates)}"
+        for recipient_id, recipient, candidates in batch
+    )
+    return build_batch_curation_prompt(build_intent_summary(intent), catalog_lines, recipient_lines)
+
+
+def parse_batch_reply(text: str) -> dict[str, str]:
+    """Split a batch reply into each recipient's section, keyed by recipient id."""
+    sections = {}
+    headers = list(_RECIPIENT_HEADER.finditer(text or ""))
+    for header, following in zip(headers, [*headers[1:], None]):
+        end = following.start() if following else len(text)
+        sections[header.group(1)] = text[header.end():end].strip()
+    return sections
+
+
+def curate_batch(
+    intent: ExtractedIntent,
+    batch: list[tuple[str, GiftRecipient, list[EdibleProduct]]],
+) -> list[GiftPlanResult]:
+    """Curate several recipients in one completion."""
+    with span("curate_gift_batch"):
+        response = chat_completion(
+            "curation",
+            model=settings.curation_model,
+            max_tokens=100 + 150 * len(batch),
+            messages=[
+                {"role": "system", "content": BATCH_CURATION_SYSTEM_PROMPT},
+                {"role": "user", "content": build_batch_prompt(intent, batch)},
+            ],
+            prompt_version=BATCH_CURATION_PROMPT_VERSION,
+        )
+    sections = parse_batch_reply(response.choices[0].message.content or "")
+
+    results = []
+    for recipient_id, recipient, candidates in batch:
+        reply = sanitize_concierge_reply(sections.get(recipient_id, ""))
+        if reply:
+            products = extract_recommended_skus(reply, candidates)
+            results.append(GiftPlanResult(recipient_id=recipient_id, name=recipient.name, reply=reply,
+                                          products=products))
+        else:
+            results.append(fallback_result(recipient_id, recipient, candidates))
+    return results
+
+
+def fallback_result(recipient_id: str, recipient: GiftRecipient, candidates: list[EdibleProduct]) -> GiftPlanResult:
+    return GiftPlanResult(
+        recipient_id=recipient_id,
+        name=recipient.name,
+        reply=FALLBACK_REPLY if candidates else NO_PRODUCTS_REPLY,
+        products=candidates[:3],
+        fallback=True,
+    )
+
+
+def _curate_batch_collecting(intent, batch) -> tuple[list[GiftPlanResult], list[LLMCall]]:
+    with collect_llm_usage() as calls:
+        try:
+            return curate_batch(intent, batch), calls
+        except Exception:
+            logger.exception("Gift plan batch curation failed", extra={"fields": {"recipients": len(batch)}})
+            return [fallback_result(*item) for item in batch], calls
+
+
+def plan_gifts(
+    intent: ExtractedIntent,
+    recipients: list[tuple[str, GiftRecipient]],
+    llm_calls: list[LLMCall],
+) -> Iterator[GiftPlanResult]:
+    """
+    Yield one result per recipient, batch by batch in completion order.
+
+    LLM calls made by the batches are appended to `llm_calls`.
+    """
+    start = time.perf_counter()
+    keywords = list(dict.fromkeys(k for _, r in recipients for k in recipient_keywords(intent, r)))
+    with span("gift_plan_fetch"):
+        catalog = fetch_catalog(keywords)
+
+    shortlisted = [(rid, r, recipient_candidates(intent, r, catalog)) for rid, r in recipients]
+    # Recipients with nothing to choose from don't need the LLM
+    for item in shortlisted:
+        if not item[2]:
+            yield fallback_result(*item)
+    to_curate = [item for item in shortlisted if item[2]]
+
+    size = max(settings.gift_plan_recipients_per_call, 1)
+    batches = [to_curate[i:i + size] for i in range(0, len(to_curate), size)]
+    futures = [_curate_pool.submit(_curate_batch_collecting, intent, batch) for batch in batches]
+    try:
+        for future in as_completed(futures):
+            results, calls = future.result()
+            llm_calls.extend(calls)
+            yield from results
+    finally:
+        # A dropped stream gives up the batches that have not started
+        for future in futures:
+            future.cancel()
+
+    logger.info("Gift plan curated", extra={"fields": {
+        "recipients": len(recipients),
+        "keywords": len(keywords),
+        "batches": len(batches),
+        "duration_ms": round((time.perf_counter() - start) * 1000, 1),
+    }})
@@ -0,0 +1,115 @@
+from collections import Counter
+from datetime import datetime
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.models import IntentLog, IntentTerm
+
+TERM_KINDS = ("dietary", "keyword")
+MAX_TERM_LENGTH = 100
+
+
+def normalize_term(value: str) -> str:
+    """Canonical form used for intent_terms.value (trimmed, lowercase)."""
+    return " ".join(str(value).split()).lower()[:MAX_TERM_LENGTH]
+
+
+def build_intent_term_rows(intent_log_id: str, dietary: list[str], keywords: list[str]) -> list[dict]:
+    """Build deduplicated intent_terms rows for a bulk insert."""
+    rows = []
+    seen = set()
+    for kind, values in (("dietary", dietary), ("keyword", keywords)):
+        for raw in values or []:
+            value = normalize_term(raw)
+            if value and (kind, value) not in seen:
+                seen.add((kind, value))
+                rows.append({"intent_log_id": intent_log_id, "kind": kind, "value": value})
+    return rows
+
+
+def _apply_time_window(stmt, since: datetime | None, until: datetime | None):
+    if since is not None or until is not None:
+        stmt = stmt.join(IntentLog, IntentLog.id == IntentTerm.intent_log_id)
+        if since is not None:
+            stmt = stmt.where(IntentLog.created_at >= since)
+        if until is not None:
+            stmt = stmt.where(IntentLog.created_at < until)
+    return stmt
+
+
+def term_frequencies(
+    db: Session,
+    kind: str,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    limit: int | None = 20,
+) -> list[tuple[str, int]]:
+    """Most requested terms of one kind, as (value, intent_log_count), computed in SQL."""
+    count = func.count().label("count")
+    stmt = select(IntentTerm.value, count).where(IntentTerm.kind == kind)
+    stmt = _apply_time_window(stmt, since, until)
+    stmt = stmt.group_by(IntentTerm.value).order_by(count.desc(), IntentTerm.value).limit(limit)
+    return [(value, total) for value, total in db.execute(stmt)]
+
+
+def term_count(
+    db: Session,
+    kind: str,
+    value: str,
+    since: datetime | None = None,
+    until: datetime | None = None,
+) -> int:
+    """Number of intent logs that requested a given term (e.g. dietary 'vegan')."""
+    stmt = select(func.count()).select_from(IntentTerm).where(
+        IntentTerm.kind == kind, IntentTerm.value == normalize_term(value)
+    )
+    stmt = _apply_time_window(stmt, since, until)
+    return db.execute(stmt).scalar_one()
+
+
+def keyword_demand(
+    db: Session,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    limit: int | None = 50,
+    include_occasions: bool = True,
+) -> list[tuple[str, int]]:
+    """
+    Catalog search demand over a window, most requested first.
+
+    Counts normalized keywords from intent_terms, which both intent storage
+    modes write (and migration 002 backfilled for older logs), so the JSON
+    keywords column is not read: it would count json-mode logs twice. With
+    `include_occasions`, occasions count as a search term too; since most logs
+    with an occasion also carry it as a keyword, an occasion adds
+    max(keyword count, occasion count), not the sum.
+    """
+    counts: Counter = Counter(dict(term_frequencies(db, "keyword", since=since, until=until, limit=None)))
+
+    if not include_occasions:
+        return _ranked(counts, limit)
+
+    occasion_count = func.count().label("count")
+    stmt = select(IntentLog.occasion, occasion_count).where(
+        IntentLog.occasion.is_not(None), IntentLog.occasion != "other"
+    )
+    stmt = _apply_log_window(stmt, since, until).group_by(IntentLog.occasion)
+    for occasion, total in db.execute(stmt):
+        term = normalize_term(occasion.replace("_", " "))
+        counts[term] = max(counts[term], total)
+
+    return _ranked(counts, limit)
+
+
+def _ranked(counts: Counter, limit: int | None) -> list[tuple[str, int]]:
+    ranked = sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+    return ranked[:limit] if limit is not None else ranked
+
+
+def _apply_log_window(stmt, since: datetime | None, until: datetime | None):
+    if since is not None:
+        stmt = stmt.where(IntentLog.created_at >= since)
+    if until is not None:
+        stmt = stmt.where(IntentLog.created_at < until)
+    return stmt
@@ -1,12 +1,14 @@
+import hashlib
 import json
-from openai import OpenAI
 
+from app.cache import intent_cache
 from app.config import get_settings
+from app.metrics import span
 from app.schemas import ExtractedIntent, Occasion, Urgency, Budget
-from app.prompts.intent_extractor import INTENT_SYSTEM_PROMPT
+from app.prompts.intent_extractor import INTENT_PROMPT_VERSION, INTENT_SYSTEM_PROMPT
+from app.services.llm import chat_completion
 
 settings = get_settings()
-client = OpenAI(api_key=settings.openai_api_key)
 
 
 def parse_intent_response(response_text: str) -> ExtractedIntent:
@@ -71,15 +73,32 @@ def extract_intent(messages: list[dict]) -> ExtractedIntent:
 
     Uses GPT-4o for strong reasoning capabilities.
     """
-    # Convert messages to OpenAI format
+    # Identical conversations map to the same intent while cached (CACHE_TTL_INTENT);
+    # a new prompt version starts from an empty cache
+    cache_key = None
+    if intent_cache.enabled:
+        payload = json.dumps([settings.intent_model, INTENT_PROMPT_VERSION, messages], sort_keys=True)
+        cache_key = hashlib.sha256(payload.encode()).hexdigest()
+        cached = intent_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    # Static system prompt first, then the conversation oldest first: each turn's
+    # prompt extends the previous turn's, so the provider can reuse its cached prefix
     openai_messages = [{"role": "system", "content": INTENT_SYSTEM_PROMPT}]
     openai_messages.extend(messages)
 
-    response = client.chat.completions.create(
-        model=settings.intent_model,
-        max_tokens=500,
-        messages=openai_messages,
-    )
+    with span("extract_intent"):
+        response = chat_completion(
+            "intent",
+            model=settings.intent_model,
+            max_tokens=500,
+            messages=openai_messages,
+            prompt_version=INTENT_PROMPT_VERSION,
+        )
 
     response_text = response.choices[0].message.content
-    return parse_intent_response(response_text)
+    intent = parse_intent_response(response_text)
+    if cache_key and intent.confidence > 0:
+        intent_cache.set(cache_key, intent)
+    return intent
@@ -0,0 +1,207 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from datetime import datetime
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.clients import get_openai_client
+from app.config import get_settings
+from app.metrics import LLM_COST, LLM_LATENCY, LLM_TOKENS, track_upstream
+from app.models import LLMUsage
+from app.traffic import is_recording, messages_fingerprint, record_upstream_call
+
+settings = get_settings()
+
+# USD per 1M tokens: (input, cached input, output). Matched by longest model prefix.
+MODEL_PRICING: dict[str, tuple[float, float, float]] = {
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+    "gpt-4o": (2.50, 1.25, 10.00),
+    "gpt-4.1-mini": (0.40, 0.10, 1.60),
+    "gpt-4.1": (2.00, 0.50, 8.00),
+}
+
+
+@dataclass
+class LLMCall:
+    """Token usage and latency of one chat completion."""
+    stage: str
+    model: str
+    prompt_tokens: int
+    completion_tokens: int
+    cached_prompt_tokens: int
+    latency_ms: float
+    prompt_version: str | None = None
+
+    @property
+    def cost_usd(self) -> float:
+        return estimate_cost(self.model, self.prompt_tokens, self.completion_tokens, self.cached_prompt_tokens)
+
+
+_llm_calls: ContextVar[list[LLMCall] | None] = ContextVar("llm_calls", default=None)
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int, cached_prompt_tokens: int = 0) -> float:
+    """Estimated USD cost of a completion; unknown models cost 0."""
+    matches = [name for name in MODEL_PRICING if model.startswith(name)]
+    if not matches:
+        return 0.0
+    input_price, cached_price, output_price = MODEL_PRICING[max(matches, key=len)]
+    uncached = max(prompt_tokens - cached_prompt_tokens, 0)
+    return (uncached * input_price + cached_prompt_tokens * cached_price + completion_tokens * output_price) / 1_000_000
+
+
+@contextmanager
+def collect_llm_usage():
+    """Collect every LLM call made in this context (e.g. one chat turn)."""
+    calls: list[LLMCall] = []
+    token = _llm_calls.set(calls)
+    try:
+        yield calls
+    finally:
+        _llm_calls.reset(token)
+
+
+def _usage_call(stage: str, model: str, usage, latency_ms: float, prompt_version: str | None = None) -> LLMCall:
+    details = getattr(usage, "prompt_tokens_details", None)
+    return LLMCall(
+        stage=stage,
+        model=model,
+        prompt_tokens=getattr(usage, "prompt_tokens", 0) or 0,
+        completion_tokens=getattr(usage, "completion_tokens", 0) or 0,
+        cached_prompt_tokens=getattr(details, "cached_tokens", 0) or 0,
+        latency_ms=latency_ms,
+        prompt_version=prompt_version,
+    )
+
+
+def record_llm_call(call: LLMCall) -> None:
+    calls = _llm_calls.get()
+    if calls is not None:
+        calls.append(call)
+    if settings.metrics_enabled:
+        labels = {"model": call.model, "stage": call.stage}
+        LLM_TOKENS.inc(call.prompt_tokens, type="prompt", **labels)
+        LLM_TOKENS.inc(call.completion_tokens, type="completion", **labels)
+        LLM_TOKENS.inc(call.cached_prompt_tokens, type="cached_prompt", **labels)
+        LLM_LATENCY.observe(call.latency_ms / 1000, **labels)
+        LLM_COST.inc(call.cost_usd, **labels)
+
+
+def chat_completion(stage: str, model: str, messages: list[dict], max_tokens: int, prompt_version: str | None = None):
+    """
+    Run a chat completion and account for its tokens, cost and latency.
+
+    `prompt_version` identifies the static prompt prefix: it is stored with the
+    call's usage and, with LLM_PROMPT_CACHE_KEY, sent as the provider's
+    prompt cache key.
+    """
+    # Imported here with the client (see app.clients); already loaded by then
+    from openai import APIStatusError
+
+    client = get_openai_client()
+    # extra_body rather than the keyword argument: older openai clients lack it
+    extra_body = {"prompt_cache_key": prompt_version} if prompt_version and settings.llm_prompt_cache_key else None
+    start = time.perf_counter()
+    try:
+        with track_upstream("openai"):
+            response = client.chat.completions.create(
+                model=model,
+                max_tokens=max_tokens,
+                messages=messages,
+                extra_body=extra_body,
+            )
+    except APIStatusError as e:
+        if is_recording():
+            key = {"stage": stage, "model": model, "messages": messages_fingerprint(messages)}
+            record_upstream_call("openai", key, e.status_code, (time.perf_counter() - start) * 1000)
+        raise
+    latency_ms = (time.perf_counter() - start) * 1000
+
+    if is_recording():
+        key = {"stage": stage, "model": model, "messages": messages_fingerprint(messages)}
+        record_upstream_call("openai", key, 200, latency_ms, response.model_dump(mode="json", exclude_none=True))
+
+    usage = getattr(response, "usage", None)
+    if usage is not None:
+        record_llm_call(_usage_call(stage, model, usage, latency_ms, prompt_version))
+    return response
+
+
+def cached_ratio(prompt_tokens: int | None, cached_prompt_tokens: int | None) -> float:
+    """Share of prompt tokens served from the provider's prompt cache."""
+    return round((cached_prompt_tokens or 0) / prompt_tokens, 3) if prompt_tokens else 0.0
+
+
+def session_usage_breakdown(db: Session, session_id: str) -> list[dict]:
+    """Per (stage, model) token totals, latency and estimated cost for one session."""
+    rows = db.execute(
+        select(
+            LLMUsage.stage,
+            LLMUsage.model,
+            func.count().label("calls"),
+            func.sum(LLMUsage.prompt_tokens).label("prompt_tokens"),
+            func.sum(LLMUsage.completion_tokens).label("completion_tokens"),
+            func.sum(LLMUsage.cached_prompt_tokens).label("cached_prompt_tokens"),
+            func.avg(LLMUsage.latency_ms).label("avg_latency_ms"),
+        )
+        .where(LLMUsage.session_id == session_id)
+        .group_by(LLMUsage.stage, LLMUsage.model)
+        .order_by(LLMUsage.stage, LLMUsage.model)
+    ).all()
+    return [
+        {
+            "stage": row.stage,
+            "model": row.model,
+            "calls": row.calls,
+            "prompt_tokens": row.prompt_tokens or 0,
+            "completion_tokens": row.completion_tokens or 0,
+            "cached_prompt_tokens": row.cached_prompt_tokens or 0,
+            "cached_prompt_ratio": cached_ratio(row.prompt_tokens, row.cached_prompt_tokens),
+            "avg_latency_ms": round(row.avg_latency_ms or 0.0, 1),
+            "cost_usd": round(
+                estimate_cost(row.model, row.prompt_tokens or 0, row.completion_tokens or 0, row.cached_prompt_tokens or 0),
+                6,
+            ),
+        }
+        for row in rows
+    ]
+
+
+def prompt_cache_usage(db: Session, since: datetime | None = None, until: datetime | None = None) -> list[dict]:
+    """
+    Prompt-cache effectiveness per (stage, prompt version, model): the share of
+    prompt tokens the provider served from cache, and average latency.
+    """
+    query = select(
+        LLMUsage.stage,
+        LLMUsage.prompt_version,
+        LLMUsage.model,
+        func.count().label("calls"),
+        func.sum(LLMUsage.prompt_tokens).label("prompt_tokens"),
+        func.sum(LLMUsage.cached_prompt_tokens).label("cached_prompt_tokens"),
+        func.avg(LLMUsage.latency_ms).label("avg_latency_ms"),
+    )
+    if since is not None:
+        query = query.where(LLMUsage.created_at >= since)
+    if until is not None:
+        query = query.where(LLMUsage.created_at < until)
+    rows = db.execute(
+        query.group_by(LLMUsage.stage, LLMUsage.prompt_version, LLMUsage.model)
+        .order_by(LLMUsage.stage, LLMUsage.prompt_version, LLMUsage.model)
+    ).all()
+    return [
+        {
+            "stage": row.stage,
+            "prompt_version": row.prompt_version,
+            "model": row.model,
+            "calls": row.calls,
+            "prompt_tokens": row.prompt_tokens or 0,
+            "cached_prompt_tokens": row.cached_prompt_tokens or 0,
+            "cached_prompt_ratio": cached_ratio(row.prompt_tokens, row.cached_prompt_tokens),
+            "avg_latency_ms": round(row.avg_latency_ms or 0.0, 1),
+        }
+        for row in rows
+    ]
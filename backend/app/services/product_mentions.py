@@ -0,0 +1,261 @@
+"""
+Product mentions in incoming chat messages.
+
+`MentionMatcher` is an Aho-Corasick automaton over word sequences: product
+names, distinctive phrases of names and SKUs are added as patterns, and one
+pass over the words of a text reports every occurrence of every pattern, so
+the cost depends on the text length and not on how many products are known.
+Matching on words keeps matches on word boundaries ("berry box" does not
+match "blueberry boxes").
+
+Follow-up turns such as "tell me more about the berry box" or a pasted SKU
+are recognized against:
+
+- products shown earlier in the session (SKUs cited in assistant messages of
+  the history, resolved through the product store) by SKU, full name, or a
+  phrase of their name no other shown product shares;
+- any stored product, by explicit SKU;
+- every product in the local catalog index (when enabled), by full name.
+
+When exactly one product is meant and the message asks about it rather than
+for something else, the chat turn answers from the stored record
+(`product_detail_reply`) without intent extraction, search or curation.
+"""
+import re
+import threading
+import time
+from collections import deque
+
+from app.cache import product_cache
+from app.config import get_settings
+from app.schemas import EdibleProduct, Message
+from app.services.catalog_index import catalog_index
+
+settings = get_settings()
+
+# Edible catalog codes often contain dashes/underscores and are case-insensitive
+SKU_MENTION = re.compile(r"\bSKU:\s*([A-Za-z0-9_-]{3,40})\b", re.IGNORECASE)
+_SKU_TOKEN = re.compile(r"(?<![$\w-])[A-Za-z0-9]+(?:[-_][A-Za-z0-9]+)*")
+_WORD = re.compile(r"[a-z0-9]+(?:[-_][a-z0-9]+)*")
+PHRASE_STOPWORDS = frozenset("a an and for from in of on or the to with".split())
+
+# Longer messages are new requests, not follow-ups about one product
+MAX_FOLLOW_UP_WORDS = 25
+MAX_SESSION_PRODUCTS = 30
+# Longest partial-name phrase added per shown product ("dipped berry box")
+MAX_PHRASE_WORDS = 4
+# Words besides the product mention for a bare mention ("the berry box?")
+MAX_BARE_EXTRA_WORDS = 2
+CATALOG_MATCHER_MAX_AGE = 60.0
+
+DETAIL_CUES = re.compile(
+    r"\b(?:tell me (?:more )?about|more (?:info|information|details)|details?|what'?s in|what is in"
+    r"|what comes|describe|how (?:much|big|many)|price|cost|ingredients|allergens?|sizes?)\b",
+    re.IGNORECASE,
+)
+# The shopper wants something other than the mentioned product
+REFINE_CUES = re.compile(
+    r"\b(?:cheaper|pricier|less expensive|similar|something like|more like|instead|other|others|alternatives?"
+    r"|else|compare|versus|vs|than|but)\b",
+    re.IGNORECASE,
+)
+
+
+def words(text: str) -> list[str]:
+    return _WORD.findall(text.lower())
+
+
+class MentionMatcher:
+    """Aho-Corasick automaton over word sequences; values are returned per match."""
+
+    def __init__(self):
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        # (pattern length in words, value) per node, including those reached through fail links
+        self._out: list[list[tuple[int, object]]] = [[]]
+        self._built = True
+
+    def add(self, pattern: str, value) -> bool:
+        return self.add_words(words(pattern), value)
+
+    def add_words(self, tokens: list[str] | tuple[str, ...], value) -> bool:
+        if not tokens:
+            return False
+        node = 0
+        for token in tokens:
+            child = self._goto[node].get(token)
+            if child is None:
+                child = len(self._goto)
+                self._goto[node][token] = child
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = child
+        self._out[node].append((len(tokens), value))
+        self._built = False
+        return True
+
+    def build(self) -> "MentionMatcher":
+        """Compute fail links breadth-first; call after the last `add`."""
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for token, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and token not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(token, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+        self._built = True
+        return self
+
+    def find(self, tokens: list[str]) -> list[tuple[int, int, object]]:
+        """Every (start word, end word, value) occurrence in `tokens`."""
+        if not self._built:
+            self.build()
+        goto, fail, out = self._goto, self._fail, self._out
+        matches = []
+        node = 0
+        for i, token in enumerate(tokens):
+            while node and token not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(token, 0)
+            for length, value in out[node]:
+                matches.append((i + 1 - length, i + 1, value))
+        return matches
+
+    def __len__(self) -> int:
+        return len(self._goto) - 1
+
+
+def longest_matches(matches: list[tuple[int, int, object]]) -> list[tuple[int, int, object]]:
+    """Leftmost-longest non-overlapping matches ("berry box" inside "chocolate berry box" is dropped)."""
+    chosen = []
+    end = 0
+    for start, stop, value in sorted(matches, key=lambda m: (m[0], m[0] - m[1])):
+        if start >= end:
+            chosen.append((start, stop, value))
+            end = stop
+    return chosen
+
+
+def session_matcher(products: list[EdibleProduct], vocabulary: set[str] | None = None) -> MentionMatcher:
+    """
+    SKUs, names and distinctive name phrases (2+ words) of the products shown
+    in a session. With `vocabulary` (the words of the message to match), only
+    patterns made of those words are added.
+    """
+    matcher = MentionMatcher()
+    owners: dict[tuple[str, ...], set[str]] = {}
+    by_sku = {}
+    for product in products:
+        by_sku[product.sku] = product
+        tokens = words(product.name)
+        for pattern in (words(product.sku), tokens):
+            if vocabulary is None or vocabulary.issuperset(pattern):
+                matcher.add_words(pattern, product)
+        if vocabulary is not None:
+            # A product sharing no word with the message can't own a phrase made of its words
+            tokens = tokens if vocabulary.intersection(tokens) else []
+        for n in range(2, min(len(tokens), MAX_PHRASE_WORDS + 1)):
+            for i in range(len(tokens) - n + 1):
+                phrase = tuple(tokens[i:i + n])
+                if not PHRASE_STOPWORDS.issuperset(phrase):
+                    owners.setdefault(phrase, set()).add(product.sku)
+    for phrase, skus in owners.items():
+        if len(skus) == 1 and (vocabulary is None or vocabulary.issuperset(phrase)):
+            matcher.add_words(phrase, by_sku[next(iter(skus))])
+    return matcher.build()
+
+
+_catalog_lock = threading.Lock()
+_catalog_matcher: tuple[int, float, MentionMatcher] | None = None
+
+
+def catalog_matcher() -> MentionMatcher | None:
+    """Names of every product in the catalog index; rebuilt at most every CATALOG_MATCHER_MAX_AGE seconds."""
+    global _catalog_matcher
+    if not settings.catalog_index_enabled or not len(catalog_index):
+        return None
+    current = _catalog_matcher
+    now = time.monotonic()
+    if current is not None and (current[0] == catalog_index.version or now - current[1] < CATALOG_MATCHER_MAX_AGE):
+        return current[2]
+    with _catalog_lock:
+        if _catalog_matcher is current:
+            version = catalog_index.version
+            matcher = MentionMatcher()
+            for product in catalog_index.products():
+                matcher.add(product.name, product)
+            _catalog_matcher = (version, now, matcher.build())
+        return _catalog_matcher[2]
+
+
+def session_products(history: list[Message]) -> list[EdibleProduct]:
+    """Stored products cited by SKU in the assistant's messages, most recent first."""
+    skus = []
+    for message in reversed(history):
+        if message.role == "assistant":
+            skus += [sku.strip() for sku in SKU_MENTION.findall(message.content)]
+    skus = list(dict.fromkeys(skus))[:MAX_SESSION_PRODUCTS]
+    found = product_cache.get_many(skus)
+    return [found[sku] for sku in skus if sku in found]
+
+
+def explicit_skus(message: str) -> list[EdibleProduct]:
+    """Stored products whose SKU appears verbatim in the message."""
+    tokens = [
+        token for token in _SKU_TOKEN.findall(message)
+        if 3 <= len(token) <= 40 and any(c.isdigit() for c in token) and not (token.isdigit() and len(token) < 4)
+    ]
+    if not tokens:
+        return []
+    keys = list(dict.fromkeys(key for token in tokens for key in (token, token.upper(), token.lower())))
+    found = product_cache.get_many(keys)
+    return list({product.sku: product for product in found.values()}.values())
+
+
+def find_mentioned_product(message: str, history: list[Message]) -> EdibleProduct | None:
+    """The one product a follow-up message asks about, or None for anything else."""
+    tokens = words(message)
+    if not tokens or len(tokens) > MAX_FOLLOW_UP_WORDS or REFINE_CUES.search(message):
+        return None
+
+    by_sku = explicit_skus(message)
+    if len(by_sku) > 1:
+        return None
+    if by_sku:
+        product = by_sku[0]
+        covered = len(words(product.sku))
+    else:
+        matches = []
+        shown = session_products(history)
+        if shown:
+            matches = session_matcher(shown, set(tokens)).find(tokens)
+        if not matches:
+            catalog = catalog_matcher()
+            matches = catalog.find(tokens) if catalog is not None else []
+        chosen = longest_matches(matches)
+        if len({product.sku for _, _, product in chosen}) != 1:
+            return None
+        product = chosen[0][2]
+        covered = sum(stop - start for start, stop, _ in chosen)
+
+    # A SKU or name inside a new request ("can ABC-123 be delivered today...") is not a follow-up
+    extra = [t for t in tokens if t not in PHRASE_STOPWORDS]
+    if DETAIL_CUES.search(message) or len(extra) - covered <= MAX_BARE_EXTRA_WORDS:
+        return product
+    return None
+
+
+def product_detail_reply(product: EdibleProduct) -> str:
+    """Short description of one product from its stored record."""
+    parts = [f"{product.name} (SKU: {product.sku}) is ${product.price:.2f}."]
+    description = " ".join(product.description.split())
+    if description:
+        parts.append(description if len(description) <= 400 else description[:397].rstrip() + "...")
+    if product.tags:
+        parts.append(f"You'll find it under {', '.join(product.tags[:3])}.")
+    parts.append("Would you like to go with this one, or should I look for something similar?")
+    return " ".join(parts)
@@ -0,0 +1,112 @@
+"""
+Collapse size and packaging variants of one arrangement before curation.
+
+Searches return many versions of the same product ("- Large", "12 Count",
+"with Balloons", "Deluxe"). They would fill the curation window with near
+copies, so each group goes to the LLM once: the best-ranked member is the
+representative and carries up to MAX_VARIANTS members of its group in
+`variants` (cheapest first) for the UI's size picker.
+
+Once variant markers are removed, a product joins a group when the Jaccard
+similarity of its name's word shingles and the representative's is at least
+`variant_min_similarity` ("Berry Bouquet" and "Berry Bouquet Dipped" share
+3 of 5), and their prices are within `variant_max_price_ratio`. Groups are
+bucketed by the first and last significant word of the representative's
+name, so a product is only compared with groups sharing one of its own;
+shingles are memoized per name.
+"""
+import re
+from functools import lru_cache
+
+from app.config import get_settings
+from app.schemas import EdibleProduct, ProductVariant
+
+settings = get_settings()
+
+# Size, count and add-on wording that distinguishes variants of one product
+VARIANT_MARKERS = re.compile(
+    r"""
+    \b(?:with|and|&|\+)\s+(?:a\s+)?(?:mylar\s+)?balloons?\b
+    | \b(?:half\s+)?dozen\b
+    | \b(?:box|set|pack)\s+of\s+\d+\b
+    | \b\d+\s*(?:-\s*)?(?:count|ct|pc|pcs|piece|pieces|pack|oz|lb|lbs)\b
+    | \b(?:small|medium|large|x-?large|xl|petite|standard|regular|deluxe|premium|grand|jumbo|mini)\b
+    | \bgift\s+set\b
+    """,
+    re.IGNORECASE | re.VERBOSE,
+)
+_WORD = re.compile(r"[a-z0-9]+")
+SHINGLE_STOPWORDS = frozenset({"a", "an", "and", "the", "of", "with"})
+# Size picker entries per representative
+MAX_VARIANTS = 8
+
+
+@lru_cache(maxsize=8192)
+def _variant_shape(name: str) -> tuple[frozenset[str], tuple[str, ...]]:
+    """Shingles of a name without its variant markers, and its bucket words."""
+    base = VARIANT_MARKERS.sub(" ", name.lower())
+    words = [w for w in _WORD.findall(base) if w not in SHINGLE_STOPWORDS]
+    if not words:
+        return frozenset([name.lower()]), (name.lower(),)
+    # Bigrams keep word order ("fruit chocolate" vs "chocolate fruit")
+    shingles = set(words) | {f"{a} {b}" for a, b in zip(words, words[1:])}
+    return frozenset(shingles), tuple(dict.fromkeys((words[0], words[-1])))
+
+
+def variant_key(name: str) -> frozenset[str]:
+    """Word shingles of a product name without its variant markers."""
+    return _variant_shape(name)[0]
+
+
+def similarity(a: frozenset[str], b: frozenset[str]) -> float:
+    shared = len(a & b)
+    return shared / (len(a) + len(b) - shared)
+
+
+def _variant(product: EdibleProduct) -> ProductVariant:
+    return ProductVariant(sku=product.sku, name=product.name, price=product.price, pdp_url=product.pdp_url)
+
+
+def collapse_variants(
+    products: list[EdibleProduct], max_price_ratio: float | None = None, min_similarity: float | None = None
+) -> list[EdibleProduct]:
+    """
+    One representative per variant group, in the order of each group's best
+    product. Representatives of groups with several members are copies with
+    `variants` set; single products are returned unchanged.
+    """
+    ratio = max_price_ratio or settings.variant_max_price_ratio
+    threshold = min_similarity or settings.variant_min_similarity
+    # Bucket word -> lead shingles -> groups whose lead has that first or last word and those shingles
+    buckets: dict[str, dict[frozenset[str], list[list[EdibleProduct]]]] = {}
+    ordered: list[list[EdibleProduct]] = []
+    for product in products:
+        shingles, bucket_words = _variant_shape(product.name)
+        price = product.price
+        best, best_score = None, 0.0
+        for word in bucket_words:
+            for lead_shingles, groups in buckets.get(word, {}).items():
+                score = 1.0 if lead_shingles == shingles else similarity(shingles, lead_shingles)
+                if score < threshold or score <= best_score:
+                    continue
+                for group in groups:
+                    lead = group[0].price
+                    if price > 0 and lead > 0 and price <= lead * ratio and lead <= price * ratio:
+                        best, best_score = group, score
+                        break
+        if best is not None:
+            best.append(product)
+        else:
+            group = [product]
+            ordered.append(group)
+            for word in bucket_words:
+                buckets.setdefault(word, {}).setdefault(shingles, []).append(group)
+
+    collapsed = []
+    for group in ordered:
+        if len(group) == 1:
+            collapsed.append(group[0])
+        else:
+            variants = [_variant(p) for p in sorted(group, key=lambda p: p.price)[:MAX_VARIANTS]]
+            collapsed.append(group[0].model_copy(update={"variants": variants}))
+    return collapsed
@@ -0,0 +1,242 @@
+"""
+Sampled recording of real `/api/chat` traffic for offline replay.
+
+`TrafficRecorderMiddleware` picks `traffic_record_rate` of chat requests. While
+a picked request runs, the Edible client and the LLM wrapper append the
+upstream responses they receive to the current trace. When the response is
+sent, one anonymized JSON line is queued for `traffic_record_path`; a writer
+thread appends it, so the event loop never waits on the file:
+
+    {"ts": ..., "request": {...}, "status": 200, "duration_ms": ...,
+     "session_id": ..., "upstream": [{"upstream": "openai", "key": {...}, "status": 200,
+                   "latency_ms": ..., "response": {...}}, ...]}
+
+Anonymization: session ids become keyed pseudonyms (stable within a process,
+so multi-turn sessions stay linked; `session_id` is the pseudonym of the
+session the response belongs to, which links a first turn to the turns that
+follow it) and emails, phone numbers, long digit
+runs and URLs in free text are replaced with placeholders. LLM calls are keyed
+by a fingerprint of the anonymized messages, which is what
+`benchmarks.replay` uses to serve the recorded response back.
+
+The middleware is only installed when recording is enabled.
+"""
+import atexit
+import hashlib
+import hmac
+import json
+import logging
+import os
+import queue
+import random
+import re
+import secrets
+import threading
+import time
+from contextvars import ContextVar
+
+CHAT_PATH = "/api/chat"
+# Response bodies longer than this are not parsed for their session id
+MAX_RESPONSE_BYTES = 1 << 20
+
+logger = logging.getLogger(__name__)
+
+_REDACTIONS = [
+    (re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+"), "<email>"),
+    (re.compile(r"https?://\S+"), "<url>"),
+    (re.compile(r"\+?\d[\d\s().-]{7,}\d"), "<number>"),
+]
+
+_trace: ContextVar[list | None] = ContextVar("traffic_trace", default=None)
+_salt = secrets.token_bytes(16)
+
+
+def anonymize_text(text: str) -> str:
+    """Replace contact details and long numbers; idempotent."""
+    for pattern, placeholder in _REDACTIONS:
+        text = pattern.sub(placeholder, text)
+    return text
+
+
+def pseudonymize(value: str | None) -> str | None:
+    if not value:
+        return value
+    return hmac.new(_salt, value.encode(), hashlib.sha256).hexdigest()[:21]
+
+
+def messages_fingerprint(messages: list[dict]) -> str:
+    """Stable key for an LLM request, computed on anonymized content."""
+    normalized = [[m.get("role"), anonymize_text(str(m.get("content", "")))] for m in messages]
+    return hashlib.sha256(json.dumps(normalized).encode()).hexdigest()[:32]
+
+
+def anonymize_chat_request(body: dict) -> dict:
+    return {
+        "message": anonymize_text(body.get("message", "")),
+        "session_id": pseudonymize(body.get("session_id")),
+        "history": [
+            {"role": m.get("role"), "content": anonymize_text(m.get("content", ""))}
+            for m in body.get("history", [])
+        ],
+    }
+
+
+def _anonymize_llm_response(payload: dict) -> dict:
+    for choice in payload.get("choices", []):
+        message = choice.get("message") or {}
+        if isinstance(message.get("content"), str):
+            message["content"] = anonymize_text(message["content"])
+    return payload
+
+
+def is_recording() -> bool:
+    return _trace.get() is not None
+
+
+def record_upstream_call(upstream: str, key: dict, status: int, latency_ms: float, response=None) -> None:
+    """Append an upstream response to the trace of the current request, if any."""
+    trace = _trace.get()
+    if trace is None:
+        return
+    if upstream == "openai" and isinstance(response, dict):
+        response = _anonymize_llm_response(response)
+    trace.append(
+        {"upstream": upstream, "key": key, "status": status, "latency_ms": round(latency_ms, 1), "response": response}
+    )
+
+
+class TraceWriter:
+    """
+    Append-only NDJSON trace file shared by all requests of the process.
+
+    `append` only queues the record; a writer thread serializes and writes
+    it. Records are dropped (and counted) instead of blocking on a full queue.
+    """
+
+    def __init__(self, path: str, queue_size: int = 1000):
+        self.path = path
+        self.dropped = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def append(self, record: dict) -> None:
+        if self._thread is None:
+            self._start()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="traffic-trace-writer", daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+
+    def _run(self) -> None:
+        while True:
+            records = [self._queue.get()]
+            while True:
+                try:
+                    records.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = None in records
+            try:
+                lines = "".join(json.dumps(r, separators=(",", ":")) + "\n" for r in records if r is not None)
+                if lines:
+                    os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                    with open(self.path, "a", encoding="utf-8") as f:
+                        f.write(lines)
+            except Exception:
+                logger.exception("Writing traffic traces failed", extra={"fields": {"records": len(records)}})
+            finally:
+                for _ in records:
+                    self._queue.task_done()
+            if stop:
+                return
+
+    def flush(self) -> None:
+        """Wait until every queued record is written."""
+        if self._thread is not None:
+            self._queue.join()
+
+    def close(self) -> None:
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join()
+
+
+def _response_session_id(status: int, body: bytes) -> str | None:
+    if status != 200:
+        return None
+    try:
+        session_id = json.loads(body).get("session_id")
+    except (ValueError, AttributeError):
+        return None
+    return session_id if isinstance(session_id, str) else None
+
+
+class TrafficRecorderMiddleware:
+    """Pure ASGI middleware that records sampled chat requests with their upstream responses."""
+
+    def __init__(self, app, writer: TraceWriter, sample_rate: float = 0.0):
+        self.app = app
+        self.writer = writer
+        self.sample_rate = sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] != "POST"
+            or scope["path"] != CHAT_PATH
+            or random.random() >= self.sample_rate
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        body = bytearray()
+        response_body = bytearray()
+        status = {"code": 500}
+        upstream: list[dict] = []
+
+        async def receive_wrapper():
+            message = await receive()
+            if message["type"] == "http.request":
+                body.extend(message.get("body", b""))
+            return message
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            elif message["type"] == "http.response.body" and len(response_body) < MAX_RESPONSE_BYTES:
+                response_body.extend(message.get("body", b""))
+            await send(message)
+
+        token = _trace.set(upstream)
+        started_at = time.time()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            _trace.reset(token)
+            duration_ms = (time.perf_counter() - start) * 1000
+            try:
+                request = anonymize_chat_request(json.loads(body or b"{}"))
+            except (ValueError, AttributeError, TypeError):
+                request = None
+            if request is not None:
+                self.writer.append(
+                    {
+                        "ts": round(started_at, 3),
+                        "request": request,
+                        "status": status["code"],
+                        "duration_ms": round(duration_ms, 1),
+                        "session_id": pseudonymize(_response_session_id(status["code"], response_body)),
+                        "upstream": upstream,
+                    }
+                )
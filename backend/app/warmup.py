@@ -0,0 +1,87 @@
+"""
+Optional warm-up, run during app start-up before the worker accepts traffic.
+
+Uvicorn only starts serving (and /health only answers) once the lifespan
+start-up has finished, so with `warmup_enabled` a new worker does the
+expensive first-use work before it reports ready:
+
+- `database`: open a pooled connection on the write and read engines
+- `openai`: build the client (importing `openai`) and open a keep-alive
+  connection to the API
+- `edible`: build the client and open a keep-alive connection, then load
+  the catalog for `warmup_keywords` into the catalog cache
+
+Steps run in parallel and are best-effort: failures are logged, and steps
+still running after `warmup_timeout_seconds` are left to finish in the
+background.
+"""
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from sqlalchemy import text
+
+from app.clients import get_edible_client, get_openai_client
+from app.config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+def warm_database() -> None:
+    from app.database import engine, read_engine
+
+    for target in {engine, read_engine}:
+        with target.connect() as conn:
+            conn.execute(text("SELECT 1"))
+
+
+def warm_openai() -> None:
+    client = get_openai_client()
+    # Any answer (even 401/404 from a proxy) leaves a pooled connection behind
+    try:
+        client.with_options(max_retries=0, timeout=settings.warmup_timeout_seconds).models.list()
+    except Exception:
+        pass
+
+
+def warm_edible() -> None:
+    from app.services.edible_client import HEADERS, fetch_single_keyword
+
+    keywords = [k.strip() for k in settings.warmup_keywords.split(",") if k.strip()]
+    if not keywords:
+        get_edible_client().head(settings.edible_api_url, headers=HEADERS)
+    for keyword in keywords:
+        fetch_single_keyword(keyword)
+
+
+WARMUP_STEPS = {"database": warm_database, "openai": warm_openai, "edible": warm_edible}
+
+
+def warm_up(timeout: float | None = None) -> dict[str, dict]:
+    """Run all warm-up steps in parallel; returns status and duration per step."""
+    timeout = settings.warmup_timeout_seconds if timeout is None else timeout
+    started = time.perf_counter()
+    results: dict[str, dict] = {}
+
+    def run_step(name, step):
+        step_start = time.perf_counter()
+        try:
+            step()
+            status = "ok"
+        except Exception as e:
+            status = f"error: {e}"
+        results[name] = {"status": status, "ms": round((time.perf_counter() - step_start) * 1000, 1)}
+
+    executor = ThreadPoolExecutor(max_workers=len(WARMUP_STEPS), thread_name_prefix="warmup")
+    futures = [executor.submit(run_step, name, step) for name, step in WARMUP_STEPS.items()]
+    wait(futures, timeout=timeout)
+    executor.shutdown(wait=False)
+    for name in WARMUP_STEPS:
+        results.setdefault(name, {"status": "timeout", "ms": round(timeout * 1000, 1)})
+
+    logger.info(
+        "Warm-up finished",
+        extra={"fields": {"duration_ms": round((time.perf_counter() - started) * 1000, 1), "steps": results}},
+    )
+    return results
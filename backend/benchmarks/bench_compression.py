@@ -0,0 +1,72 @@
+"""
+Conversation compression benchmark: storage ratio and encode/decode cost.
+
+Compares plain storage, zlib without a dictionary, the built-in dictionary and
+a dictionary trained on half of the synthetic replies (measured on the other
+half). For real traffic use `python -m scripts.conversation_dict report`.
+
+Usage (from backend/):
+    python -m benchmarks.bench_compression --messages 5000
+"""
+import argparse
+import json
+import tempfile
+import time
+import zlib
+
+from app.compression import (
+    BUILTIN_DICT_ID,
+    compress_text,
+    decompress_value,
+    reload_dictionaries,
+    save_dictionary,
+    train_dictionary,
+)
+from benchmarks.synthetic import curation_reply, edible_products
+
+
+def _measure(name: str, samples: list[str], encode, decode) -> dict:
+    raw_bytes = sum(len(s.encode("utf-8")) for s in samples)
+    t0 = time.perf_counter()
+    packed = [encode(s) for s in samples]
+    encode_seconds = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    for value in packed:
+        decode(value)
+    decode_seconds = time.perf_counter() - t0
+    stored = sum(len(p) for p in packed)
+    return {
+        "mode": name,
+        "raw_bytes": raw_bytes,
+        "stored_bytes": stored,
+        "ratio": round(raw_bytes / stored, 2),
+        "encode_us_per_message": round(encode_seconds / len(samples) * 1e6, 2),
+        "decode_us_per_message": round(decode_seconds / len(samples) * 1e6, 2),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=5000)
+    parser.add_argument("--catalog", type=int, default=300)
+    args = parser.parse_args()
+
+    catalog = edible_products(args.catalog)
+    replies = [curation_reply(catalog, seed=i) for i in range(args.messages * 2)]
+    training, samples = replies[: args.messages], replies[args.messages :]
+
+    # The trained dictionary goes to a scratch directory, not the configured one
+    with tempfile.TemporaryDirectory() as directory:
+        trained_id = save_dictionary(train_dictionary(training), directory)
+        results = [
+            _measure("plain", samples, lambda s: s.encode("utf-8"), lambda b: b.decode("utf-8")),
+            _measure("zlib-no-dict", samples, lambda s: zlib.compress(s.encode("utf-8"), 6), lambda b: zlib.decompress(b).decode("utf-8")),
+            _measure("builtin-dict", samples, lambda s: compress_text(s, dict_id=BUILTIN_DICT_ID), decompress_value),
+            _measure("trained-dict", samples, lambda s: compress_text(s, dict_id=trained_id), decompress_value),
+        ]
+    reload_dictionaries()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Engine profile benchmark: concurrent mixed chat/click writes.
+
+Each worker thread repeatedly performs either a chat turn (create session,
+user + assistant conversation rows, intent log) or a product click, in the
+same shape as the API routes. Reports throughput, latency percentiles and
+lock errors for every profile.
+
+Usage (from backend/):
+    python -m benchmarks.bench_db_profiles --threads 16 --seconds 10
+    python -m benchmarks.bench_db_profiles --profiles server-db --server-url postgresql://...
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+
+from sqlalchemy.orm import sessionmaker
+
+from app.base import Base
+from app.database import ENGINE_PROFILES, build_engine
+from app.models import Conversation, IntentLog, ProductClick, Session as DBSession
+
+CHAT_RATIO = 0.7
+REPLY = "Fresh Fruit Bouquet (SKU: ABC-123): A bright, cheerful pick. " * 8
+
+
+def _chat_turn(factory) -> None:
+    db = factory()
+    try:
+        session = DBSession()
+        db.add(session)
+        db.flush()
+        db.add(Conversation(session_id=session.id, role="user", content="Birthday gift for mom"))
+        db.add(Conversation(session_id=session.id, role="assistant", content=REPLY))
+        db.add(IntentLog(session_id=session.id, occasion="birthday", keywords=["birthday", "fruit"], confidence=0.8))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def _click(factory, session_ids: list[str]) -> None:
+    db = factory()
+    try:
+        db.add(ProductClick(session_id=random.choice(session_ids), sku="ABC-123", name="Fresh Fruit Bouquet", position=1))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def run_profile(profile_name: str, database_url: str, threads: int, seconds: float) -> dict:
+    engine = build_engine(database_url, ENGINE_PROFILES[profile_name], echo=False)
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(autoflush=False, bind=engine)
+
+    seed = factory()
+    seeded = [DBSession() for _ in range(50)]
+    seed.add_all(seeded)
+    seed.commit()
+    session_ids = [s.id for s in seeded]
+    seed.close()
+
+    latencies: list[float] = []
+    errors: list[str] = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def worker() -> None:
+        local_latencies = []
+        local_errors = []
+        while time.perf_counter() < deadline:
+            t0 = time.perf_counter()
+            try:
+                if random.random() < CHAT_RATIO:
+                    _chat_turn(factory)
+                else:
+                    _click(factory, session_ids)
+                local_latencies.append(time.perf_counter() - t0)
+            except Exception as exc:
+                local_errors.append(type(exc).__name__)
+        with lock:
+            latencies.extend(local_latencies)
+            errors.extend(local_errors)
+
+    started = time.perf_counter()
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - started
+    engine.dispose()
+
+    ordered = sorted(latencies)
+
+    def pct(p: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))] * 1000, 2) if ordered else 0.0
+
+    return {
+        "profile": profile_name,
+        "threads": threads,
+        "ops": len(latencies),
+        "ops_per_sec": round(len(latencies) / elapsed, 1),
+        "errors": len(errors),
+        "error_types": sorted(set(errors)),
+        "latency_ms": {
+            "p50": pct(0.50),
+            "p95": pct(0.95),
+            "p99": pct(0.99),
+            "mean": round(statistics.fmean(latencies) * 1000, 2) if latencies else 0.0,
+        },
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profiles", nargs="+", default=["dev", "sqlite-prod"])
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--server-url", default=None, help="Database URL used for the server-db profile")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for name in args.profiles:
+            if name == "server-db":
+                if not args.server_url:
+                    print("Skipping server-db: pass --server-url")
+                    continue
+                url = args.server_url
+            else:
+                url = f"sqlite:///{os.path.join(workdir, f'{name}.db')}"
+            results.append(run_profile(name, url, args.threads, args.seconds))
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Primary key strategy benchmark: random nanoids vs time-sortable ids on SQLite.
+
+Inserts rows shaped like `conversations` (PK + indexed `session_id`) into a
+fresh database file per strategy and reports insert throughput, id generation
+cost, on-disk index sizes and the cost of a "most recent rows" query.
+
+Usage (from backend/):
+    python -m benchmarks.bench_ids --rows 2000000
+"""
+import argparse
+import json
+import os
+import sqlite3
+import tempfile
+import time
+
+from app.ids import ID_STRATEGIES
+
+SCHEMA = """
+CREATE TABLE conversations (
+    id VARCHAR(21) NOT NULL PRIMARY KEY,
+    session_id VARCHAR(21) NOT NULL,
+    role VARCHAR(10) NOT NULL,
+    content TEXT NOT NULL,
+    created_at DATETIME NOT NULL
+);
+CREATE INDEX ix_conversations_session_id ON conversations (session_id);
+"""
+
+ROWS_PER_SESSION = 6
+
+
+def _index_sizes(conn: sqlite3.Connection) -> dict[str, int]:
+    """Bytes per b-tree, using the dbstat virtual table when compiled in."""
+    try:
+        rows = conn.execute("SELECT name, SUM(pgsize) FROM dbstat GROUP BY name").fetchall()
+        return {name: int(size) for name, size in rows}
+    except sqlite3.OperationalError:
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+        return {"<database>": page_size * page_count}
+
+
+def run_strategy(name: str, rows: int, batch: int, workdir: str) -> dict:
+    make_id = ID_STRATEGIES[name]
+    path = os.path.join(workdir, f"ids_{name}.db")
+    conn = sqlite3.connect(path, isolation_level=None)
+    conn.executescript(SCHEMA)
+
+    gen_seconds = 0.0
+    insert_seconds = 0.0
+    session_id = make_id()
+    inserted = 0
+    while inserted < rows:
+        n = min(batch, rows - inserted)
+
+        t0 = time.perf_counter()
+        params = []
+        for i in range(n):
+            if (inserted + i) % ROWS_PER_SESSION == 0:
+                session_id = make_id()
+            params.append((make_id(), session_id, "user", "hello", "2025-01-01 00:00:00"))
+        gen_seconds += time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        conn.execute("BEGIN")
+        conn.executemany(
+            "INSERT INTO conversations (id, session_id, role, content, created_at) VALUES (?, ?, ?, ?, ?)",
+            params,
+        )
+        conn.execute("COMMIT")
+        insert_seconds += time.perf_counter() - t0
+        inserted += n
+
+    t0 = time.perf_counter()
+    conn.execute("SELECT id FROM conversations ORDER BY id DESC LIMIT 50").fetchall()
+    recent_ms = (time.perf_counter() - t0) * 1000
+
+    sizes = _index_sizes(conn)
+    conn.close()
+    return {
+        "strategy": name,
+        "rows": rows,
+        "insert_rows_per_sec": round(rows / insert_seconds, 1),
+        "id_gen_us_per_id": round(gen_seconds / (rows + rows / ROWS_PER_SESSION) * 1e6, 3),
+        "file_bytes": os.path.getsize(path),
+        "btree_bytes": sizes,
+        "recent_50_query_ms": round(recent_ms, 3),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--batch", type=int, default=10_000)
+    parser.add_argument("--strategies", nargs="+", default=list(ID_STRATEGIES))
+    parser.add_argument("--workdir", default=None, help="Directory for the temporary databases")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.workdir) as workdir:
+        results = [run_strategy(name, args.rows, args.batch, workdir) for name in args.strategies]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
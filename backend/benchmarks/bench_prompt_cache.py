@@ -0,0 +1,102 @@
+"""
+Prompt layout benchmark: share of prompt tokens a provider prefix cache serves.
+
+Replays a synthetic stream of curation turns through `PrefixCacheModel`
+(benchmarks.stubs) with two layouts of the user message:
+
+- `legacy`: customer intent, then the catalog (the layout before
+  CURATION_PROMPT_VERSION "curation-v2")
+- `current`: `build_curation_prompt`, catalog first and intent last
+
+Searches repeat with a skewed popularity (`--searches` distinct catalog
+pages, Zipf-like), and every turn has its own intent. The report gives the
+cached token ratio and the estimated input cost of each layout.
+
+Usage (from backend/):
+    python -m benchmarks.bench_prompt_cache
+    python -m benchmarks.bench_prompt_cache --turns 5000 --searches 40 --products 15
+"""
+import argparse
+import json
+import random
+
+from app.config import get_settings
+from app.prompts.product_curator import CURATION_SYSTEM_PROMPT, build_curation_prompt
+from app.schemas import Budget, ExtractedIntent, Occasion
+from app.services.curation_service import build_intent_summary
+from app.services.llm import estimate_cost
+from benchmarks.stubs import PrefixCacheModel
+from benchmarks.synthetic import edible_products
+
+RECIPIENTS = ["mom", "dad", "coworker", "best friend", "neighbor", "team", "client", "grandma"]
+
+
+def legacy_curation_prompt(intent_summary: str, products_json: str) -> str:
+    return f"""
+CUSTOMER INTENT:
+{intent_summary}
+
+CATALOG (products matching their search):
+{products_json}
+
+Based on the customer's needs and the available products, recommend the best 3-5 options with brief explanations.
+""".strip()
+
+
+LAYOUTS = {"legacy": legacy_curation_prompt, "current": build_curation_prompt}
+
+
+def synthetic_turns(turns: int, searches: int, products: int, seed: int = 7) -> list[tuple[str, str]]:
+    """(intent summary, catalog JSON) per turn; catalog pages repeat with Zipf-like popularity."""
+    rng = random.Random(seed)
+    pages = [
+        json.dumps([p.model_dump(exclude={"variants"}) for p in edible_products(products, seed=i)], indent=2)
+        for i in range(searches)
+    ]
+    weights = [1 / (rank + 1) for rank in range(searches)]
+    result = []
+    for _ in range(turns):
+        intent = ExtractedIntent(
+            occasion=rng.choice(list(Occasion)),
+            recipient=rng.choice(RECIPIENTS),
+            budget=rng.choice([None, *Budget]),
+            dietary=rng.choice([[], [], ["kosher"], ["nut-free"]]),
+        )
+        result.append((build_intent_summary(intent), rng.choices(pages, weights)[0]))
+    return result
+
+
+def measure(layout: str, turns: list[tuple[str, str]], model: str) -> dict:
+    cache = PrefixCacheModel()
+    prompt_tokens = cached_tokens = 0
+    for summary, catalog in turns:
+        messages = [
+            {"role": "system", "content": CURATION_SYSTEM_PROMPT},
+            {"role": "user", "content": LAYOUTS[layout](summary, catalog)},
+        ]
+        prompt, cached = cache.lookup(messages)
+        prompt_tokens += prompt
+        cached_tokens += cached
+    return {
+        "prompt_tokens": prompt_tokens,
+        "cached_prompt_tokens": cached_tokens,
+        "cached_prompt_ratio": round(cached_tokens / prompt_tokens, 3) if prompt_tokens else 0.0,
+        "input_cost_usd": round(estimate_cost(model, prompt_tokens, 0, cached_tokens), 4),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=2000)
+    parser.add_argument("--searches", type=int, default=30, help="Distinct catalog pages")
+    parser.add_argument("--products", type=int, default=15, help="Products per catalog page")
+    parser.add_argument("--model", default=get_settings().curation_model)
+    args = parser.parse_args()
+
+    turns = synthetic_turns(args.turns, args.searches, args.products)
+    report = {"config": vars(args), "layouts": {name: measure(name, turns, args.model) for name in LAYOUTS}}
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,341 @@
+"""
+End-to-end load test against a real server process and local stub upstreams.
+
+`run` starts the Edible and OpenAI stubs (see benchmarks/stubs.py), launches
+uvicorn on a fresh SQLite database pointed at them, seeds a few chat sessions,
+then drives a weighted mix of endpoints at fixed concurrency for a fixed time.
+The JSON report has p50/p95/p99, throughput and error rate per scenario and
+overall. `compare` diffs two reports and exits non-zero on regressions.
+
+Usage (from backend/):
+    python -m benchmarks.load_test run --concurrency 32 --seconds 30 --output runs/base.json
+    python -m benchmarks.load_test run --llm-latency lognormal:800,0.4 --llm-error-rate 0.02
+    python -m benchmarks.load_test run --target http://localhost:8000   # existing server, no stubs
+    python -m benchmarks.load_test compare runs/base.json runs/new.json --max-regression 0.1
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import ExitStack
+from datetime import datetime, timezone
+
+import httpx
+
+from benchmarks.stubs import EdibleStub, LatencyModel, OpenAIStub
+
+DEFAULT_MIX = "chat=5,search=3,click=2,terms=1,cost=1,export=0"
+MESSAGES = [
+    "Birthday gift for my mom, she loves chocolate",
+    "Something for a coworker who just had a baby",
+    "Sympathy basket for a friend, nothing too flashy",
+    "Anniversary gift under $60 with fresh fruit",
+    "Thank you gift for my team, nut-free please",
+    "Get well soon treats for my dad",
+]
+KEYWORDS = ["birthday", "chocolate", "fruit", "sympathy", "cookies", "anniversary", "kosher", "thank you"]
+
+
+class SharedState:
+    """Session ids and SKUs produced by chat calls, reused by analytics calls."""
+
+    def __init__(self):
+        self.session_ids: list[str] = []
+        self.skus: list[tuple[str, str]] = []
+
+    def record_chat(self, body: dict) -> None:
+        self.session_ids.append(body["session_id"])
+        self.skus.extend((p["sku"], p["name"]) for p in body.get("products", [])[:3])
+
+
+def build_request(scenario: str, state: SharedState, rng: random.Random) -> tuple[str, str, dict | None]:
+    """(method, path, json body) for one request of a scenario."""
+    if scenario == "chat":
+        return "POST", "/api/chat", {"message": rng.choice(MESSAGES), "session_id": None, "history": []}
+    if scenario == "search":
+        return "POST", "/api/search", {"keyword": rng.choice(KEYWORDS)}
+    if scenario == "click":
+        sku, name = rng.choice(state.skus) if state.skus else ("1000-std", "Fresh Fruit Bouquet")
+        body = {"session_id": rng.choice(state.session_ids), "sku": sku, "name": name, "position": rng.randint(1, 5)}
+        return "POST", "/api/analytics/click", body
+    if scenario == "terms":
+        return "GET", "/api/analytics/intents/terms?kind=keyword&limit=20", None
+    if scenario == "cost":
+        return "GET", f"/api/analytics/sessions/{rng.choice(state.session_ids)}/cost", None
+    if scenario == "export":
+        return "GET", "/api/analytics/export/intent_logs?format=ndjson", None
+    raise ValueError(f"Unknown scenario: {scenario}")
+
+
+def parse_mix(spec: str) -> dict[str, int]:
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = int(weight or 1)
+    return {name: weight for name, weight in mix.items() if weight > 0}
+
+
+def percentile(ordered: list[float], p: float) -> float:
+    if not ordered:
+        return 0.0
+    return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))], 2)
+
+
+def summarize(latencies: list[float], errors: int, statuses: dict, elapsed: float) -> dict:
+    ordered = sorted(latencies)
+    count = len(ordered)
+    return {
+        "requests": count,
+        "errors": errors,
+        "error_rate": round(errors / count, 4) if count else 0.0,
+        "throughput_rps": round(count / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": percentile(ordered, 0.50),
+            "p95": percentile(ordered, 0.95),
+            "p99": percentile(ordered, 0.99),
+            "max": round(ordered[-1], 2) if ordered else 0.0,
+            "mean": round(sum(ordered) / count, 2) if count else 0.0,
+        },
+        "status_counts": dict(sorted(statuses.items())),
+    }
+
+
+async def drive(base_url: str, mix: dict[str, int], concurrency: int, seconds: float, seed_sessions: int,
+                timeout: float, seed: int) -> dict:
+    state = SharedState()
+    results = {name: {"latencies": [], "errors": 0, "statuses": {}} for name in mix}
+    names, weights = list(mix), list(mix.values())
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+        # Seed sessions so click/cost scenarios have ids to use (not measured)
+        rng = random.Random(seed)
+        for _ in range(seed_sessions):
+            method, path, body = build_request("chat", state, rng)
+            res = await client.request(method, path, json=body)
+            if res.status_code == 200:
+                state.record_chat(res.json())
+        if not state.session_ids:
+            raise RuntimeError("Seeding failed: no chat request succeeded")
+
+        deadline = time.perf_counter() + seconds
+
+        async def worker(worker_id: int) -> None:
+            worker_rng = random.Random(seed + worker_id)
+            while time.perf_counter() < deadline:
+                scenario = worker_rng.choices(names, weights)[0]
+                method, path, body = build_request(scenario, state, worker_rng)
+                stats = results[scenario]
+                start = time.perf_counter()
+                try:
+                    async with client.stream(method, path, json=body) as res:
+                        payload = await res.aread()
+                    status = str(res.status_code)
+                    if res.status_code == 200 and scenario == "chat":
+                        state.record_chat(json.loads(payload))
+                except httpx.HTTPError as exc:
+                    status = type(exc).__name__
+                stats["latencies"].append((time.perf_counter() - start) * 1000)
+                stats["statuses"][status] = stats["statuses"].get(status, 0) + 1
+                if not status.isdigit() or int(status) >= 400:
+                    stats["errors"] += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    scenarios = {name: summarize(r["latencies"], r["errors"], r["statuses"], elapsed) for name, r in results.items()}
+    overall_statuses: dict[str, int] = {}
+    for r in results.values():
+        for status, count in r["statuses"].items():
+            overall_statuses[status] = overall_statuses.get(status, 0) + count
+    overall = summarize(
+        [latency for r in results.values() for latency in r["latencies"]],
+        sum(r["errors"] for r in results.values()),
+        overall_statuses,
+        elapsed,
+    )
+    return {"elapsed_seconds": round(elapsed, 2), "scenarios": scenarios, "overall": overall}
+
+
+def wait_for_health(base_url: str, process: subprocess.Popen, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with code {process.returncode}")
+        try:
+            if httpx.get(f"{base_url}/health", timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError("Server did not become healthy in time")
+
+
+def start_server(workdir: str, edible: EdibleStub, openai_stub: OpenAIStub, args) -> tuple[str, subprocess.Popen]:
+    """Create a fresh database and launch uvicorn pointed at the stubs."""
+    from app.base import Base
+    from app.database import ENGINE_PROFILES, build_engine
+    import app.models  # noqa: F401 - register tables
+
+    database_url = f"sqlite:///{os.path.join(workdir, 'loadtest.db')}"
+    engine = build_engine(database_url, ENGINE_PROFILES[args.db_profile], echo=False)
+    Base.metadata.create_all(engine)
+    engine.dispose()
+
+    env = {
+        **os.environ,
+        "DATABASE_URL": database_url,
+        "DB_PROFILE": args.db_profile,
+        "SQLALCHEMY_ECHO": "false",
+        "OPENAI_API_KEY": "stub",
+        "OPENAI_BASE_URL": openai_stub.base_url,
+        "EDIBLE_API_URL": edible.search_url,
+        "COMPRESSION_DICT_DIR": os.path.join(workdir, "zdicts"),
+        **dict(item.split("=", 1) for item in args.server_env),
+    }
+    cmd = [
+        sys.executable, "-m", "uvicorn", "app.main:app",
+        "--host", "127.0.0.1", "--port", str(args.port),
+        "--workers", str(args.workers), "--log-level", "warning", "--no-access-log",
+    ]
+    base_url = f"http://127.0.0.1:{args.port}"
+    # Server output goes to a log file so stdout stays a clean JSON report
+    log = open(os.path.join(workdir, "server.log"), "wb")
+    process = subprocess.Popen(cmd, env=env, stdout=log, stderr=subprocess.STDOUT)
+    log.close()
+    try:
+        wait_for_health(base_url, process)
+    except Exception:
+        process.terminate()
+        with open(os.path.join(workdir, "server.log"), encoding="utf-8", errors="replace") as f:
+            sys.stderr.write(f.read()[-4000:])
+        raise
+    return base_url, process
+
+
+def run(args) -> dict:
+    mix = parse_mix(args.mix)
+    config = {
+        "concurrency": args.concurrency,
+        "seconds": args.seconds,
+        "mix": mix,
+        "workers": args.workers,
+        "db_profile": args.db_profile,
+        "edible_latency": args.edible_latency,
+        "edible_error_rate": args.edible_error_rate,
+        "llm_latency": args.llm_latency,
+        "llm_error_rate": args.llm_error_rate,
+        "server_env": args.server_env,
+        "target": args.target,
+    }
+    report = {"started_at": datetime.now(timezone.utc).isoformat(), "label": args.label, "config": config}
+
+    if args.target:
+        results = asyncio.run(
+            drive(args.target, mix, args.concurrency, args.seconds, args.seed_sessions, args.timeout, args.seed)
+        )
+        return {**report, **results}
+
+    with ExitStack() as stack:
+        workdir = stack.enter_context(tempfile.TemporaryDirectory())
+        edible = stack.enter_context(
+            EdibleStub(LatencyModel(args.edible_latency, seed=args.seed), args.edible_error_rate, seed=args.seed)
+        )
+        openai_stub = stack.enter_context(
+            OpenAIStub(LatencyModel(args.llm_latency, seed=args.seed), args.llm_error_rate, seed=args.seed)
+        )
+        base_url, process = start_server(workdir, edible, openai_stub, args)
+        try:
+            results = asyncio.run(
+                drive(base_url, mix, args.concurrency, args.seconds, args.seed_sessions, args.timeout, args.seed)
+            )
+        finally:
+            process.terminate()
+            process.wait(timeout=10)
+        return {**report, **results, "upstreams": {"edible": edible.stats(), "openai": openai_stub.stats()}}
+
+
+def compare(baseline: dict, candidate: dict, max_regression: float, max_error_increase: float) -> tuple[list[str], bool]:
+    """Human-readable diff of two reports and whether the candidate regressed."""
+    lines = [f"{'scenario':<10} {'metric':<15} {'baseline':>10} {'candidate':>10} {'change':>8}"]
+    regressed = False
+    names = [*baseline["scenarios"], "overall"]
+    for name in names:
+        base = baseline["overall"] if name == "overall" else baseline["scenarios"].get(name)
+        cand = candidate["overall"] if name == "overall" else candidate["scenarios"].get(name)
+        if not base or not cand or not base["requests"] or not cand["requests"]:
+            continue
+        rows = [(f"{p}_ms", base["latency_ms"][p], cand["latency_ms"][p], True) for p in ("p50", "p95", "p99")]
+        rows.append(("throughput_rps", base["throughput_rps"], cand["throughput_rps"], False))
+        for metric, old, new, lower_is_better in rows:
+            change = (new - old) / old if old else 0.0
+            worse = change > max_regression if lower_is_better else change < -max_regression
+            flag = " !" if worse and metric != "p50_ms" else ""
+            regressed |= bool(flag)
+            lines.append(f"{name:<10} {metric:<15} {old:>10.2f} {new:>10.2f} {change:>+7.1%}{flag}")
+        error_delta = cand["error_rate"] - base["error_rate"]
+        flag = " !" if error_delta > max_error_increase else ""
+        regressed |= bool(flag)
+        lines.append(f"{name:<10} {'error_rate':<15} {base['error_rate']:>10.4f} {cand['error_rate']:>10.4f} "
+                     f"{error_delta:>+8.4f}{flag}")
+    return lines, regressed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run_cmd = sub.add_parser("run", help="Run a load test and write a JSON report")
+    run_cmd.add_argument("--concurrency", type=int, default=16)
+    run_cmd.add_argument("--seconds", type=float, default=20.0)
+    run_cmd.add_argument("--mix", default=DEFAULT_MIX, help=f"Scenario weights (default: {DEFAULT_MIX})")
+    run_cmd.add_argument("--edible-latency", default="lognormal:120,0.5", help="fixed:MS | uniform:LO-HI | lognormal:MEDIAN,SIGMA")
+    run_cmd.add_argument("--edible-error-rate", type=float, default=0.0)
+    run_cmd.add_argument("--llm-latency", default="lognormal:600,0.4")
+    run_cmd.add_argument("--llm-error-rate", type=float, default=0.0)
+    run_cmd.add_argument("--db-profile", default="sqlite-prod", choices=["dev", "sqlite-prod", "server-db"])
+    run_cmd.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    run_cmd.add_argument("--port", type=int, default=8199)
+    run_cmd.add_argument("--server-env", action="append", default=[], metavar="KEY=VALUE",
+                         help="Extra server settings, e.g. --server-env METRICS_ENABLED=true")
+    run_cmd.add_argument("--target", default=None, help="Drive an already running server instead")
+    run_cmd.add_argument("--seed-sessions", type=int, default=10)
+    run_cmd.add_argument("--timeout", type=float, default=60.0)
+    run_cmd.add_argument("--seed", type=int, default=7)
+    run_cmd.add_argument("--label", default="")
+    run_cmd.add_argument("--output", default=None, help="Write the report here as well as stdout")
+
+    cmp_cmd = sub.add_parser("compare", help="Compare two reports")
+    cmp_cmd.add_argument("baseline")
+    cmp_cmd.add_argument("candidate")
+    cmp_cmd.add_argument("--max-regression", type=float, default=0.10, help="Allowed relative p95/p99/throughput loss")
+    cmp_cmd.add_argument("--max-error-increase", type=float, default=0.01, help="Allowed absolute error-rate increase")
+
+    args = parser.parse_args()
+
+    if args.command == "run":
+        report = run(args)
+        text = json.dumps(report, indent=2)
+        if args.output:
+            os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+            with open(args.output, "w", encoding="utf-8") as f:
+                f.write(text + "\n")
+        print(text)
+    else:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        with open(args.candidate, encoding="utf-8") as f:
+            candidate = json.load(f)
+        lines, regressed = compare(baseline, candidate, args.max_regression, args.max_error_increase)
+        print("\n".join(lines))
+        sys.exit(1 if regressed else 0)
+
+
+if __name__ == "__main__":
+    main()
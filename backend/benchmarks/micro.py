@@ -0,0 +1,203 @@
+"""
+Microbenchmarks for the pure functions on the chat/search hot path.
+
+Every case runs one realistic unit of work (e.g. parsing a 500-product search
+page, curating against a 15-product catalog). Timing uses `timeit`: the loop
+count is calibrated so each repeat takes at least `--min-time` seconds, the
+garbage collector is off while timing, and the median of `--repeat` repeats
+is the reported figure (min and spread are kept for judging noise).
+
+Baselines are per machine: record one before a change, compare after. The
+committed `baselines/micro.json` is a reference run, not a target for other
+machines.
+
+Usage (from backend/):
+    python -m benchmarks.micro run                                  # print results
+    python -m benchmarks.micro run --save benchmarks/baselines/micro.json
+    python -m benchmarks.micro compare benchmarks/baselines/micro.json --threshold 0.15
+    python -m benchmarks.micro run --filter sanitize               # only matching cases
+"""
+import argparse
+import json
+import os
+import platform
+import re
+import statistics
+import sys
+import timeit
+from datetime import datetime, timezone
+from typing import Callable
+
+from app.cache import MemoryBackend, NamespacedCache
+from app.models import JSONList
+from app.schemas import EdibleProduct
+from app.search_responses import EncodedResponse
+from app.services.catalog_index import CatalogIndex
+from app.services.curation_service import build_intent_summary, extract_recommended_skus, sanitize_concierge_reply
+from app.services.edible_client import parse_edible_product
+from app.services.product_mentions import MentionMatcher, session_matcher, words
+from app.services.variants import collapse_variants
+from app.services.intent_service import parse_intent_response
+from benchmarks.synthetic import curation_reply, edible_products, intent_json, long_reply, raw_products
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baselines", "micro.json")
+
+
+def build_cases() -> dict[str, Callable[[], object]]:
+    """Case name -> zero-argument callable doing one unit of work."""
+    cases: dict[str, Callable[[], object]] = {}
+
+    for count in (50, 500):
+        raw = raw_products(count)
+        cases[f"parse_edible_product[{count}]"] = lambda raw=raw: [parse_edible_product(r) for r in raw]
+
+    catalog = edible_products(15)
+    reply = curation_reply(catalog)
+    long = long_reply(catalog, paragraphs=40)
+    unmatched = "\n".join(f"{p.name}: a lovely pick." for p in catalog[:5])
+    cases["extract_recommended_skus[15,reply]"] = lambda: extract_recommended_skus(reply, catalog)
+    cases["extract_recommended_skus[15,long]"] = lambda: extract_recommended_skus(long, catalog)
+    cases["extract_recommended_skus[15,names_only]"] = lambda: extract_recommended_skus(unmatched, catalog)
+
+    cases["sanitize_concierge_reply[reply]"] = lambda: sanitize_concierge_reply(reply)
+    cases["sanitize_concierge_reply[long]"] = lambda: sanitize_concierge_reply(long)
+
+    plain, fenced = intent_json(), intent_json(fenced=True)
+    cases["parse_intent_response[plain]"] = lambda: parse_intent_response(plain)
+    cases["parse_intent_response[fenced]"] = lambda: parse_intent_response(fenced)
+
+    intent = parse_intent_response(plain)
+    cases["build_intent_summary"] = lambda: build_intent_summary(intent)
+
+    for count in (72, 300):
+        candidates = edible_products(count)
+        cases[f"collapse_variants[{count}]"] = lambda c=candidates: collapse_variants(c)
+
+    index = CatalogIndex()
+    index.add(edible_products(2000))
+    cases["catalog_index_query[2000]"] = lambda: index.query(intent, 15)
+    names = MentionMatcher()
+    for product in edible_products(2000):
+        names.add(product.name, product)
+    names.build()
+    follow_up = words(f"tell me more about the {catalog[3].name.lower()} please")
+    cases["mention_find[2000 names]"] = lambda: names.find(follow_up)
+    vocabulary = set(follow_up)
+    cases["session_matcher[15]"] = lambda: session_matcher(catalog, vocabulary).find(follow_up)
+    page = edible_products(50, seed=11)
+    cases["catalog_index_add[50]"] = lambda: CatalogIndex().add(page)
+
+    store = NamespacedCache("product", EdibleProduct, 3600, backend=MemoryBackend(5000))
+    stored = edible_products(2000, seed=13)
+    store.set_many({p.sku: p for p in stored})
+    skus = [p.sku for p in stored[::40]]
+    cases["product_store_get_many[50]"] = lambda: store.get_many(skus)
+
+    search_response = EncodedResponse.from_products(catalog)
+    etag = search_response.etags["gzip"]
+    cases["search_response_encode[15]"] = lambda: EncodedResponse.from_products(catalog)
+    cases["search_response_serve[15,gzip]"] = lambda: search_response.response("gzip, deflate, br")
+    cases["search_response_serve[15,304]"] = lambda: search_response.response("gzip, deflate, br", etag)
+
+    column = JSONList()
+    for count in (3, 50):
+        values = [f"keyword-{i}" for i in range(count)]
+        encoded = column.process_bind_param(values, None)
+        cases[f"jsonlist_encode[{count}]"] = lambda v=values: column.process_bind_param(v, None)
+        cases[f"jsonlist_decode[{count}]"] = lambda e=encoded: column.process_result_value(e, None)
+
+    return cases
+
+
+def time_case(func: Callable[[], object], repeat: int, min_time: float) -> dict:
+    timer = timeit.Timer(func)
+    number = 1
+    while True:
+        if timer.timeit(number) >= min_time:
+            break
+        number *= 2
+    runs = [t / number * 1e6 for t in timer.repeat(repeat=repeat, number=number)]
+    median = statistics.median(runs)
+    return {
+        "median_us": round(median, 3),
+        "min_us": round(min(runs), 3),
+        "spread": round((max(runs) - min(runs)) / median, 3) if median else 0.0,
+        "loops": number,
+    }
+
+
+def run(pattern: str | None, repeat: int, min_time: float) -> dict:
+    results = {}
+    for name, func in build_cases().items():
+        if pattern and not re.search(pattern, name):
+            continue
+        results[name] = time_case(func, repeat, min_time)
+    return {
+        "recorded_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "machine": f"{platform.system()}-{platform.machine()}",
+        "repeat": repeat,
+        "min_time": min_time,
+        "results": results,
+    }
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> tuple[list[str], list[str]]:
+    """Comparison table and the names of cases slower than baseline by more than `threshold`."""
+    lines = [f"{'case':<42} {'baseline us':>12} {'current us':>12} {'change':>8}"]
+    regressions = []
+    for name, result in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            lines.append(f"{name:<42} {'-':>12} {result['median_us']:>12.3f}      new")
+            continue
+        change = result["median_us"] / base["median_us"] - 1 if base["median_us"] else 0.0
+        flag = ""
+        if change > threshold:
+            regressions.append(name)
+            flag = " !"
+        lines.append(f"{name:<42} {base['median_us']:>12.3f} {result['median_us']:>12.3f} {change:>+7.1%}{flag}")
+    return lines, regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name in ("run", "compare"):
+        cmd = sub.add_parser(name)
+        cmd.add_argument("--filter", default=None, help="Regex on case names")
+        cmd.add_argument("--repeat", type=int, default=7)
+        cmd.add_argument("--min-time", type=float, default=0.2, help="Minimum seconds per repeat")
+    sub.choices["run"].add_argument("--save", default=None, help="Write results as a baseline file")
+    sub.choices["compare"].add_argument("baseline", nargs="?", default=DEFAULT_BASELINE)
+    sub.choices["compare"].add_argument("--threshold", type=float, default=0.15, help="Allowed relative slowdown")
+    args = parser.parse_args()
+
+    if args.command == "compare" and not os.path.exists(args.baseline):
+        sys.exit(
+            f"No baseline at {args.baseline}. Record one on this machine first:\n"
+            f"    python -m benchmarks.micro run --save {args.baseline}"
+        )
+
+    current = run(args.filter, args.repeat, args.min_time)
+
+    if args.command == "run":
+        text = json.dumps(current, indent=2)
+        if args.save:
+            os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+            with open(args.save, "w", encoding="utf-8") as f:
+                f.write(text + "\n")
+        print(text)
+        return
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    lines, regressions = compare(baseline, current, args.threshold)
+    print("\n".join(lines))
+    if regressions:
+        print(f"\n{len(regressions)} case(s) regressed by more than {args.threshold:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
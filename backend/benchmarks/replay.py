@@ -0,0 +1,232 @@
+"""
+Replay recorded chat traffic (see app/traffic.py) against a fresh build.
+
+Recorded upstream responses are served from local stubs: LLM calls are matched
+by stage and a fingerprint of the anonymized messages, falling back to the
+next recorded response for the stage when prompts changed; Edible searches
+are matched by keyword. Upstream latency and failures are reproduced as
+recorded (or dropped with `--upstream-latency none`). Requests are sent at
+their recorded offsets divided by `--speed`, and turns of one session are
+replayed in order on the same new session; a first turn, sent without a
+session id, is linked to its session by the session id recorded from its
+response.
+
+The report has the same shape as benchmarks.load_test, so runs of two builds
+on the same trace file can be diffed with `load_test compare`. It also
+includes the latency recorded in production for the same requests.
+
+Usage (from backend/):
+    python -m benchmarks.replay traces/chat-traffic.ndjson --speed 1 --output runs/replay-base.json
+    python -m benchmarks.replay traces/chat-traffic.ndjson --speed 4 --limit 2000 --output runs/replay-new.json
+    python -m benchmarks.load_test compare runs/replay-base.json runs/replay-new.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import ExitStack
+from datetime import datetime, timezone
+
+import httpx
+
+from app.traffic import messages_fingerprint
+from benchmarks.load_test import start_server, summarize
+from benchmarks.stubs import EdibleStub, OpenAIStub
+
+
+def load_traces(path: str, limit: int | None = None) -> list[dict]:
+    traces = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                traces.append(json.loads(line))
+    traces.sort(key=lambda t: t["ts"])
+    return traces[:limit] if limit else traces
+
+
+class RecordedResponses:
+    """Recorded upstream calls, looked up by key with a FIFO fallback."""
+
+    def __init__(self):
+        self._by_key: dict[str, deque] = defaultdict(deque)
+        self._by_group: dict[str, deque] = defaultdict(deque)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.fallbacks = 0
+        self.misses = 0
+
+    def add(self, key: str, group: str, call: dict) -> None:
+        self._by_key[key].append(call)
+        self._by_group[group].append(call)
+
+    def take(self, key: str, group: str) -> dict | None:
+        # The last recorded call for a key is reused, so repeated keys never run dry
+        with self._lock:
+            for index, counter in ((self._by_key.get(key), "hits"), (self._by_group.get(group), "fallbacks")):
+                if index:
+                    setattr(self, counter, getattr(self, counter) + 1)
+                    return index.popleft() if len(index) > 1 else index[0]
+            self.misses += 1
+            return None
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "fallbacks": self.fallbacks, "misses": self.misses}
+
+
+def _respond(call: dict | None, default, latency_scale: float) -> tuple[int, object]:
+    if call is None:
+        return default
+    time.sleep(call["latency_ms"] * latency_scale / 1000)
+    if call["status"] != 200 or call["response"] is None:
+        return call["status"], {"error": {"message": "recorded failure", "type": "server_error"}}
+    return 200, call["response"]
+
+
+class ReplayEdibleStub(EdibleStub):
+    def __init__(self, recorded: RecordedResponses, latency_scale: float):
+        super().__init__()
+        self.recorded = recorded
+        self.latency_scale = latency_scale
+
+    def respond(self, path, payload):
+        keyword = str(payload["keyword"])
+        call = self.recorded.take(f"edible:{keyword}", "edible")
+        return _respond(call, super().respond(path, payload), self.latency_scale)
+
+
+class ReplayOpenAIStub(OpenAIStub):
+    def __init__(self, recorded: RecordedResponses, latency_scale: float):
+        super().__init__()
+        self.recorded = recorded
+        self.latency_scale = latency_scale
+
+    def respond(self, path, payload):
+        messages = payload["messages"]
+        system = next((m["content"] for m in messages if m["role"] == "system"), "")
+        stage = "intent" if "intent extraction" in system else "curation"
+        call = self.recorded.take(f"openai:{messages_fingerprint(messages)}", f"openai:{stage}")
+        return _respond(call, super().respond(path, payload), self.latency_scale)
+
+
+def index_upstreams(traces: list[dict]) -> RecordedResponses:
+    recorded = RecordedResponses()
+    for trace in traces:
+        for call in trace["upstream"]:
+            if call["upstream"] == "openai":
+                recorded.add(f"openai:{call['key']['messages']}", f"openai:{call['key']['stage']}", call)
+            elif call["upstream"] == "edible":
+                recorded.add(f"edible:{call['key']['keyword']}", "edible", call)
+    return recorded
+
+
+async def replay(base_url: str, traces: list[dict], speed: float, timeout: float) -> dict:
+    latencies: list[float] = []
+    statuses: dict[str, int] = {}
+    errors = 0
+    session_map: dict[str, str] = {}
+    session_locks: dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+    origin = traces[0]["ts"]
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=httpx.Limits(max_connections=None)) as client:
+        started = time.perf_counter()
+
+        async def send(trace: dict) -> None:
+            nonlocal errors
+            delay = (trace["ts"] - origin) / speed - (time.perf_counter() - started)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            request = trace["request"]
+            recorded_session = request.get("session_id") or trace.get("session_id")
+            async with session_locks[recorded_session or id(trace)]:
+                body = {**request, "session_id": session_map.get(recorded_session)}
+                start = time.perf_counter()
+                try:
+                    res = await client.post("/api/chat", json=body)
+                    status = str(res.status_code)
+                    if res.status_code == 200 and recorded_session:
+                        session_map[recorded_session] = res.json()["session_id"]
+                except httpx.HTTPError as exc:
+                    status = type(exc).__name__
+            latencies.append((time.perf_counter() - start) * 1000)
+            statuses[status] = statuses.get(status, 0) + 1
+            if not status.isdigit() or int(status) >= 400:
+                errors += 1
+
+        await asyncio.gather(*(send(trace) for trace in traces))
+        elapsed = time.perf_counter() - started
+
+    chat = summarize(latencies, errors, statuses, elapsed)
+    return {"elapsed_seconds": round(elapsed, 2), "scenarios": {"chat": chat}, "overall": chat}
+
+
+def recorded_summary(traces: list[dict]) -> dict:
+    span_seconds = max(traces[-1]["ts"] - traces[0]["ts"], 1e-3)
+    statuses: dict[str, int] = {}
+    for trace in traces:
+        statuses[str(trace["status"])] = statuses.get(str(trace["status"]), 0) + 1
+    errors = sum(1 for trace in traces if trace["status"] >= 400)
+    return summarize([trace["duration_ms"] for trace in traces], errors, statuses, span_seconds)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("traces", help="NDJSON trace file written by the traffic recorder")
+    parser.add_argument("--speed", type=float, default=1.0, help="Replay N times faster than recorded")
+    parser.add_argument("--limit", type=int, default=None, help="Replay only the first N requests")
+    parser.add_argument("--upstream-latency", choices=["recorded", "none"], default="recorded")
+    parser.add_argument("--db-profile", default="sqlite-prod", choices=["dev", "sqlite-prod", "server-db"])
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--port", type=int, default=8198)
+    parser.add_argument("--server-env", action="append", default=[], metavar="KEY=VALUE")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--label", default="")
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    traces = load_traces(args.traces, args.limit)
+    if not traces:
+        parser.error(f"No traces in {args.traces}")
+    recorded = index_upstreams(traces)
+    latency_scale = 1.0 if args.upstream_latency == "recorded" else 0.0
+
+    with ExitStack() as stack:
+        workdir = stack.enter_context(tempfile.TemporaryDirectory())
+        edible = stack.enter_context(ReplayEdibleStub(recorded, latency_scale))
+        openai_stub = stack.enter_context(ReplayOpenAIStub(recorded, latency_scale))
+        base_url, process = start_server(workdir, edible, openai_stub, args)
+        try:
+            results = asyncio.run(replay(base_url, traces, args.speed, args.timeout))
+        finally:
+            process.terminate()
+            process.wait(timeout=10)
+
+    report = {
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "label": args.label,
+        "config": {
+            "traces": os.path.abspath(args.traces),
+            "requests": len(traces),
+            "speed": args.speed,
+            "upstream_latency": args.upstream_latency,
+            "db_profile": args.db_profile,
+            "server_env": args.server_env,
+        },
+        **results,
+        "recorded": recorded_summary(traces),
+        "upstream_matching": recorded.stats(),
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
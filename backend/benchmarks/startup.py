@@ -0,0 +1,114 @@
+"""
+Startup benchmark: import time and cold-start latency, with and without warm-up.
+
+- `import`: `import app.main` in fresh interpreters (median and min over
+  `--import-runs`).
+- `boot`: launch uvicorn against the local stubs (benchmarks.stubs) and measure
+  the time until /health answers ("ready"), then the latency of the first and
+  second chat turn. Runs once per mode: `cold` (WARMUP_ENABLED=false) and
+  `warm` (warm-up on, with the stub catalog's keywords preloaded).
+
+A good warm-up moves cost from `first_request_ms` into `ready_ms`, so the
+first user on a new worker sees the same latency as the second.
+
+Usage (from backend/):
+    python -m benchmarks.startup --output runs/startup.json
+    python -m benchmarks.startup --import-runs 10 --boot-runs 3 --edible-latency fixed:120
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import ExitStack
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import httpx
+
+from benchmarks.load_test import start_server
+from benchmarks.stubs import EdibleStub, LatencyModel, OpenAIStub
+
+# Keywords the OpenAI stub's intents draw from (benchmarks.synthetic.intent_json)
+STUB_KEYWORDS = "birthday,fruit,chocolate,cookies,sympathy,flowers"
+IMPORT_SNIPPET = "import time; t = time.perf_counter(); import app.main; print(time.perf_counter() - t)"
+
+
+def measure_import(runs: int) -> dict:
+    env = {**os.environ, "OPENAI_API_KEY": os.environ.get("OPENAI_API_KEY", "stub"), "LOG_LEVEL": "WARNING"}
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", IMPORT_SNIPPET], env=env, capture_output=True, text=True, check=True)
+        samples.append(float(out.stdout.strip().splitlines()[-1]) * 1000)
+    return {
+        "runs": runs,
+        "median_ms": round(statistics.median(samples), 1),
+        "min_ms": round(min(samples), 1),
+    }
+
+
+def measure_boot(edible: EdibleStub, openai_stub: OpenAIStub, warm: bool, port: int) -> dict:
+    server_env = [f"WARMUP_ENABLED={str(warm).lower()}", "LOG_LEVEL=WARNING"]
+    if warm:
+        server_env.append(f"WARMUP_KEYWORDS={STUB_KEYWORDS}")
+    args = SimpleNamespace(db_profile="sqlite-prod", server_env=server_env, port=port, workers=1)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        start = time.perf_counter()
+        base_url, process = start_server(workdir, edible, openai_stub, args)
+        ready_ms = (time.perf_counter() - start) * 1000
+        try:
+            turns = []
+            with httpx.Client(base_url=base_url, timeout=60.0) as client:
+                for message in ("Birthday gift for my mom", "Something with chocolate for a coworker"):
+                    turn_start = time.perf_counter()
+                    client.post("/api/chat", json={"message": message, "history": []}).raise_for_status()
+                    turns.append((time.perf_counter() - turn_start) * 1000)
+        finally:
+            process.terminate()
+            process.wait(timeout=10)
+    return {"ready_ms": ready_ms, "first_request_ms": turns[0], "second_request_ms": turns[1]}
+
+
+def summarize_boots(boots: list[dict]) -> dict:
+    return {key: round(statistics.median(b[key] for b in boots), 1) for key in boots[0]}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--import-runs", type=int, default=5)
+    parser.add_argument("--boot-runs", type=int, default=1)
+    parser.add_argument("--edible-latency", default="fixed:120")
+    parser.add_argument("--llm-latency", default="fixed:300")
+    parser.add_argument("--port", type=int, default=8197)
+    parser.add_argument("--label", default="")
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    report = {
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "label": args.label,
+        "config": vars(args),
+        "import": measure_import(args.import_runs),
+        "boot": {},
+    }
+    with ExitStack() as stack:
+        edible = stack.enter_context(EdibleStub(LatencyModel(args.edible_latency)))
+        openai_stub = stack.enter_context(OpenAIStub(LatencyModel(args.llm_latency)))
+        for mode in ("cold", "warm"):
+            boots = [measure_boot(edible, openai_stub, mode == "warm", args.port) for _ in range(args.boot_runs)]
+            report["boot"][mode] = summarize_boots(boots)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
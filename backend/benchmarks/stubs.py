@@ -0,0 +1,395 @@
+"""
+Local stand-ins for the upstream services, for load tests without network.
+
+- `EdibleStub` answers the Edible search API (`POST` with `{"keyword": ...}`)
+  with a deterministic synthetic catalog per keyword.
+- `OpenAIStub` answers `POST /v1/chat/completions` in the OpenAI wire format:
+  intent-stage calls get intent JSON, curation-stage calls get a reply that
+  picks SKUs from the catalog in the prompt (one section per recipient for
+  batch gift-plan curation). Token usage is approximated, and cached prompt
+  tokens follow a provider-style prefix cache (`PrefixCacheModel`).
+
+Both run a `ThreadingHTTPServer` on a background thread, sleep according to a
+`LatencyModel` and fail a configurable fraction of requests.
+
+`RedisStub` is an in-memory stand-in for a Redis server (the RESP commands
+the shared cache uses), for testing `CACHE_BACKEND=redis` without Redis.
+
+Usage (from backend/), e.g. to point a dev server at them:
+    python -m benchmarks.stubs --edible-latency lognormal:120,0.5 --llm-latency lognormal:800,0.4
+"""
+import argparse
+import hashlib
+import json
+import math
+import random
+import re
+import socketserver
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from benchmarks.synthetic import REASONS, intent_json, raw_products
+from app.prompts.product_curator import CLOSING_LINE
+
+
+class LatencyModel:
+    """Per-request delay in milliseconds.
+
+    Specs: `fixed:50`, `uniform:20-80`, `lognormal:<median>,<sigma>`, or `0` for none.
+    """
+
+    def __init__(self, spec: str = "0", seed: int | None = None):
+        self.spec = spec
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        kind, _, args = spec.partition(":")
+        if kind in ("0", "none", ""):
+            self._sample = lambda: 0.0
+        elif kind == "fixed":
+            value = float(args)
+            self._sample = lambda: value
+        elif kind == "uniform":
+            low, high = (float(x) for x in args.split("-"))
+            self._sample = lambda: self._rng.uniform(low, high)
+        elif kind == "lognormal":
+            median, sigma = (float(x) for x in args.split(","))
+            mu = math.log(median)
+            self._sample = lambda: self._rng.lognormvariate(mu, sigma)
+        else:
+            raise ValueError(f"Unknown latency spec: {spec!r}")
+
+    def sample_ms(self) -> float:
+        with self._lock:
+            return self._sample()
+
+
+class PrefixCacheModel:
+    """
+    Provider-style prompt prefix cache, for measuring prompt layouts offline.
+
+    Like OpenAI's automatic caching: prompts of at least MIN_TOKENS are cached
+    in INCREMENT-token steps, and a request is billed as cached for the
+    longest step-aligned prefix an earlier request already had. Messages are
+    serialized in order and tokens approximated as CHARS_PER_TOKEN chars.
+    """
+
+    MIN_TOKENS = 1024
+    INCREMENT = 128
+    CHARS_PER_TOKEN = 4
+
+    def __init__(self):
+        self._seen: set[bytes] = set()
+        self._lock = threading.Lock()
+
+    def lookup(self, messages: list[dict]) -> tuple[int, int]:
+        """(prompt_tokens, cached_tokens) for a request, remembering its prefixes."""
+        text = "".join(f"<{m['role']}>{m['content']}" for m in messages).encode()
+        prompt_tokens = len(text) // self.CHARS_PER_TOKEN
+        digest = hashlib.blake2b(digest_size=16)
+        done = 0
+        cached = 0
+        missed = False
+        with self._lock:
+            for tokens in range(self.MIN_TOKENS, prompt_tokens + 1, self.INCREMENT):
+                end = tokens * self.CHARS_PER_TOKEN
+                digest.update(text[done:end])
+                done = end
+                key = digest.digest()
+                if not missed and key in self._seen:
+                    cached = tokens
+                else:
+                    missed = True
+                    self._seen.add(key)
+        return prompt_tokens, cached
+
+
+class _StubServer:
+    """Threaded HTTP server with injected latency and errors."""
+
+    name = "stub"
+
+    def __init__(self, latency: LatencyModel | None = None, error_rate: float = 0.0, port: int = 0, seed: int = 7):
+        self.latency = latency or LatencyModel()
+        self.error_rate = error_rate
+        self.requests = 0
+        self.errors = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                status, payload = stub._handle(self.path, body)
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name=f"{self.name}-stub", daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "_StubServer":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def stats(self) -> dict:
+        return {"requests": self.requests, "injected_errors": self.errors, "latency": self.latency.spec}
+
+    def _handle(self, path: str, body: bytes) -> tuple[int, dict]:
+        time.sleep(self.latency.sample_ms() / 1000)
+        with self._lock:
+            self.requests += 1
+            fail = self._rng.random() < self.error_rate
+            if fail:
+                self.errors += 1
+        if fail:
+            return 503, {"error": {"message": "injected failure", "type": "server_error"}}
+        try:
+            return self.respond(path, json.loads(body or b"{}"))
+        except (ValueError, KeyError) as e:
+            return 400, {"error": {"message": str(e), "type": "invalid_request_error"}}
+
+    def respond(self, path: str, payload: dict) -> tuple[int, dict]:
+        raise NotImplementedError
+
+
+class EdibleStub(_StubServer):
+    """Edible search API: a deterministic catalog page per keyword."""
+
+    name = "edible"
+
+    def __init__(self, *args, products_per_keyword: int = 24, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.products_per_keyword = products_per_keyword
+
+    @property
+    def search_url(self) -> str:
+        return f"{self.url}/api/search/"
+
+    def respond(self, path, payload):
+        keyword = str(payload["keyword"]).lower()
+        return 200, raw_products(self.products_per_keyword, seed=zlib.crc32(keyword.encode()))
+
+
+SKU_IN_CATALOG = re.compile(r'"sku":\s*"([^"]+)",\s*"name":\s*"([^"]+)"')
+RECIPIENT_LINE = re.compile(r"^- id: (\S+) \|.*\| candidates: (.+)$", re.MULTILINE)
+
+
+class OpenAIStub(_StubServer):
+    """OpenAI-compatible chat completions for the intent and curation stages."""
+
+    name = "openai"
+
+    def __init__(self, *args, prefix_cache: PrefixCacheModel | None = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prefix_cache = prefix_cache or PrefixCacheModel()
+
+    @property
+    def base_url(self) -> str:
+        return f"{self.url}/v1"
+
+    def respond(self, path, payload):
+        if not path.rstrip("/").endswith("/chat/completions"):
+            return 404, {"error": {"message": f"Unknown path {path}", "type": "invalid_request_error"}}
+        messages = payload["messages"]
+        system = next((m["content"] for m in messages if m["role"] == "system"), "")
+        last_user = next((m["content"] for m in reversed(messages) if m["role"] == "user"), "")
+        seed = zlib.crc32(last_user.encode())
+
+        if "intent extraction" in system:
+            content = intent_json(seed=seed)
+        elif "RECIPIENT <id>" in system:
+            rng = random.Random(seed)
+            names = dict(SKU_IN_CATALOG.findall(last_user))
+            lines = []
+            for recipient_id, candidates in RECIPIENT_LINE.findall(last_user):
+                lines.append(f"RECIPIENT {recipient_id}")
+                for sku in [c.strip() for c in candidates.split(",")][:2]:
+                    lines.append(f"{names.get(sku, sku)} (SKU: {sku}): This is {rng.choice(REASONS)}.")
+            content = "\n".join(lines)
+        else:
+            rng = random.Random(seed)
+            picks = SKU_IN_CATALOG.findall(last_user)[:5]
+            lines = ["Here are a few options that fit what you're looking for:"]
+            lines += [f"{name} (SKU: {sku}): This is {rng.choice(REASONS)}." for sku, name in picks]
+            lines.append(CLOSING_LINE)
+            content = "\n".join(lines)
+
+        prompt_tokens, cached_tokens = self.prefix_cache.lookup(messages)
+        completion_tokens = len(content) // 4
+        return 200, {
+            "id": f"chatcmpl-stub{self.requests}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": payload.get("model", "stub"),
+            "choices": [
+                {"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}
+            ],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+                "prompt_tokens_details": {"cached_tokens": cached_tokens},
+            },
+        }
+
+
+class RedisStub:
+    """In-memory Redis stand-in: PING, AUTH, SELECT, GET, SET [EX|PX] [NX], DEL, DBSIZE, FLUSHDB."""
+
+    def __init__(self, port: int = 0, password: str | None = None):
+        self.password = password
+        self.commands = 0
+        self._data: dict[bytes, tuple[bytes, float | None]] = {}
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                authed = stub.password is None
+                while True:
+                    args = stub._read_command(self.rfile)
+                    if args is None:
+                        return
+                    name = args[0].upper()
+                    if name == b"AUTH":
+                        authed = args[-1].decode() == stub.password
+                        reply = b"+OK\r\n" if authed else b"-WRONGPASS invalid password\r\n"
+                    elif not authed:
+                        reply = b"-NOAUTH Authentication required.\r\n"
+                    else:
+                        reply = stub._execute(name, args[1:])
+                    self.wfile.write(reply)
+
+        self._server = socketserver.ThreadingTCPServer(("127.0.0.1", port), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name="redis-stub", daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        auth = f":{self.password}@" if self.password else ""
+        return f"redis://{auth}{host}:{port}/0"
+
+    def start(self) -> "RedisStub":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    @staticmethod
+    def _read_command(rfile) -> list[bytes] | None:
+        header = rfile.readline()
+        if not header.startswith(b"*"):
+            return None
+        args = []
+        for _ in range(int(header[1:])):
+            length = int(rfile.readline()[1:])
+            args.append(rfile.read(length + 2)[:-2])
+        return args
+
+    @staticmethod
+    def _bulk(value: bytes | None) -> bytes:
+        return b"$-1\r\n" if value is None else b"$%d\r\n%s\r\n" % (len(value), value)
+
+    def _execute(self, name: bytes, args: list[bytes]) -> bytes:
+        now = time.time()
+        with self._lock:
+            self.commands += 1
+            if name == b"PING":
+                return b"+PONG\r\n"
+            if name == b"SELECT":
+                return b"+OK\r\n"
+            if name == b"GET":
+                value, expires_at = self._data.get(args[0], (None, None))
+                if expires_at is not None and expires_at <= now:
+                    del self._data[args[0]]
+                    value = None
+                return self._bulk(value)
+            if name == b"MGET":
+                values = []
+                for key in args:
+                    value, expires_at = self._data.get(key, (None, None))
+                    values.append(None if expires_at is not None and expires_at <= now else value)
+                return b"*%d\r\n" % len(values) + b"".join(self._bulk(v) for v in values)
+            if name == b"SET":
+                expires_at = None
+                options = [a.upper() for a in args[2:]]
+                if b"PX" in options:
+                    expires_at = now + int(args[2 + options.index(b"PX") + 1]) / 1000
+                elif b"EX" in options:
+                    expires_at = now + int(args[2 + options.index(b"EX") + 1])
+                current = self._data.get(args[0])
+                if b"NX" in options and current and (current[1] is None or current[1] > now):
+                    return b"$-1\r\n"
+                self._data[args[0]] = (args[1], expires_at)
+                return b"+OK\r\n"
+            if name == b"DEL":
+                removed = sum(1 for key in args if self._data.pop(key, None) is not None)
+                return b":%d\r\n" % removed
+            if name == b"DBSIZE":
+                return b":%d\r\n" % len(self._data)
+            if name == b"FLUSHDB":
+                self._data.clear()
+                return b"+OK\r\n"
+        return b"-ERR unknown command '%s'\r\n" % name
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--edible-port", type=int, default=8101)
+    parser.add_argument("--openai-port", type=int, default=8102)
+    parser.add_argument("--edible-latency", default="lognormal:120,0.5")
+    parser.add_argument("--llm-latency", default="lognormal:800,0.4")
+    parser.add_argument("--edible-error-rate", type=float, default=0.0)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    edible = EdibleStub(LatencyModel(args.edible_latency), args.edible_error_rate, port=args.edible_port)
+    openai_stub = OpenAIStub(LatencyModel(args.llm_latency), args.llm_error_rate, port=args.openai_port)
+    with edible, openai_stub:
+        print(f"EDIBLE_API_URL={edible.search_url}")
+        print(f"OPENAI_BASE_URL={openai_stub.base_url}")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Deterministic synthetic data shaped like Edible API payloads and LLM replies."""
+import json
+import random
+
+from app.prompts.product_curator import CLOSING_LINE
+
+PRODUCT_BASES = [
+    "Fresh Fruit Bouquet",
+    "Chocolate Dipped Strawberries",
+    "Berry Chic Bouquet",
+    "Happy Birthday Box",
+    "Sympathy Fruit Basket",
+    "Deluxe Party Platter",
+    "Celebration Cookie Tin",
+    "Sweet Sunshine Bundle",
+    "Pineapple Daisy Arrangement",
+    "Chocolate Covered Pretzels",
+    "Thank You Treats Box",
+    "Corporate Snack Crate",
+]
+VARIANT_SUFFIXES = ["", " - Large", " - 12 Count", " with Balloons", " Deluxe", " - Small", " Gift Set"]
+OCCASIONS = ["Birthday", "Sympathy", "Anniversary", "Thank You", "Get Well", "Congratulations"]
+CATEGORIES = ["Fruit Arrangements", "Chocolate Dipped Fruit", "Gift Baskets", "Cookies", "Flowers", "Kosher"]
+REASONS = [
+    "a bright, cheerful pick that feels like a celebration in a box",
+    "a comforting gesture that lets them know you're thinking of them",
+    "perfect for sharing with the whole office",
+    "a classic crowd-pleaser with fresh fruit and chocolate",
+    "a thoughtful choice for someone who loves something sweet",
+]
+
+
+def raw_products(count: int, seed: int = 7) -> list[dict]:
+    """Raw product dicts in the shape returned by the Edible search API."""
+    rng = random.Random(seed)
+    products = []
+    for i in range(count):
+        base = PRODUCT_BASES[i % len(PRODUCT_BASES)]
+        name = base + rng.choice(VARIANT_SUFFIXES)
+        price = round(rng.uniform(19.99, 149.99), 2)
+        products.append(
+            {
+                "catalogCode": f"{1000 + i}-{rng.choice(['sm', 'lg', 'std', '12ct'])}",
+                "number": str(1000 + i),
+                "id": i,
+                "name": name,
+                "minPrice": price,
+                "maxPrice": round(price + rng.uniform(0, 40), 2),
+                "image": f"https://resources.ediblearrangements.com/resources/en-us/i/a/{1000 + i}.jpg",
+                "thumbnail": f"https://resources.ediblearrangements.com/resources/en-us/i/t/{1000 + i}.jpg",
+                "url": f"{name.lower().replace(' ', '-')}-{1000 + i}",
+                "description": f"{name}: {rng.choice(REASONS).capitalize()}. Hand-crafted with fresh fruit. " * 2,
+                "occasion": rng.choice(OCCASIONS),
+                "category": ", ".join(["All Products"] + rng.sample(CATEGORIES, 3)),
+                "promo": rng.random() < 0.2,
+            }
+        )
+    return products
+
+
+def edible_products(count: int, seed: int = 7):
+    """Parsed `EdibleProduct` models built from `raw_products`."""
+    from app.services.edible_client import parse_edible_product
+
+    return [p for p in (parse_edible_product(raw) for raw in raw_products(count, seed)) if p]
+
+
+def curation_reply(products, picks: int = 5, seed: int = 7) -> str:
+    """A curation-stage reply in the format the curator prompt asks for."""
+    rng = random.Random(seed)
+    lines = ["Here are a few options that fit what you're looking for:"]
+    for product in rng.sample(list(products), min(picks, len(products))):
+        lines.append(f"{product.name} (SKU: {product.sku}): This is {rng.choice(REASONS)}.")
+    lines.append(CLOSING_LINE)
+    return "\n".join(lines)
+
+
+def long_reply(products, paragraphs: int = 20, seed: int = 7) -> str:
+    """A long, markdown-heavy reply for sanitizer worst cases."""
+    rng = random.Random(seed)
+    lines = []
+    for i in range(paragraphs):
+        product = products[i % len(products)]
+        lines.append(f"{i + 1}. **{product.name} (SKU: {product.sku})** - *{rng.choice(REASONS)}*.")
+        lines.append(f"- {rng.choice(REASONS)}")
+    lines.append(CLOSING_LINE)
+    return "\n".join(lines)
+
+
+def intent_json(seed: int = 7, fenced: bool = False) -> str:
+    """An intent-extraction model response."""
+    rng = random.Random(seed)
+    body = json.dumps(
+        {
+            "occasion": rng.choice(["birthday", "sympathy", "anniversary", "corporate", "thank_you", "graduation"]),
+            "urgency": rng.choice(["today", "this_week", "flexible", None]),
+            "recipient": rng.choice(["my mom", "a coworker", "my best friend", None]),
+            "budget": rng.choice(["low", "mid", "high", None]),
+            "dietary": rng.sample(["vegan", "nut-free", "kosher", "gluten-free"], rng.randint(0, 2)),
+            "keywords": rng.sample(["birthday", "fruit", "chocolate", "cookies", "sympathy", "flowers"], 3),
+            "needs_clarification": False,
+            "clarifying_question": None,
+            "confidence": round(rng.uniform(0.5, 0.95), 2),
+        },
+        indent=2,
+    )
+    return f"```json\n{body}\n```" if fenced else body
@@ -0,0 +1,152 @@
+"""
+Maintenance for compressed conversation storage.
+
+Usage (from backend/):
+    python -m scripts.conversation_dict train --sample 5000       # train + activate a new dictionary
+    python -m scripts.conversation_dict report --sample 2000      # storage ratio + encode/decode cost
+    python -m scripts.conversation_dict compress-existing         # rewrite rows with the active dictionary
+    python -m scripts.conversation_dict decompress-existing       # back to plain UTF-8 (before downgrading)
+"""
+import argparse
+import json
+import time
+
+import sqlalchemy as sa
+
+from app.compression import (
+    HEADER_SIZE,
+    active_dictionary_id,
+    compress_text,
+    decompress_value,
+    get_dictionaries,
+    is_compressed,
+    save_dictionary,
+    train_dictionary,
+)
+from app.database import SessionLocal
+
+# Raw view of the table, bypassing the CompressedText type decorator.
+conversations = sa.table(
+    "conversations",
+    sa.column("id", sa.String),
+    sa.column("role", sa.String),
+    sa.column("content", sa.LargeBinary),
+    sa.column("created_at", sa.DateTime),
+)
+
+
+def load_samples(limit: int, role: str = "assistant") -> list[str]:
+    db = SessionLocal()
+    try:
+        rows = db.execute(
+            sa.select(conversations.c.content)
+            .where(conversations.c.role == role)
+            .order_by(conversations.c.created_at.desc())
+            .limit(limit)
+        ).scalars()
+        return [decompress_value(value) for value in rows]
+    finally:
+        db.close()
+
+
+def measure(samples: list[str], dict_id: int) -> dict:
+    """Storage ratio and per-message encode/decode cost for one dictionary."""
+    raw_bytes = sum(len(s.encode("utf-8")) for s in samples)
+
+    t0 = time.perf_counter()
+    packed = [compress_text(s, dict_id=dict_id) for s in samples]
+    encode_seconds = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for value in packed:
+        decompress_value(value)
+    decode_seconds = time.perf_counter() - t0
+
+    stored_bytes = sum(len(p) for p in packed)
+    count = max(len(samples), 1)
+    return {
+        "dict_id": dict_id,
+        "messages": len(samples),
+        "raw_bytes": raw_bytes,
+        "stored_bytes": stored_bytes,
+        "ratio": round(raw_bytes / stored_bytes, 2) if stored_bytes else None,
+        "encode_us_per_message": round(encode_seconds / count * 1e6, 2),
+        "decode_us_per_message": round(decode_seconds / count * 1e6, 2),
+    }
+
+
+def rewrite_rows(compress: bool, batch_size: int) -> int:
+    """Rewrite stored bodies in id-ordered batches; returns the number of rows changed."""
+    target_id = active_dictionary_id()
+    changed = 0
+    last_id = ""
+    while True:
+        db = SessionLocal()
+        try:
+            batch = db.execute(
+                sa.select(conversations.c.id, conversations.c.content)
+                .where(conversations.c.id > last_id)
+                .order_by(conversations.c.id)
+                .limit(batch_size)
+            ).all()
+            if not batch:
+                return changed
+
+            updates = []
+            for row_id, value in batch:
+                if compress and is_compressed(value) and bytes(value)[HEADER_SIZE - 1] == target_id:
+                    continue
+                text = decompress_value(value)
+                new_value = compress_text(text, dict_id=target_id) if compress else text.encode("utf-8")
+                if isinstance(value, bytes) and value == new_value:
+                    continue
+                updates.append({"row_id": row_id, "content": new_value})
+
+            if updates:
+                db.execute(
+                    conversations.update()
+                    .where(conversations.c.id == sa.bindparam("row_id"))
+                    .values(content=sa.bindparam("content")),
+                    updates,
+                )
+                db.commit()
+                changed += len(updates)
+            last_id = batch[-1][0]
+        finally:
+            db.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    train = sub.add_parser("train", help="Train a new dictionary from recent assistant replies")
+    train.add_argument("--sample", type=int, default=5000)
+    train.add_argument("--size", type=int, default=16384, help="Dictionary size in bytes")
+
+    report = sub.add_parser("report", help="Compare dictionaries on recent assistant replies")
+    report.add_argument("--sample", type=int, default=2000)
+
+    for name in ("compress-existing", "decompress-existing"):
+        cmd = sub.add_parser(name)
+        cmd.add_argument("--batch-size", type=int, default=500)
+
+    args = parser.parse_args()
+
+    if args.command == "train":
+        samples = load_samples(args.sample)
+        if len(samples) < 10:
+            parser.error(f"Need at least 10 assistant messages to train, found {len(samples)}")
+        previous_id = active_dictionary_id()
+        dict_id = save_dictionary(train_dictionary(samples, size=args.size))
+        print(json.dumps({"trained": measure(samples, dict_id), "previous": measure(samples, previous_id)}, indent=2))
+    elif args.command == "report":
+        samples = load_samples(args.sample)
+        print(json.dumps([measure(samples, dict_id) for dict_id in sorted(get_dictionaries())], indent=2))
+    else:
+        changed = rewrite_rows(compress=args.command == "compress-existing", batch_size=args.batch_size)
+        print(f"Rewrote {changed} conversation rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Catalog cache prewarm from recent intent logs (see app/prewarm.py).
+
+Usage (from backend/):
+    python -m scripts.prewarm run                                   # prewarm now with the configured settings
+    python -m scripts.prewarm backtest --days 7 --top-n 50          # hourly coverage over the last 7 days
+    python -m scripts.prewarm backtest --at 2025-12-01T11:30 --window-hours 48
+
+`run` is meant for cron when workers share a cache backend (sqlite/redis);
+with the in-process backend use PREWARM_SCHEDULE in the app instead. `backtest`
+replays history: for each hour it warms the top keywords of the preceding
+window and reports the share of the next hour's keyword requests covered.
+"""
+import argparse
+import json
+from datetime import datetime, timedelta
+
+from app.config import get_settings
+from app.database import ReadSessionLocal
+from app.prewarm import backtest_coverage, run_prewarm
+
+
+def backtest(at_times: list[datetime], window_hours: float, top_n: int) -> dict:
+    db = ReadSessionLocal()
+    try:
+        hours = [backtest_coverage(db, at, window_hours, top_n) for at in at_times]
+    finally:
+        db.close()
+    requests = sum(h["requests"] for h in hours)
+    warm = sum(h["warm_requests"] for h in hours)
+    return {
+        "window_hours": window_hours,
+        "top_n": top_n,
+        "hours": len(hours),
+        "requests": requests,
+        "warm_requests": warm,
+        "coverage": round(warm / requests, 3) if requests else None,
+        "by_hour": hours if len(hours) <= 24 else [],
+    }
+
+
+def main() -> None:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("run", help="Prewarm the catalog cache now")
+
+    bt = sub.add_parser("backtest", help="Coverage a prewarm would have had, from intent log history")
+    bt.add_argument("--at", type=datetime.fromisoformat, default=None, help="Single prewarm time (UTC)")
+    bt.add_argument("--days", type=int, default=7, help="Without --at: one prewarm per hour over N days")
+    bt.add_argument("--window-hours", type=float, default=settings.prewarm_window_hours)
+    bt.add_argument("--top-n", type=int, default=settings.prewarm_top_n)
+
+    args = parser.parse_args()
+
+    if args.command == "run":
+        result = run_prewarm()
+    else:
+        if args.at:
+            at_times = [args.at]
+        else:
+            end = datetime.utcnow().replace(minute=0, second=0, microsecond=0) - timedelta(hours=1)
+            at_times = [end - timedelta(hours=h) for h in range(args.days * 24)][::-1]
+        result = backtest(at_times, args.window_hours, args.top_n)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+"""
+Mint an X-Profile header value that triggers request profiling.
+
+Usage (from backend/, with PROFILING_SECRET set):
+    python -m scripts.profile_token --ttl 600
+    curl -H "X-Profile: $(python -m scripts.profile_token)" ...
+"""
+import argparse
+
+from app.config import get_settings
+from app.profiling import MAX_TOKEN_TTL_SECONDS, sign_profile_token
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ttl", type=int, default=600, help="Seconds the token stays valid")
+    args = parser.parse_args()
+
+    secret = get_settings().profiling_secret
+    if not secret:
+        parser.error("PROFILING_SECRET is not set")
+    if not 0 < args.ttl <= MAX_TOKEN_TTL_SECONDS:
+        parser.error(f"--ttl must be between 1 and {MAX_TOKEN_TTL_SECONDS}")
+    print(sign_profile_token(secret, ttl_seconds=args.ttl))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+import asyncio
+import threading
+import unittest
+from unittest.mock import patch
+
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from sqlalchemy import delete
+
+from app.admission import AdmissionController, RecentRecommendations, Shed, TokenBucket, admit
+from app.base import Base
+from app.database import SessionLocal, engine
+from app.ids import ID_SIZE
+from app.main import app
+from app.models import Conversation, IntentLog, Session as DBSession
+from app.schemas import ChatRequest, EdibleProduct, ExtractedIntent
+
+
+def _product(sku: str) -> EdibleProduct:
+    return EdibleProduct(sku=sku, name=f"Product {sku}", price=10.0, image_url="", description="", pdp_url="")
+
+
+class TokenBucketTests(unittest.TestCase):
+    def test_wait_time_reflects_refill_rate(self) -> None:
+        bucket = TokenBucket(rate_per_second=2.0, capacity=4.0)
+        bucket.take(4, now=bucket._updated)
+        self.assertAlmostEqual(bucket.wait_time(2, now=bucket._updated), 1.0)
+        self.assertEqual(bucket.wait_time(2, now=bucket._updated + 1.0), 0.0)
+        self.assertEqual(TokenBucket(0, 0).wait_time(100, now=0.0), 0.0)
+
+
+class AdmissionControllerTests(unittest.TestCase):
+    def test_waiting_turn_is_admitted_when_a_slot_frees(self) -> None:
+        controller = AdmissionController(max_concurrent=1, max_per_session=1, max_queue=5, deadline_seconds=2.0)
+
+        async def scenario():
+            first = await controller.acquire("a")
+            waiter = asyncio.create_task(controller.acquire("b"))
+            await asyncio.sleep(0.01)
+            self.assertEqual(controller.queued, 1)
+            await controller.release("a", first)
+            second = await waiter
+            await controller.release("b", second)
+
+        asyncio.run(scenario())
+        self.assertEqual(controller.active, 0)
+        self.assertEqual(dict(controller.shed), {})
+
+    def test_shed_reasons(self) -> None:
+        controller = AdmissionController(max_concurrent=1, max_per_session=1, max_queue=1, deadline_seconds=0.05)
+
+        async def scenario():
+            started = await controller.acquire("a")
+            with self.assertRaises(Shed) as busy:
+                await controller.acquire("a")
+            waiter = asyncio.create_task(controller.acquire("b"))
+            await asyncio.sleep(0.01)
+            with self.assertRaises(Shed) as full:
+                await controller.acquire("c")
+            with self.assertRaises(Shed) as expired:
+                await waiter
+            await controller.release("a", started)
+            return busy.exception.reason, full.exception.reason, expired.exception.reason
+
+        self.assertEqual(asyncio.run(scenario()), ("session_busy", "queue_full", "deadline"))
+
+    def test_quota_exhaustion_sheds_when_refill_misses_deadline(self) -> None:
+        controller = AdmissionController(
+            max_concurrent=10, max_per_session=5, max_queue=10, deadline_seconds=0.5,
+            rpm=60, calls_per_turn=2, burst_seconds=4.0,
+        )
+
+        async def scenario():
+            for _ in range(2):
+                await controller.acquire(None)
+            with self.assertRaises(Shed) as limited:
+                await controller.acquire(None)
+            return limited.exception.reason
+
+        self.assertEqual(asyncio.run(scenario()), "rate_limited")
+
+    def test_recent_recommendations_rank_by_frequency(self) -> None:
+        recent = RecentRecommendations()
+        recent.record([_product("A"), _product("B")])
+        recent.record([_product("B"), _product("C")])
+        self.assertEqual([p.sku for p in recent.popular(2)], ["B", "A"])
+
+    def test_recent_recommendations_are_readable_while_recorded(self) -> None:
+        recent = RecentRecommendations(maxlen=50)
+        products = [_product(str(i)) for i in range(10)]
+        stop = threading.Event()
+
+        def writer() -> None:
+            while not stop.is_set():
+                recent.record(products)
+
+        thread = threading.Thread(target=writer)
+        thread.start()
+        try:
+            for _ in range(5000):
+                self.assertLessEqual(len(recent.popular(3)), 3)
+        finally:
+            stop.set()
+            thread.join()
+
+
+class AdmitDecoratorTests(unittest.TestCase):
+    def test_streamed_response_holds_its_slot_until_sent(self) -> None:
+        controller = AdmissionController(max_concurrent=2, max_per_session=1, max_queue=0, deadline_seconds=1,
+                                         rpm=600, calls_per_turn=2)
+        active_while_streaming = []
+        test_app = FastAPI()
+
+        def body():
+            active_while_streaming.append(controller.active)
+            yield "a"
+            active_while_streaming.append(controller.active)
+            yield "b"
+
+        @test_app.post("/plan")
+        @admit(controller, on_shed=lambda request, reason: None, weight=lambda request: 3.0)
+        async def plan(request: ChatRequest):
+            return StreamingResponse(body())
+
+        with TestClient(test_app) as client:
+            res = client.post("/plan", json={"message": "gifts", "history": []})
+
+        self.assertEqual(res.text, "ab")
+        self.assertEqual(active_while_streaming, [1, 1])
+        self.assertEqual(controller.active, 0)
+        # Charged 3 turns of 2 calls from a 100-call burst
+        self.assertAlmostEqual(controller.requests_bucket.tokens, 94, delta=0.5)
+        self.assertEqual(controller.avg_service_seconds, 0.0)
+
+
+class DegradedChatTests(unittest.TestCase):
+    def test_shed_turn_gets_degraded_reply_instead_of_error(self) -> None:
+        client = TestClient(app)
+        with (
+            patch("app.admission.AdmissionController.acquire", side_effect=Shed("queue_full")),
+            patch("app.routers.chat.extract_intent") as extract_intent,
+        ):
+            first = client.post("/api/chat", json={"message": "gift", "history": []})
+            with patch("app.routers.chat.recent_recommendations", RecentRecommendations()) as recent:
+                recent.record([_product("A")])
+                later = client.post(
+                    "/api/chat",
+                    json={"message": "more", "session_id": "s1", "history": [{"role": "user", "content": "gift"}]},
+                )
+
+        extract_intent.assert_not_called()
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.headers["x-degraded"], "queue_full")
+        self.assertTrue(first.json()["intent"]["needs_clarification"])
+        self.assertEqual([p["sku"] for p in later.json()["products"]], ["A"])
+        self.assertEqual(later.json()["session_id"], "s1")
+
+    def test_shed_first_turn_issues_the_session_id_of_the_next_turn(self) -> None:
+        Base.metadata.create_all(bind=engine)
+        client = TestClient(app)
+        with patch("app.admission.AdmissionController.acquire", side_effect=Shed("queue_full")):
+            shed = client.post("/api/chat", json={"message": "gift", "session_id": "", "history": []})
+        session_id = shed.json()["session_id"]
+        self.assertEqual(len(session_id), ID_SIZE)
+
+        intent = ExtractedIntent(needs_clarification=True, clarifying_question="Who is it for?")
+        with patch("app.routers.chat.extract_intent", return_value=intent):
+            admitted = client.post(
+                "/api/chat",
+                json={"message": "gift", "session_id": session_id, "history": [{"role": "user", "content": "gift"}]},
+            )
+        db = SessionLocal()
+        try:
+            self.assertEqual(admitted.json()["session_id"], session_id)
+            self.assertIsNotNone(db.get(DBSession, session_id))
+        finally:
+            db.execute(delete(IntentLog).where(IntentLog.session_id == session_id))
+            db.execute(delete(Conversation).where(Conversation.session_id == session_id))
+            db.execute(delete(DBSession).where(DBSession.id == session_id))
+            db.commit()
+            db.close()
@@ -0,0 +1,113 @@
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+from fastapi import Depends, FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.bulkheads import BULKHEADS, Bulkhead, dependency_in, run_in
+
+
+class BulkheadTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.release = threading.Event()
+        self.started = threading.Semaphore(0)
+        pools = {
+            "slow": Bulkhead("slow", size=1, max_queue=1, queue_timeout=0.3),
+            "fast": Bulkhead("fast", size=1, max_queue=5, queue_timeout=5.0),
+        }
+        self.pools = patch.dict(BULKHEADS, pools)
+        self.pools.start()
+
+        test_app = FastAPI()
+
+        @test_app.get("/slow")
+        @run_in("slow")
+        def slow():
+            self.started.release()
+            self.release.wait(5)
+            return {"pool": "slow"}
+
+        @test_app.get("/fast/{item}")
+        @run_in("fast")
+        def fast(item: int):
+            return {"pool": "fast", "item": item}
+
+        self.client = TestClient(test_app)
+        self.executor = ThreadPoolExecutor(max_workers=4)
+
+    def tearDown(self) -> None:
+        self.release.set()
+        self.executor.shutdown(wait=True)
+        self.client.close()
+        self.pools.stop()
+
+    def test_saturated_pool_does_not_block_other_pools(self) -> None:
+        running = self.executor.submit(self.client.get, "/slow")
+        self.assertTrue(self.started.acquire(timeout=5))
+
+        res = self.client.get("/fast/7")
+
+        self.assertEqual(res.json(), {"pool": "fast", "item": 7})
+        self.assertEqual(BULKHEADS["slow"].snapshot()["active"], 1)
+        self.release.set()
+        self.assertEqual(running.result(timeout=5).status_code, 200)
+
+    def test_full_queue_and_queue_timeout_are_rejected(self) -> None:
+        running = self.executor.submit(self.client.get, "/slow")
+        self.assertTrue(self.started.acquire(timeout=5))
+        queued = self.executor.submit(self.client.get, "/slow")
+        deadline = time.monotonic() + 5
+        while BULKHEADS["slow"].queued == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        overflow = self.client.get("/slow")
+        self.assertEqual(overflow.status_code, 503)
+        self.assertIn("retry-after", overflow.headers)
+
+        timed_out = queued.result(timeout=5)
+        self.assertEqual(timed_out.status_code, 503)
+        self.release.set()
+        self.assertEqual(running.result(timeout=5).status_code, 200)
+        self.assertEqual(BULKHEADS["slow"].snapshot()["rejected"], 2)
+
+
+class BulkheadScopeTests(unittest.TestCase):
+    def test_dependency_and_stream_run_on_the_pool_threads(self) -> None:
+        pool = Bulkhead("export", size=2, max_queue=1, queue_timeout=1.0)
+        seen = []
+
+        def on_pool(step: str) -> None:
+            seen.append((step, pool._threads.borrowed_tokens))
+
+        def get_resource():
+            on_pool("open")
+            try:
+                yield "db"
+            finally:
+                on_pool("close")
+
+        def rows():
+            for i in range(2):
+                on_pool(f"row{i}")
+                yield f"{i}\n"
+
+        test_app = FastAPI()
+        with patch.dict(BULKHEADS, {"export": pool}):
+            resource = dependency_in("export", get_resource)
+
+            @test_app.get("/export")
+            @run_in("export")
+            def export(db: str = Depends(resource)):
+                on_pool("handler")
+                return StreamingResponse(pool.iterate(rows()))
+
+            with TestClient(test_app) as client:
+                res = client.get("/export")
+
+        self.assertEqual(res.text, "0\n1\n")
+        self.assertEqual([step for step, _ in seen], ["open", "handler", "row0", "row1", "close"])
+        self.assertTrue(all(borrowed == 1 for _, borrowed in seen), seen)
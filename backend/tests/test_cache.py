@@ -0,0 +1,173 @@
+import os
+import socket
+import tempfile
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
+
+from app.cache import MemoryBackend, NamespacedCache, RedisBackend, SQLiteBackend, cache_errors
+from app.schemas import EdibleProduct, ExtractedIntent, Occasion
+from app.services import edible_client, intent_service
+from benchmarks.stubs import EdibleStub, RedisStub
+
+
+def _products() -> list[EdibleProduct]:
+    return [
+        EdibleProduct(
+            sku="ABC-123", name="Fresh Fruit Bouquet", price=39.99, image_url="https://example.test/1.jpg",
+            description="Fruit.", tags=["fruit", "Sale"], pdp_url="https://example.test/p/abc-123",
+        ),
+        EdibleProduct(sku="CHOCO-9", name="Dipped Strawberries", price=29.99, image_url="", description="", pdp_url=""),
+    ]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class CacheBackendTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.redis = RedisStub(password="secret").start()
+
+    def tearDown(self) -> None:
+        self.redis.stop()
+        self.tmp.cleanup()
+
+    def _backends(self):
+        return {
+            "memory": MemoryBackend(),
+            "sqlite": SQLiteBackend(os.path.join(self.tmp.name, "cache.sqlite3")),
+            "redis": RedisBackend(self.redis.url),
+        }
+
+    def test_typed_values_round_trip_on_every_backend(self) -> None:
+        intent = ExtractedIntent(occasion=Occasion.birthday, keywords=["fruit"], confidence=0.9)
+        for name, backend in self._backends().items():
+            with self.subTest(backend=name):
+                catalog = NamespacedCache("catalog", list[EdibleProduct], 60, backend=backend)
+                intents = NamespacedCache("intent", ExtractedIntent, 60, backend=backend)
+                self.assertIsNone(catalog.get("fruit"))
+                catalog.set("fruit", _products())
+                intents.set("fruit", intent)
+                self.assertEqual(catalog.get("fruit"), _products())
+                self.assertEqual(intents.get("fruit"), intent)
+
+    def test_batch_reads_and_writes_on_every_backend(self) -> None:
+        products = {p.sku: p for p in _products()}
+        for name, backend in self._backends().items():
+            with self.subTest(backend=name):
+                store = NamespacedCache("product", EdibleProduct, 60, backend=backend)
+                self.assertEqual(store.get_many(list(products)), {})
+                store.set_many(products)
+                self.assertEqual(store.get_many(["CHOCO-9", "MISSING", "ABC-123"]), {
+                    "CHOCO-9": products["CHOCO-9"],
+                    "ABC-123": products["ABC-123"],
+                })
+                self.assertEqual(store.get("ABC-123"), products["ABC-123"])
+
+    def test_entries_expire_after_their_namespace_ttl(self) -> None:
+        for name, backend in self._backends().items():
+            with self.subTest(backend=name):
+                cache = NamespacedCache("catalog", list[EdibleProduct], 0.05, backend=backend)
+                cache.set("fruit", _products())
+                if name == "redis":
+                    # The stub expires by wall clock like a real server
+                    time.sleep(0.1)
+                    self.assertIsNone(cache.get("fruit"))
+                else:
+                    with patch("app.cache.time.time", return_value=10**10):
+                        self.assertIsNone(cache.get("fruit"))
+
+    def test_sqlite_file_is_shared_between_backend_instances(self) -> None:
+        path = os.path.join(self.tmp.name, "shared.sqlite3")
+        NamespacedCache("catalog", list[EdibleProduct], 60, backend=SQLiteBackend(path)).set("fruit", _products())
+        other_worker = NamespacedCache("catalog", list[EdibleProduct], 60, backend=SQLiteBackend(path))
+        self.assertEqual(other_worker.get("fruit"), _products())
+
+    def test_unreachable_server_is_a_miss_not_an_error(self) -> None:
+        cache = NamespacedCache(
+            "catalog", list[EdibleProduct], 60, backend=RedisBackend(f"redis://127.0.0.1:{_free_port()}/0")
+        )
+        cache.set("fruit", _products())
+        self.assertIsNone(cache.get("fruit"))
+        cache_errors.flush(force=True)
+
+    def test_add_is_taken_by_exactly_one_caller(self) -> None:
+        for name, backend in self._backends().items():
+            with self.subTest(backend=name):
+                locks = NamespacedCache("lock", str, 60, backend=backend)
+                barrier = threading.Barrier(8)
+
+                def take() -> bool:
+                    barrier.wait()
+                    return locks.add("slot", "taken")
+
+                with ThreadPoolExecutor(max_workers=8) as pool:
+                    results = list(pool.map(lambda _: take(), range(8)))
+                self.assertEqual(results.count(True), 1)
+
+    def test_add_fails_closed_when_server_is_unreachable(self) -> None:
+        locks = NamespacedCache("lock", str, 60, backend=RedisBackend(f"redis://127.0.0.1:{_free_port()}/0"))
+        self.assertFalse(locks.add("slot", "taken"))
+        cache_errors.flush(force=True)
+
+    def test_zero_ttl_disables_namespace(self) -> None:
+        backend = MemoryBackend()
+        cache = NamespacedCache("intent", ExtractedIntent, 0, backend=backend)
+        cache.set("k", ExtractedIntent())
+        self.assertIsNone(cache.get("k"))
+        self.assertEqual(len(backend._entries), 0)
+
+
+class CatalogCacheTests(unittest.TestCase):
+    def test_repeated_keyword_is_served_from_cache(self) -> None:
+        catalog = NamespacedCache("catalog", list[EdibleProduct], 60, backend=MemoryBackend())
+        with (
+            EdibleStub() as edible,
+            patch.object(edible_client.settings, "edible_api_url", edible.search_url),
+            patch.object(edible_client, "catalog_cache", catalog),
+        ):
+            first = edible_client.fetch_single_keyword("fruit")
+            second = edible_client.fetch_single_keyword("fruit")
+            requests = edible.requests
+
+        self.assertTrue(first)
+        self.assertEqual(first, second)
+        self.assertEqual(requests, 1)
+
+    def test_failed_fetch_is_not_cached(self) -> None:
+        catalog = NamespacedCache("catalog", list[EdibleProduct], 60, backend=MemoryBackend())
+        with (
+            EdibleStub(error_rate=1.0) as edible,
+            patch.object(edible_client.settings, "edible_api_url", edible.search_url),
+            patch.object(edible_client, "catalog_cache", catalog),
+        ):
+            self.assertEqual(edible_client.fetch_single_keyword("fruit"), [])
+            self.assertEqual(edible_client.fetch_single_keyword("fruit"), [])
+            requests = edible.requests
+
+        self.assertEqual(requests, 2)
+
+
+class IntentCacheTests(unittest.TestCase):
+    def test_prompt_version_is_part_of_the_key(self) -> None:
+        response = MagicMock()
+        response.choices[0].message.content = '{"occasion": "birthday", "confidence": 0.9}'
+        messages = [{"role": "user", "content": "birthday gift for my sister"}]
+        intents = NamespacedCache("intent", ExtractedIntent, 60, backend=MemoryBackend())
+        with (
+            patch.object(intent_service, "intent_cache", intents),
+            patch.object(intent_service, "chat_completion", return_value=response) as completion,
+        ):
+            intent_service.extract_intent(messages)
+            intent_service.extract_intent(messages)
+            self.assertEqual(completion.call_count, 1)
+
+            with patch.object(intent_service, "INTENT_PROMPT_VERSION", "intent-next"):
+                self.assertEqual(intent_service.extract_intent(messages).occasion, Occasion.birthday)
+            self.assertEqual(completion.call_count, 2)
@@ -0,0 +1,83 @@
+import os
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from app.schemas import EdibleProduct, ExtractedIntent, Occasion
+from app.services.catalog_index import CatalogIndex, intent_query, tokenize
+from benchmarks.synthetic import edible_products
+
+
+def _product(sku: str, name: str, tags: list[str] | None = None, description: str = "") -> EdibleProduct:
+    return EdibleProduct(sku=sku, name=name, price=50.0, image_url="", description=description,
+                         tags=tags or [], pdp_url="")
+
+
+CATALOG = [
+    _product("FRUIT", "Fresh Fruit Bouquet", ["Fruit Arrangements"], "Pineapple daisies and melon."),
+    _product("BERRY", "Chocolate Dipped Strawberries", ["Chocolate Dipped Fruit"], "Dipped in Belgian chocolate."),
+    _product("KOSHER", "Kosher Fruit Basket", ["Kosher", "Gift Baskets"], "Certified kosher fresh fruit."),
+    _product("COOKIE", "Celebration Cookie Tin", ["Cookies", "Birthday"], "Baked cookies for a birthday."),
+]
+
+
+class CatalogIndexTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.index = CatalogIndex()
+        self.index.add(CATALOG)
+
+    def test_query_uses_keywords_dietary_and_occasion(self) -> None:
+        intent = ExtractedIntent(keywords=["fruit"], dietary=["kosher"])
+        self.assertEqual(self.index.query(intent, 2)[0].sku, "KOSHER")
+
+        birthday = ExtractedIntent(keywords=["treats"], occasion=Occasion.birthday)
+        self.assertEqual([p.sku for p in self.index.query(birthday, 5)], ["COOKIE"])
+        self.assertEqual(intent_query(ExtractedIntent(occasion=Occasion.thank_you)), {"thank": 0.5})
+
+    def test_plurals_match_singulars(self) -> None:
+        self.assertEqual(tokenize("Strawberries and Cookies"), ["strawberrie", "cookie"])
+        self.assertEqual(tokenize("Strawberry Cookie Boxes"), ["strawberrie", "cookie", "box"])
+        self.assertEqual(self.index.query(ExtractedIntent(keywords=["strawberry"]), 5)[0].sku, "BERRY")
+
+    def test_changed_product_replaces_its_postings(self) -> None:
+        self.assertEqual(self.index.add([CATALOG[0]]), 0)
+        renamed = _product("FRUIT", "Brownie Platter", ["Brownies"], "Fudge brownies.")
+        self.assertEqual(self.index.add([renamed]), 1)
+
+        self.assertEqual(len(self.index), 4)
+        self.assertNotIn("FRUIT", [p.sku for p in self.index.query(ExtractedIntent(keywords=["bouquet"]))])
+        self.assertEqual(self.index.query(ExtractedIntent(keywords=["brownies"]))[0].name, "Brownie Platter")
+
+    def test_saved_index_loads_with_identical_scores(self) -> None:
+        index = CatalogIndex()
+        index.add(edible_products(300))
+        query = intent_query(ExtractedIntent(keywords=["chocolate", "birthday"], dietary=["kosher"]))
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "index.json.gz")
+            index.save(path)
+            loaded = CatalogIndex()
+            loaded.load(path)
+
+        self.assertEqual(loaded.snapshot(), index.snapshot())
+        self.assertEqual(
+            [(p.sku, round(s, 9)) for p, s in loaded.search(query, 10)],
+            [(p.sku, round(s, 9)) for p, s in index.search(query, 10)],
+        )
+        loaded.add([_product("NEW", "Kosher Chocolate Birthday Box", ["Kosher"])])
+        self.assertEqual(loaded.search(query, 1)[0][0].sku, "NEW")
+
+    def test_concurrent_saves_leave_one_complete_index(self) -> None:
+        indexes = []
+        for count in (50, 300):
+            index = CatalogIndex()
+            index.add(edible_products(count))
+            indexes.append(index)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "index.json.gz")
+            with ThreadPoolExecutor(max_workers=4) as pool:
+                list(pool.map(lambda i: indexes[i % 2].save(path), range(8)))
+            loaded = CatalogIndex()
+            loaded.load(path)
+            self.assertEqual(os.listdir(tmp), ["index.json.gz"])
+
+        self.assertIn(loaded.snapshot(), [index.snapshot() for index in indexes])
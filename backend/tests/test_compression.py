@@ -0,0 +1,102 @@
+import tempfile
+import unittest
+import zlib
+from unittest.mock import patch
+
+import sqlalchemy as sa
+from sqlalchemy import delete
+
+from app.base import Base
+from app.compression import (
+    BUILTIN_DICT_ID,
+    MAGIC,
+    compress_text,
+    decompress_value,
+    dictionary_path,
+    is_compressed,
+    load_dictionaries,
+    reload_dictionaries,
+    save_dictionary,
+    train_dictionary,
+)
+from app.config import get_settings
+from app.database import SessionLocal, engine
+from app.models import Conversation, Session as DBSession
+from app.prompts.product_curator import CLOSING_LINE
+
+REPLY = (
+    "Fresh Fruit Bouquet (SKU: ABC-123): A bright, cheerful pick for a birthday.\n"
+    "Chocolate Dipped Strawberries (SKU: CHOCO-9): A classic sweet treat.\n"
+    f"{CLOSING_LINE}"
+)
+
+
+class CompressionFormatTests(unittest.TestCase):
+    def test_round_trip_with_builtin_dictionary(self) -> None:
+        packed = compress_text(REPLY, dict_id=BUILTIN_DICT_ID)
+
+        self.assertTrue(is_compressed(packed))
+        self.assertLess(len(packed), len(REPLY.encode("utf-8")))
+        self.assertEqual(decompress_value(packed), REPLY)
+
+    def test_short_and_legacy_values_stay_plain(self) -> None:
+        self.assertEqual(compress_text("hi"), b"hi")
+        self.assertEqual(decompress_value("legacy text row"), "legacy text row")
+        self.assertEqual(decompress_value(b"plain bytes row"), "plain bytes row")
+
+    def test_trained_dictionary_is_saved_with_next_id(self) -> None:
+        samples = [REPLY.replace("birthday", f"occasion {i}") for i in range(20)]
+        dictionary = train_dictionary(samples, size=2048)
+        self.assertIn(CLOSING_LINE.encode("utf-8"), dictionary)
+
+        with tempfile.TemporaryDirectory() as directory, patch("app.compression.reload_dictionaries"):
+            dict_id = save_dictionary(dictionary, directory)
+            self.assertEqual(dict_id, BUILTIN_DICT_ID + 1)
+            self.assertEqual(load_dictionaries(directory)[dict_id], dictionary)
+
+    def test_dictionary_trained_by_another_process_is_loaded_on_first_use(self) -> None:
+        settings = get_settings()
+        with tempfile.TemporaryDirectory() as directory, patch.object(settings, "compression_dict_dir", directory):
+            reload_dictionaries()
+            self.addCleanup(reload_dictionaries)
+            # Another worker trains dictionary 2 and rewrites a row with it
+            dictionary = train_dictionary([REPLY.replace("birthday", f"occasion {i}") for i in range(20)], size=2048)
+            with open(dictionary_path(2, directory), "wb") as f:
+                f.write(dictionary)
+            compressor = zlib.compressobj(6, zlib.DEFLATED, -15, zdict=dictionary)
+            packed = MAGIC + bytes([2]) + compressor.compress(REPLY.encode("utf-8")) + compressor.flush()
+
+            self.assertEqual(decompress_value(packed), REPLY)
+            with self.assertRaisesRegex(LookupError, "dictionary 9 not found"):
+                decompress_value(MAGIC + bytes([9]) + packed[3:])
+
+
+class CompressedColumnTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        Base.metadata.create_all(bind=engine)
+
+    def test_conversation_content_is_compressed_transparently(self) -> None:
+        settings = get_settings().model_copy(update={"conversation_compression": True})
+        db = SessionLocal()
+        try:
+            session = DBSession()
+            db.add(session)
+            db.flush()
+            with patch("app.models.get_settings", return_value=settings):
+                conversation = Conversation(session_id=session.id, role="assistant", content=REPLY)
+                db.add(conversation)
+                db.commit()
+
+            raw = db.execute(
+                sa.text("SELECT content FROM conversations WHERE id = :id"), {"id": conversation.id}
+            ).scalar_one()
+            self.assertTrue(is_compressed(raw))
+
+            db.expire_all()
+            self.assertEqual(db.get(Conversation, conversation.id).content, REPLY)
+        finally:
+            db.execute(delete(Conversation).where(Conversation.session_id == session.id))
+            db.execute(delete(DBSession).where(DBSession.id == session.id))
+            db.commit()
+            db.close()
@@ -0,0 +1,55 @@
+import logging
+import os
+import tempfile
+import unittest
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app.database import ENGINE_PROFILES, build_engine
+
+
+class EngineProfileTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.workdir = tempfile.TemporaryDirectory()
+        self.url = f"sqlite:///{os.path.join(self.workdir.name, 'profile.db')}"
+
+    def tearDown(self) -> None:
+        self.workdir.cleanup()
+
+    def test_sqlite_prod_profile_applies_pragmas(self) -> None:
+        engine = build_engine(self.url, ENGINE_PROFILES["sqlite-prod"])
+        try:
+            with engine.connect() as conn:
+                self.assertEqual(conn.execute(text("PRAGMA journal_mode")).scalar(), "wal")
+                self.assertEqual(conn.execute(text("PRAGMA busy_timeout")).scalar(), 5000)
+                self.assertEqual(conn.execute(text("PRAGMA foreign_keys")).scalar(), 1)
+            self.assertFalse(engine.echo)
+            self.assertEqual(engine.pool.size(), 8)
+        finally:
+            engine.dispose()
+
+    def test_statement_logging_is_opt_in(self) -> None:
+        logger = logging.getLogger("sqlalchemy.engine")
+        level = logger.level
+        self.addCleanup(logger.setLevel, level)
+        logger.setLevel(logging.WARNING)
+
+        build_engine(self.url, ENGINE_PROFILES["dev"]).dispose()
+        self.assertFalse(logger.isEnabledFor(logging.INFO))
+        build_engine(self.url, ENGINE_PROFILES["dev"], echo=True).dispose()
+        self.assertTrue(logger.isEnabledFor(logging.INFO))
+
+    def test_read_only_engine_rejects_writes(self) -> None:
+        writer = build_engine(self.url, ENGINE_PROFILES["sqlite-prod"])
+        reader = build_engine(self.url, ENGINE_PROFILES["sqlite-prod"], read_only=True)
+        try:
+            with writer.begin() as conn:
+                conn.execute(text("CREATE TABLE t (x INTEGER)"))
+            with reader.connect() as conn:
+                self.assertEqual(conn.execute(text("SELECT count(*) FROM t")).scalar(), 0)
+                with self.assertRaises(OperationalError):
+                    conn.execute(text("INSERT INTO t VALUES (1)"))
+        finally:
+            reader.dispose()
+            writer.dispose()
@@ -0,0 +1,109 @@
+import csv
+import io
+import json
+import unittest
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+from sqlalchemy import delete
+
+from app.base import Base
+from app.database import SessionLocal, engine
+from app.main import app
+from app.models import IntentLog, IntentTerm, ProductClick, Session as DBSession
+
+WINDOW_START = datetime(2001, 1, 1)
+
+
+class AnalyticsExportTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        Base.metadata.create_all(bind=engine)
+
+    def setUp(self) -> None:
+        self.client = TestClient(app)
+        db = SessionLocal()
+        try:
+            session = DBSession()
+            db.add(session)
+            db.flush()
+            self.session_id = session.id
+            for i in range(3):
+                db.add(
+                    ProductClick(
+                        session_id=session.id,
+                        sku=f"SKU-{i}",
+                        name=f"Product {i}",
+                        position=i + 1,
+                        created_at=WINDOW_START + timedelta(minutes=i),
+                    )
+                )
+            db.commit()
+        finally:
+            db.close()
+
+    def tearDown(self) -> None:
+        self.client.close()
+        db = SessionLocal()
+        try:
+            db.execute(delete(ProductClick).where(ProductClick.session_id == self.session_id))
+            db.execute(delete(DBSession).where(DBSession.id == self.session_id))
+            db.commit()
+        finally:
+            db.close()
+
+    def _window(self, **extra) -> dict:
+        return {"start": WINDOW_START.isoformat(), "end": (WINDOW_START + timedelta(days=1)).isoformat(), **extra}
+
+    def test_ndjson_export_streams_rows_in_keyset_order_and_resumes(self) -> None:
+        res = self.client.get("/api/analytics/export/product_clicks", params=self._window())
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(res.headers["content-type"].startswith("application/x-ndjson"))
+        rows = [json.loads(line) for line in res.text.splitlines()]
+        self.assertEqual([r["sku"] for r in rows], ["SKU-0", "SKU-1", "SKU-2"])
+
+        res = self.client.get(
+            "/api/analytics/export/product_clicks",
+            params=self._window(after_created_at=rows[0]["created_at"], after_id=rows[0]["id"]),
+        )
+        resumed = [json.loads(line) for line in res.text.splitlines()]
+        self.assertEqual([r["sku"] for r in resumed], ["SKU-1", "SKU-2"])
+
+    def test_csv_export_includes_header(self) -> None:
+        res = self.client.get("/api/analytics/export/product_clicks", params=self._window(format="csv"))
+        self.assertEqual(res.status_code, 200)
+        rows = list(csv.reader(io.StringIO(res.text)))
+        self.assertEqual(rows[0], ["id", "session_id", "sku", "name", "position", "created_at"])
+        self.assertEqual(len(rows), 4)
+
+    def test_intent_logs_include_terms_of_normalized_rows(self) -> None:
+        db = SessionLocal()
+        try:
+            db.add_all([
+                IntentLog(id="exp-json", session_id=self.session_id, keywords=["fruit"], dietary=[],
+                          created_at=WINDOW_START),
+                IntentLog(id="exp-normalized", session_id=self.session_id, keywords=[], dietary=[],
+                          created_at=WINDOW_START + timedelta(minutes=1)),
+            ])
+            db.flush()
+            db.add_all([
+                IntentTerm(intent_log_id="exp-normalized", kind="keyword", value="cookies"),
+                IntentTerm(intent_log_id="exp-normalized", kind="keyword", value="brownies"),
+                IntentTerm(intent_log_id="exp-normalized", kind="dietary", value="kosher"),
+            ])
+            db.commit()
+
+            res = self.client.get("/api/analytics/export/intent_logs", params=self._window())
+            rows = {r["id"]: r for r in map(json.loads, res.text.splitlines())}
+            self.assertEqual(rows["exp-json"]["keywords"], ["fruit"])
+            self.assertEqual(rows["exp-normalized"]["keywords"], ["brownies", "cookies"])
+            self.assertEqual(rows["exp-normalized"]["dietary"], ["kosher"])
+        finally:
+            db.execute(delete(IntentTerm).where(IntentTerm.intent_log_id.in_(["exp-json", "exp-normalized"])))
+            db.execute(delete(IntentLog).where(IntentLog.session_id == self.session_id))
+            db.commit()
+            db.close()
+
+    def test_unknown_table_is_rejected(self) -> None:
+        res = self.client.get("/api/analytics/export/sessions")
+        self.assertEqual(res.status_code, 422)
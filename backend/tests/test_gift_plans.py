@@ -0,0 +1,139 @@
+import json
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+from openai import OpenAI
+from sqlalchemy import func, select
+
+from app.admission import Shed
+from app.base import Base
+from app.cache import MemoryBackend, NamespacedCache
+from app.database import SessionLocal, engine
+from app.main import app
+from app.models import LLMUsage
+from app.schemas import Budget, EdibleProduct, ExtractedIntent, GiftRecipient, Occasion
+from app.services import edible_client, gift_planning
+from app.services.gift_planning import parse_batch_reply, recipient_candidates
+from benchmarks.stubs import EdibleStub, OpenAIStub
+
+INTENT = ExtractedIntent(occasion=Occasion.corporate, keywords=["fruit", "chocolate"], confidence=0.9)
+
+
+def _product(sku: str, price: float, tags: list[str] | None = None) -> EdibleProduct:
+    return EdibleProduct(sku=sku, name=f"Product {sku}", price=price, image_url="", description="",
+                         tags=tags or [], pdp_url="")
+
+
+class CandidateTests(unittest.TestCase):
+    def test_candidates_are_in_budget_with_dietary_matches_first(self) -> None:
+        catalog = {
+            "fruit": [_product("A", 30), _product("B", 60), _product("C", 75), _product("D", 120)],
+            "chocolate": [_product("B", 60), _product("E", 90, ["Kosher"])],
+            "kosher": [_product("F", 55, ["Kosher"])],
+        }
+        recipient = GiftRecipient(budget=Budget.mid, dietary=["kosher"])
+        skus = [p.sku for p in recipient_candidates(INTENT, recipient, catalog)]
+        self.assertEqual(skus, ["E", "F", "B", "C"])
+
+    def test_closest_prices_fill_in_when_too_few_are_in_budget(self) -> None:
+        catalog = {"fruit": [_product("A", 30), _product("B", 60), _product("D", 120)]}
+        skus = [p.sku for p in recipient_candidates(INTENT, GiftRecipient(budget=Budget.high), catalog)]
+        self.assertEqual(skus, ["D", "B", "A"])
+
+    def test_batch_reply_is_split_per_recipient(self) -> None:
+        text = "RECIPIENT r1\nA (SKU: 1-sm): nice.\nRECIPIENT ops-2:\nB (SKU: 2-lg): great."
+        self.assertEqual(parse_batch_reply(text), {"r1": "A (SKU: 1-sm): nice.", "ops-2": "B (SKU: 2-lg): great."})
+
+    def test_concurrent_plans_share_the_completion_limit(self) -> None:
+        lock = threading.Lock()
+        running, peak = [0], [0]
+
+        def curate(intent, batch):
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            time.sleep(0.02)
+            with lock:
+                running[0] -= 1
+            return [gift_planning.fallback_result(*item) for item in batch]
+
+        recipients = [(f"r{i}", GiftRecipient()) for i in range(12)]
+        with (
+            patch.object(gift_planning, "fetch_catalog", return_value={"fruit": [_product("A", 30)]}),
+            patch.object(gift_planning.settings, "gift_plan_recipients_per_call", 1),
+            patch.object(gift_planning, "curate_batch", side_effect=curate),
+            ThreadPoolExecutor(max_workers=3) as plans,
+        ):
+            results = list(plans.map(lambda _: list(gift_planning.plan_gifts(INTENT, recipients, [])), range(3)))
+
+        self.assertEqual([len(r) for r in results], [12, 12, 12])
+        self.assertLessEqual(peak[0], gift_planning.settings.gift_plan_llm_concurrency)
+
+
+class GiftPlanEndpointTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        Base.metadata.create_all(bind=engine)
+
+    def _post(self, payload: dict):
+        catalog = NamespacedCache("catalog", list[EdibleProduct], 60, backend=MemoryBackend())
+        with (
+            EdibleStub() as edible,
+            OpenAIStub() as openai_stub,
+            patch.object(edible_client.settings, "edible_api_url", edible.search_url),
+            patch.object(edible_client, "catalog_cache", catalog),
+            patch.object(gift_planning.settings, "gift_plan_recipients_per_call", 8),
+            patch("app.services.llm.get_openai_client",
+                  return_value=OpenAI(api_key="stub", base_url=openai_stub.base_url)),
+            patch("app.routers.gift_plans.extract_intent", return_value=INTENT),
+        ):
+            response = TestClient(app).post("/api/gift-plans", json=payload)
+            return response, edible.requests, openai_stub.requests
+
+    def test_recipients_share_fetches_and_completions(self) -> None:
+        recipients = [{"name": f"Employee {i}", "budget": "mid"} for i in range(19)]
+        recipients.append({"id": "ceo", "name": "CEO", "budget": "high", "dietary": ["kosher"]})
+        response, edible_requests, llm_requests = self._post(
+            {"message": "Thank-you gifts for the whole team", "recipients": recipients}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["content-type"], "application/x-ndjson")
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        self.assertEqual(lines[0]["type"], "plan")
+        self.assertEqual(lines[-1]["type"], "done")
+        results = {line["recipient_id"]: line for line in lines[1:-1]}
+        self.assertEqual(len(results), 20)
+        self.assertEqual(results["ceo"]["name"], "CEO")
+        self.assertTrue(all(r["products"] and not r["fallback"] for r in results.values()))
+
+        # fruit, chocolate and kosher fetched once each; 20 recipients in 3 completions
+        self.assertEqual(edible_requests, 3)
+        self.assertEqual(llm_requests, 3)
+        self.assertEqual(lines[-1]["llm_calls"], 3)
+        db = SessionLocal()
+        try:
+            usage_rows = db.scalar(
+                select(func.count()).select_from(LLMUsage).where(LLMUsage.session_id == lines[0]["session_id"])
+            )
+        finally:
+            db.close()
+        self.assertEqual(usage_rows, 3)
+
+    def test_shed_plan_is_retried_later_without_llm_calls(self) -> None:
+        with patch("app.admission.AdmissionController.acquire", side_effect=Shed("queue_full")):
+            response, _, llm_requests = self._post({"message": "Gifts", "recipients": [{"id": "a"}]})
+        self.assertEqual(response.status_code, 503)
+        self.assertIn("retry-after", response.headers)
+        self.assertEqual(llm_requests, 0)
+
+    def test_duplicate_recipient_ids_are_rejected(self) -> None:
+        response, _, llm_requests = self._post(
+            {"message": "Gifts", "recipients": [{"id": "a"}, {"id": "a"}]}
+        )
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(llm_requests, 0)
@@ -0,0 +1,160 @@
+import asyncio
+import unittest
+from unittest.mock import patch
+
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy import delete, func, select
+
+from app.base import Base
+from app.database import SessionLocal, engine
+from app.idempotency import IdempotencyStore
+from app.main import app
+from app.models import Conversation, IntentLog, LLMUsage, Session as DBSession
+from app.routers import chat
+from app.schemas import ChatResponse, ExtractedIntent
+
+
+def _response(reply: str) -> ChatResponse:
+    return ChatResponse(reply=reply, intent=ExtractedIntent(), session_id="s1")
+
+
+class IdempotencyStoreTests(unittest.TestCase):
+    def test_concurrent_duplicates_share_one_execution(self) -> None:
+        store = IdempotencyStore(ttl_seconds=60, max_keys=10)
+        calls = []
+
+        async def turn():
+            calls.append(1)
+            await asyncio.sleep(0.02)
+            return _response("hello")
+
+        async def scenario():
+            return await asyncio.gather(*(store.run("k", "fp", turn) for _ in range(3)))
+
+        first, *duplicates = asyncio.run(scenario())
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(first.reply, "hello")
+        for duplicate in duplicates:
+            self.assertEqual(duplicate.headers["idempotent-replayed"], "true")
+        self.assertEqual(store.outcomes, {"executed": 1, "joined": 2})
+
+    def test_completed_response_is_replayed_until_expiry(self) -> None:
+        store = IdempotencyStore(ttl_seconds=60, max_keys=10)
+
+        async def turn():
+            return _response("hello")
+
+        async def scenario():
+            await store.run("k", "fp", turn)
+            replayed = await store.run("k", "fp", turn)
+            with self.assertRaises(HTTPException) as conflict:
+                await store.run("k", "other", turn)
+            with patch("app.idempotency.time.monotonic", return_value=10**9):
+                await store.run("k", "fp", turn)
+            return replayed, conflict.exception.status_code
+
+        replayed, conflict_status = asyncio.run(scenario())
+        self.assertEqual(replayed.body, _response("hello").model_dump_json().encode())
+        self.assertEqual(conflict_status, 422)
+        self.assertEqual(store.outcomes, {"executed": 2, "replayed": 1, "conflict": 1})
+
+    def test_failures_are_shared_but_not_stored(self) -> None:
+        store = IdempotencyStore(ttl_seconds=60, max_keys=10)
+
+        async def failing():
+            await asyncio.sleep(0.01)
+            raise HTTPException(status_code=500, detail="upstream down")
+
+        async def scenario():
+            results = await asyncio.gather(*(store.run("k", "fp", failing) for _ in range(2)), return_exceptions=True)
+            return results, store.snapshot()
+
+        results, snapshot = asyncio.run(scenario())
+        self.assertTrue(all(isinstance(r, HTTPException) for r in results))
+        self.assertEqual(snapshot["keys"], 0)
+
+    def test_oldest_completed_keys_are_evicted(self) -> None:
+        store = IdempotencyStore(ttl_seconds=60, max_keys=2)
+
+        async def turn():
+            return _response("hello")
+
+        async def scenario():
+            for key in ("a", "b", "c"):
+                await store.run(key, "fp", turn)
+            await store.run("d", "fp", turn)
+
+        asyncio.run(scenario())
+        self.assertEqual(list(store._entries), ["c", "d"])
+
+
+class ChatIdempotencyTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        Base.metadata.create_all(bind=engine)
+
+    def test_resubmit_replays_without_running_the_turn_again(self) -> None:
+        intent = ExtractedIntent(needs_clarification=True, clarifying_question="Who is it for?", confidence=0.2)
+        client = TestClient(app)
+        headers = {"Idempotency-Key": "submit-1"}
+        with patch("app.routers.chat.extract_intent", return_value=intent) as extract_intent:
+            first = client.post("/api/chat", json={"message": "Need a gift", "history": []}, headers=headers)
+            second = client.post("/api/chat", json={"message": "Need a gift", "history": []}, headers=headers)
+            changed = client.post("/api/chat", json={"message": "Other", "history": []}, headers=headers)
+
+        session_id = first.json()["session_id"]
+        try:
+            self.assertEqual(extract_intent.call_count, 1)
+            self.assertEqual(second.status_code, 200)
+            self.assertEqual(second.json(), first.json())
+            self.assertEqual(second.headers["idempotent-replayed"], "true")
+            self.assertNotIn("idempotent-replayed", first.headers)
+            self.assertEqual(changed.status_code, 422)
+
+            db = SessionLocal()
+            try:
+                conversations = db.execute(
+                    select(func.count()).select_from(Conversation).where(Conversation.session_id == session_id)
+                ).scalar_one()
+            finally:
+                db.close()
+            self.assertEqual(conversations, 2)
+        finally:
+            db = SessionLocal()
+            try:
+                for model in (LLMUsage, IntentLog, Conversation):
+                    db.execute(delete(model).where(model.session_id == session_id))
+                db.execute(delete(DBSession).where(DBSession.id == session_id))
+                db.commit()
+            finally:
+                db.close()
+            client.close()
+
+    def test_failed_commit_is_not_replayed(self) -> None:
+        intent = ExtractedIntent(needs_clarification=True, clarifying_question="Who is it for?", confidence=0.2)
+        client = TestClient(app)
+        headers = {"Idempotency-Key": "submit-commit-fails"}
+        real_commit = chat.commit_turn
+        with (
+            patch("app.routers.chat.extract_intent", return_value=intent) as extract_intent,
+            patch("app.routers.chat.commit_turn", side_effect=[RuntimeError("database is locked"), real_commit]),
+        ):
+            failed = client.post("/api/chat", json={"message": "Need a gift", "history": []}, headers=headers)
+            retried = client.post("/api/chat", json={"message": "Need a gift", "history": []}, headers=headers)
+
+        session_id = retried.json()["session_id"]
+        try:
+            self.assertEqual(failed.status_code, 500)
+            self.assertEqual(retried.status_code, 200)
+            self.assertNotIn("idempotent-replayed", retried.headers)
+            self.assertEqual(extract_intent.call_count, 2)
+        finally:
+            db = SessionLocal()
+            try:
+                for model in (LLMUsage, IntentLog, Conversation):
+                    db.execute(delete(model).where(model.session_id == session_id))
+                db.execute(delete(DBSession).where(DBSession.id == session_id))
+                db.commit()
+            finally:
+                db.close()
@@ -0,0 +1,24 @@
+import unittest
+from unittest.mock import patch
+
+from app.config import get_settings
+from app.ids import ID_SIZE, generate_id, id_timestamp_ms, random_id, time_sortable_id
+
+
+class IdStrategyTests(unittest.TestCase):
+    def test_time_sortable_ids_fit_schema_and_sort_by_time(self) -> None:
+        earlier = time_sortable_id(now_ms=1_700_000_000_000)
+        later = time_sortable_id(now_ms=1_700_000_000_001)
+
+        self.assertEqual(len(earlier), ID_SIZE)
+        self.assertLess(earlier, later)
+        self.assertEqual(id_timestamp_ms(later), 1_700_000_000_001)
+
+    def test_generate_id_uses_configured_strategy(self) -> None:
+        settings = get_settings().model_copy(update={"id_strategy": "time_sortable"})
+        with patch("app.ids.get_settings", return_value=settings):
+            value = generate_id()
+
+        self.assertEqual(len(value), ID_SIZE)
+        self.assertGreater(id_timestamp_ms(value), 1_700_000_000_000)
+        self.assertEqual(len(random_id()), ID_SIZE)
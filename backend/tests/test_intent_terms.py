@@ -0,0 +1,113 @@
+import unittest
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+from sqlalchemy import delete, select
+
+from app.base import Base
+from app.config import get_settings
+from app.database import SessionLocal, engine
+from app.main import app
+from app.models import Conversation, IntentLog, IntentTerm, Session as DBSession
+from app.schemas import ExtractedIntent, Occasion
+from app.services.intent_analytics import build_intent_term_rows, term_count, term_frequencies
+
+
+class IntentTermRowsTests(unittest.TestCase):
+    def test_rows_are_normalized_and_deduplicated(self) -> None:
+        rows = build_intent_term_rows("log-1", ["Vegan", " vegan "], ["Birthday  Fruit", ""])
+
+        self.assertEqual(
+            rows,
+            [
+                {"intent_log_id": "log-1", "kind": "dietary", "value": "vegan"},
+                {"intent_log_id": "log-1", "kind": "keyword", "value": "birthday fruit"},
+            ],
+        )
+
+
+class NormalizedIntentStorageTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        Base.metadata.create_all(bind=engine)
+
+    def setUp(self) -> None:
+        self.client = TestClient(app)
+        self.settings = get_settings().model_copy(update={"intent_storage": "normalized"})
+
+    def tearDown(self) -> None:
+        self.client.close()
+
+    def _cleanup_session(self, session_id: str) -> None:
+        db = SessionLocal()
+        try:
+            log_ids = select(IntentLog.id).where(IntentLog.session_id == session_id)
+            db.execute(delete(IntentTerm).where(IntentTerm.intent_log_id.in_(log_ids)))
+            db.execute(delete(IntentLog).where(IntentLog.session_id == session_id))
+            db.execute(delete(Conversation).where(Conversation.session_id == session_id))
+            db.execute(delete(DBSession).where(DBSession.id == session_id))
+            db.commit()
+        finally:
+            db.close()
+
+    def test_chat_writes_terms_and_aggregates_in_sql(self) -> None:
+        intent = ExtractedIntent(
+            occasion=Occasion.birthday,
+            dietary=["Vegan"],
+            keywords=["birthday", "fruit"],
+            needs_clarification=True,
+            clarifying_question="Who is it for?",
+            confidence=0.5,
+        )
+
+        with (
+            patch("app.routers.chat.get_settings", return_value=self.settings),
+            patch("app.routers.chat.extract_intent", return_value=intent),
+        ):
+            res = self.client.post("/api/chat", json={"message": "Vegan birthday gift", "history": []})
+
+        self.assertEqual(res.status_code, 200)
+        session_id = res.json()["session_id"]
+        try:
+            db = SessionLocal()
+            try:
+                log = db.execute(select(IntentLog).where(IntentLog.session_id == session_id)).scalar_one()
+                self.assertEqual(log.keywords, [])
+                self.assertEqual(
+                    sorted((t.kind, t.value) for t in log.terms),
+                    [("dietary", "vegan"), ("keyword", "birthday"), ("keyword", "fruit")],
+                )
+                self.assertGreaterEqual(term_count(db, "dietary", "VEGAN"), 1)
+                self.assertIn("birthday", dict(term_frequencies(db, "keyword", limit=100)))
+            finally:
+                db.close()
+
+            res = self.client.get("/api/analytics/intents/terms", params={"kind": "dietary"})
+            self.assertEqual(res.status_code, 200)
+            self.assertIn("vegan", [t["value"] for t in res.json()["terms"]])
+        finally:
+            self._cleanup_session(session_id)
+
+    def test_json_mode_also_writes_terms(self) -> None:
+        intent = ExtractedIntent(keywords=["cookies"], dietary=["Kosher"], needs_clarification=True,
+                                 clarifying_question="Who is it for?", confidence=0.5)
+        json_settings = get_settings().model_copy(update={"intent_storage": "json"})
+        with (
+            patch("app.routers.chat.get_settings", return_value=json_settings),
+            patch("app.routers.chat.extract_intent", return_value=intent),
+        ):
+            res = self.client.post("/api/chat", json={"message": "Kosher cookies", "history": []})
+
+        session_id = res.json()["session_id"]
+        try:
+            db = SessionLocal()
+            try:
+                log = db.execute(select(IntentLog).where(IntentLog.session_id == session_id)).scalar_one()
+                self.assertEqual((log.keywords, log.dietary), (["cookies"], ["Kosher"]))
+                self.assertEqual(
+                    sorted((t.kind, t.value) for t in log.terms), [("dietary", "kosher"), ("keyword", "cookies")]
+                )
+            finally:
+                db.close()
+        finally:
+            self._cleanup_session(session_id)
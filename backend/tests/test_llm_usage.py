@@ -0,0 +1,136 @@
+import json
+import unittest
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from fastapi.testclient import TestClient
+from sqlalchemy import delete
+
+from app.base import Base
+from app.database import SessionLocal, engine
+from app.main import app
+from app.models import Conversation, IntentLog, LLMUsage, Session as DBSession
+from app.prompts.product_curator import CURATION_SYSTEM_PROMPT, build_curation_prompt
+from app.schemas import EdibleProduct
+from app.services.llm import estimate_cost
+from benchmarks.bench_prompt_cache import legacy_curation_prompt, synthetic_turns
+from benchmarks.stubs import PrefixCacheModel
+
+
+def _completion(content: str, prompt: int, completion: int, cached: int) -> SimpleNamespace:
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+        usage=SimpleNamespace(
+            prompt_tokens=prompt,
+            completion_tokens=completion,
+            prompt_tokens_details=SimpleNamespace(cached_tokens=cached),
+        ),
+    )
+
+
+INTENT_JSON = json.dumps(
+    {"occasion": "birthday", "keywords": ["birthday"], "needs_clarification": False, "confidence": 0.9}
+)
+PRODUCT = EdibleProduct(
+    sku="ABC-123",
+    name="Fresh Fruit Bouquet",
+    price=39.99,
+    image_url="https://example.test/img1.jpg",
+    description="A fresh assortment of fruit.",
+    pdp_url="https://example.test/p/abc-123",
+)
+
+
+class CostEstimateTests(unittest.TestCase):
+    def test_cached_tokens_are_billed_at_cached_rate(self) -> None:
+        full = estimate_cost("gpt-4o", 1_000_000, 0)
+        cached = estimate_cost("gpt-4o-2024-08-06", 1_000_000, 0, cached_prompt_tokens=1_000_000)
+
+        self.assertAlmostEqual(full, 2.50)
+        self.assertAlmostEqual(cached, 1.25)
+        self.assertAlmostEqual(estimate_cost("gpt-4o-mini", 0, 1_000_000), 0.60)
+        self.assertEqual(estimate_cost("unknown-model", 1000, 1000), 0.0)
+
+
+class PromptLayoutTests(unittest.TestCase):
+    def test_catalog_prefix_is_shared_across_customers(self) -> None:
+        (summary_a, catalog), (summary_b, _) = synthetic_turns(2, searches=1, products=15)
+        self.assertNotEqual(summary_a, summary_b)
+        first, second = build_curation_prompt(summary_a, catalog), build_curation_prompt(summary_b, catalog)
+        self.assertTrue(first.startswith("CATALOG"))
+        self.assertEqual(first[:first.index("CUSTOMER INTENT")], second[:second.index("CUSTOMER INTENT")])
+
+        for build, expect_cached in ((legacy_curation_prompt, False), (build_curation_prompt, True)):
+            cache = PrefixCacheModel()
+            for summary in (summary_a, summary_b):
+                messages = [
+                    {"role": "system", "content": CURATION_SYSTEM_PROMPT},
+                    {"role": "user", "content": build(summary, catalog)},
+                ]
+                prompt_tokens, cached = cache.lookup(messages)
+            self.assertEqual(cached > prompt_tokens * 0.8, expect_cached)
+
+
+class LLMUsageAccountingTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        Base.metadata.create_all(bind=engine)
+
+    def setUp(self) -> None:
+        self.client = TestClient(app)
+
+    def tearDown(self) -> None:
+        self.client.close()
+
+    def _cleanup_session(self, session_id: str) -> None:
+        db = SessionLocal()
+        try:
+            for model in (LLMUsage, IntentLog, Conversation):
+                db.execute(delete(model).where(model.session_id == session_id))
+            db.execute(delete(DBSession).where(DBSession.id == session_id))
+            db.commit()
+        finally:
+            db.close()
+
+    def test_chat_turn_records_usage_and_cost_breakdown(self) -> None:
+        fake_client = MagicMock()
+        fake_client.chat.completions.create.side_effect = [
+            _completion(INTENT_JSON, prompt=1200, completion=80, cached=1024),
+            _completion("Fresh Fruit Bouquet (SKU: ABC-123): Bright and cheerful.", prompt=900, completion=120, cached=0),
+        ]
+
+        started = datetime.utcnow() - timedelta(seconds=1)
+        with (
+            patch("app.services.llm.get_openai_client", return_value=fake_client),
+            patch("app.routers.chat.search_products", return_value=[PRODUCT]),
+        ):
+            res = self.client.post("/api/chat", json={"message": "Birthday gift", "history": []})
+        cache_keys = [c.kwargs["extra_body"]["prompt_cache_key"] for c in fake_client.chat.completions.create.call_args_list]
+        self.assertEqual(cache_keys, ["intent-v1", "curation-v2"])
+
+        self.assertEqual(res.status_code, 200)
+        session_id = res.json()["session_id"]
+        try:
+            res = self.client.get(f"/api/analytics/sessions/{session_id}/cost")
+            self.assertEqual(res.status_code, 200)
+            body = res.json()
+            stages = {s["stage"]: s for s in body["stages"]}
+
+            self.assertEqual(set(stages), {"intent", "curation"})
+            self.assertEqual(stages["intent"]["cached_prompt_tokens"], 1024)
+            self.assertEqual(stages["curation"]["model"], "gpt-4o-mini")
+            self.assertEqual(body["total_tokens"], 1200 + 80 + 900 + 120)
+            self.assertGreater(body["total_cost_usd"], 0)
+            self.assertEqual(stages["intent"]["cached_prompt_ratio"], 0.853)
+
+            res = self.client.get("/api/analytics/llm/prompt-cache", params={"since": started.isoformat()})
+            usage = {(row["stage"], row["prompt_version"]): row for row in res.json()["usage"]}
+            self.assertEqual(usage[("intent", "intent-v1")]["cached_prompt_ratio"], 0.853)
+            self.assertEqual(usage[("curation", "curation-v2")]["cached_prompt_tokens"], 0)
+        finally:
+            self._cleanup_session(session_id)
+
+    def test_cost_for_unknown_session_is_404(self) -> None:
+        res = self.client.get("/api/analytics/sessions/does-not-exist/cost")
+        self.assertEqual(res.status_code, 404)
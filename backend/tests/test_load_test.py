@@ -0,0 +1,66 @@
+import unittest
+
+import httpx
+from openai import OpenAI
+
+from benchmarks.load_test import compare, parse_mix
+from benchmarks.stubs import EdibleStub, LatencyModel, OpenAIStub
+from app.prompts.intent_extractor import INTENT_SYSTEM_PROMPT
+from app.services.curation_service import extract_recommended_skus
+from app.services.edible_client import parse_edible_product
+from app.services.intent_service import parse_intent_response
+
+
+def _report(p95: float, error_rate: float = 0.0) -> dict:
+    stats = {
+        "requests": 100,
+        "error_rate": error_rate,
+        "throughput_rps": 50.0,
+        "latency_ms": {"p50": 10.0, "p95": p95, "p99": p95 * 2},
+    }
+    return {"scenarios": {"chat": stats}, "overall": stats}
+
+
+class LoadTestTests(unittest.TestCase):
+    def test_latency_specs(self) -> None:
+        self.assertEqual(LatencyModel("fixed:25").sample_ms(), 25.0)
+        self.assertTrue(20 <= LatencyModel("uniform:20-30", seed=1).sample_ms() <= 30)
+        self.assertGreater(LatencyModel("lognormal:100,0.5", seed=1).sample_ms(), 0)
+        with self.assertRaises(ValueError):
+            LatencyModel("gaussian:1")
+
+    def test_stubs_speak_upstream_formats(self) -> None:
+        with EdibleStub() as edible, OpenAIStub() as llm:
+            raw = httpx.post(edible.search_url, json={"keyword": "birthday"}).json()
+            products = [parse_edible_product(item) for item in raw]
+            client = OpenAI(api_key="stub", base_url=llm.base_url, max_retries=0)
+
+            intent = client.chat.completions.create(
+                model="gpt-4o",
+                messages=[{"role": "system", "content": INTENT_SYSTEM_PROMPT}, {"role": "user", "content": "gift"}],
+            )
+            catalog = '[{"sku": "%s", "name": "%s"}]' % (products[0].sku, products[0].name)
+            curation = client.chat.completions.create(
+                model="gpt-4o-mini",
+                messages=[{"role": "system", "content": "curate"}, {"role": "user", "content": catalog}],
+            )
+
+        self.assertEqual(len(products), 24)
+        self.assertFalse(parse_intent_response(intent.choices[0].message.content).needs_clarification)
+        self.assertGreater(intent.usage.prompt_tokens, 0)
+        self.assertEqual(extract_recommended_skus(curation.choices[0].message.content, products), [products[0]])
+
+    def test_injected_errors(self) -> None:
+        with EdibleStub(error_rate=1.0) as edible:
+            res = httpx.post(edible.search_url, json={"keyword": "birthday"})
+        self.assertEqual(res.status_code, 503)
+        self.assertEqual(edible.stats()["injected_errors"], 1)
+
+    def test_compare_flags_regressions(self) -> None:
+        self.assertEqual(parse_mix("chat=3,search=1,export=0"), {"chat": 3, "search": 1})
+        _, regressed = compare(_report(100.0), _report(105.0), max_regression=0.1, max_error_increase=0.01)
+        self.assertFalse(regressed)
+        _, regressed = compare(_report(100.0), _report(150.0), max_regression=0.1, max_error_increase=0.01)
+        self.assertTrue(regressed)
+        _, regressed = compare(_report(100.0), _report(100.0, 0.05), max_regression=0.1, max_error_increase=0.01)
+        self.assertTrue(regressed)
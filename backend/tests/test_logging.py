@@ -0,0 +1,125 @@
+import io
+import json
+import logging
+import queue
+import threading
+import unittest
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import log
+from app.log import (
+    EventAggregator,
+    JSONFormatter,
+    NonBlockingQueueHandler,
+    RequestContextFilter,
+    RequestIdMiddleware,
+    configure_logging,
+)
+from app.metrics import LOG_RECORDS_DROPPED
+
+
+class _ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records: list[logging.LogRecord] = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def _logger(name: str) -> tuple[logging.Logger, _ListHandler]:
+    logger = logging.getLogger(name)
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    handler = _ListHandler()
+    handler.addFilter(RequestContextFilter())
+    logger.handlers = [handler]
+    return logger, handler
+
+
+class LoggingTests(unittest.TestCase):
+    def test_full_queue_drops_instead_of_blocking(self) -> None:
+        handler = NonBlockingQueueHandler(queue.Queue(maxsize=1))
+        logger = logging.getLogger("tests.dropping")
+        logger.propagate = False
+        logger.handlers = [handler]
+        before = LOG_RECORDS_DROPPED.value()
+
+        for i in range(3):
+            logger.warning("event %d", i)
+
+        self.assertEqual(LOG_RECORDS_DROPPED.value() - before, 2)
+        self.assertEqual(handler.queue.get_nowait().msg, "event 0")
+
+    def test_aggregator_emits_one_summary_per_window(self) -> None:
+        logger, handler = _logger("tests.aggregate")
+        aggregator = EventAggregator(logger, "parse_error", "parse errors", window_seconds=3600, sample_rate=0.0)
+
+        for i in range(250):
+            aggregator.hit(f"bad product {i}", sku=f"S{i}")
+        self.assertEqual(handler.records, [])
+
+        aggregator.flush(force=True)
+        [summary] = handler.records
+        self.assertTrue(summary.getMessage().startswith("250 parse errors in last"))
+        self.assertEqual(summary.fields["count"], 250)
+        self.assertEqual(summary.fields["sku"], "S0")
+
+    def test_json_formatter_includes_request_id_and_fields(self) -> None:
+        record = logging.LogRecord("app", logging.INFO, __file__, 1, "Fetched %d", (3,), None)
+        record.request_id = "req-1"
+        record.fields = {"keyword": "birthday"}
+        payload = json.loads(JSONFormatter().format(record))
+        self.assertEqual(payload["msg"], "Fetched 3")
+        self.assertEqual(payload["request_id"], "req-1")
+        self.assertEqual(payload["keyword"], "birthday")
+
+    def test_request_id_reaches_logs_in_threadpool_and_response(self) -> None:
+        logger, handler = _logger("tests.request_id")
+        test_app = FastAPI()
+
+        @test_app.get("/work")
+        def work():
+            logger.info("working")
+            return {"ok": True}
+
+        test_app.add_middleware(RequestIdMiddleware)
+        with TestClient(test_app) as client:
+            given = client.get("/work", headers={"X-Request-ID": "abc123"})
+            generated = client.get("/work")
+
+        self.assertEqual(given.headers["x-request-id"], "abc123")
+        self.assertTrue(generated.headers["x-request-id"])
+        self.assertEqual([r.request_id for r in handler.records], ["abc123", generated.headers["x-request-id"]])
+
+    def test_configure_logging_is_idempotent(self) -> None:
+        previous = log._configured
+        root = logging.getLogger()
+        first, second = io.StringIO(), io.StringIO()
+        mine = _ListHandler()
+        try:
+            configure_logging("INFO", "json", 100, stream=first)
+            root.addHandler(mine)
+            threads = threading.active_count()
+            configure_logging("INFO", "json", 100, stream=first)
+            self.assertEqual(threading.active_count(), threads)
+
+            logging.getLogger("tests.reconfigure").warning("before")
+            configure_logging("INFO", "json", 100, stream=second)
+            logging.getLogger("tests.reconfigure").warning("after")
+            configure_logging("INFO", "json", 100, stream=second)
+        finally:
+            root.removeHandler(mine)
+            log.stop_logging()
+            if previous is not None:
+                configure_logging(*previous)
+
+        flushers = [t for t in threading.enumerate() if t.name == "log-aggregator-flush"]
+        self.assertLessEqual(len(flushers), 1)
+        self.assertIn('"msg": "before"', first.getvalue())
+        self.assertIn('"msg": "after"', second.getvalue())
+        self.assertNotIn("after", first.getvalue())
+        messages = [r.getMessage() for r in mine.records if r.name == "tests.reconfigure"]
+        self.assertEqual(messages, ["before", "after"])
@@ -0,0 +1,61 @@
+import unittest
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from app import metrics
+from app.config import get_settings
+from app.main import app
+from app.schemas import ExtractedIntent
+
+
+class MetricsTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.client = TestClient(app)
+        self.enabled = get_settings().model_copy(update={"metrics_enabled": True})
+
+    def tearDown(self) -> None:
+        self.client.close()
+
+    def test_histogram_renders_prometheus_buckets(self) -> None:
+        histogram = metrics.Histogram("test_latency_seconds", "Test.", ("stage",), buckets=(0.1, 1.0))
+        try:
+            histogram.observe(0.05, stage="a")
+            histogram.observe(0.5, stage="a")
+            lines = histogram.render()
+        finally:
+            metrics.REGISTRY.remove(histogram)
+
+        self.assertIn('test_latency_seconds_bucket{stage="a",le="0.1"} 1', lines)
+        self.assertIn('test_latency_seconds_bucket{stage="a",le="+Inf"} 2', lines)
+        self.assertIn('test_latency_seconds_count{stage="a"} 2', lines)
+
+    def test_chat_response_carries_server_timing(self) -> None:
+        intent = ExtractedIntent(needs_clarification=True, clarifying_question="What's the occasion?")
+        with (
+            patch("app.routers.chat.extract_intent", return_value=intent),
+            patch("app.routers.chat.save_conversation"),
+            patch("app.routers.chat.save_intent_log"),
+            patch("app.routers.chat.get_or_create_session") as get_session,
+        ):
+            get_session.return_value.id = "session-1"
+            res = self.client.post("/api/chat", json={"message": "Need a gift", "history": []})
+
+        self.assertEqual(res.status_code, 200)
+        self.assertIn("total;dur=", res.headers["server-timing"])
+
+    def test_metrics_endpoint_is_disabled_by_default(self) -> None:
+        self.assertEqual(self.client.get("/metrics").status_code, 404)
+
+    def test_metrics_endpoint_exposes_stage_latency_and_cache_ratio(self) -> None:
+        with patch.object(metrics, "settings", self.enabled), patch("app.main.settings", self.enabled):
+            with metrics.span("unit_test_stage"):
+                pass
+            metrics.record_cache_lookup("unit_test_cache", hit=True)
+            metrics.record_cache_lookup("unit_test_cache", hit=False)
+            res = self.client.get("/metrics")
+
+        self.assertEqual(res.status_code, 200)
+        self.assertIn('pipeline_stage_duration_seconds_count{stage="unit_test_stage"} 1', res.text)
+        self.assertIn('cache_hit_ratio{cache="unit_test_cache"} 0.5', res.text)
+        self.assertIn("http_requests_in_flight", res.text)
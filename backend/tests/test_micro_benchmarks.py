@@ -0,0 +1,22 @@
+import unittest
+
+from benchmarks.micro import build_cases, compare, time_case
+
+
+class MicroBenchmarkTests(unittest.TestCase):
+    def test_every_case_runs(self) -> None:
+        for name, func in build_cases().items():
+            with self.subTest(case=name):
+                func()
+
+    def test_time_case_calibrates_loops(self) -> None:
+        result = time_case(lambda: sum(range(10)), repeat=3, min_time=0.001)
+        self.assertGreater(result["loops"], 1)
+        self.assertLessEqual(result["min_us"], result["median_us"])
+
+    def test_compare_reports_regressions_beyond_threshold(self) -> None:
+        baseline = {"results": {"a": {"median_us": 10.0}, "b": {"median_us": 10.0}}}
+        current = {"results": {"a": {"median_us": 11.0}, "b": {"median_us": 13.0}, "c": {"median_us": 1.0}}}
+        lines, regressions = compare(baseline, current, threshold=0.15)
+        self.assertEqual(regressions, ["b"])
+        self.assertTrue(any(line.startswith("c ") and line.endswith("new") for line in lines))
@@ -0,0 +1,155 @@
+import time
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from sqlalchemy import delete, select
+
+from app import prewarm
+from app.base import Base
+from app.cache import CacheError, MemoryBackend, NamespacedCache, cache_errors
+from app.database import SessionLocal, engine
+from app.models import IntentLog, IntentTerm, Session as DBSession
+from app.prewarm import CoverageTracker, backtest_coverage, next_run_at, parse_schedule, prefetch_keywords
+from app.schemas import EdibleProduct
+from app.services import edible_client
+from app.services.intent_analytics import build_intent_term_rows, keyword_demand
+from benchmarks.stubs import EdibleStub
+
+# Far from the timestamps other tests write
+BASE = datetime(2001, 3, 1, 12, 0)
+
+
+class KeywordDemandTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        Base.metadata.create_all(bind=engine)
+        db = SessionLocal()
+        try:
+            session = DBSession()
+            db.add(session)
+            db.flush()
+            cls.session_id = session.id
+            rows = [
+                # (minutes after BASE, occasion, keywords, intent_storage_mode)
+                (-90, "birthday", ["Fruit", "birthday"], "json"),
+                (-60, "birthday", ["fruit", "chocolate"], "json"),
+                (-30, "sympathy", ["fruit", "flowers"], "normalized"),
+                (-20, "thank_you", ["cookies"], "normalized"),
+                (10, "birthday", ["fruit"], "json"),
+                (20, None, ["cookies", "balloons"], "json"),
+                (30, None, ["chocolate"], "normalized"),
+            ]
+            for minutes, occasion, keywords, mode in rows:
+                # Written the way save_intent_log does: terms in both modes, JSON columns in json mode
+                log = IntentLog(
+                    session_id=session.id, occasion=occasion, keywords=keywords if mode == "json" else [],
+                    created_at=BASE + timedelta(minutes=minutes),
+                )
+                log.terms = [
+                    IntentTerm(kind=row["kind"], value=row["value"])
+                    for row in build_intent_term_rows("", [], keywords)
+                ]
+                db.add(log)
+            db.commit()
+        finally:
+            db.close()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        db = SessionLocal()
+        try:
+            logs = select(IntentLog.id).where(IntentLog.session_id == cls.session_id)
+            db.execute(delete(IntentTerm).where(IntentTerm.intent_log_id.in_(logs)))
+            db.execute(delete(IntentLog).where(IntentLog.session_id == cls.session_id))
+            db.execute(delete(DBSession).where(DBSession.id == cls.session_id))
+            db.commit()
+        finally:
+            db.close()
+
+    def test_demand_counts_each_log_once_in_both_storage_modes(self) -> None:
+        db = SessionLocal()
+        try:
+            demand = dict(keyword_demand(db, since=BASE - timedelta(hours=2), until=BASE, limit=None))
+        finally:
+            db.close()
+        self.assertEqual(demand["fruit"], 3)
+        self.assertEqual(demand["birthday"], 2)  # max(keyword 1, occasion 2)
+        self.assertEqual(demand["thank you"], 1)
+        self.assertEqual(demand["cookies"], 1)
+
+    def test_backtest_reports_share_of_next_hour_already_warm(self) -> None:
+        db = SessionLocal()
+        try:
+            result = backtest_coverage(db, BASE, window_hours=2, top_n=3)
+        finally:
+            db.close()
+        # Warm: fruit, birthday, chocolate. Next hour: fruit, cookies, balloons, chocolate
+        self.assertEqual((result["requests"], result["warm_requests"]), (4, 2))
+        self.assertEqual(result["coverage"], 0.5)
+
+
+class PrefetchTests(unittest.TestCase):
+    def test_prefetch_fills_cache_under_rate_limit(self) -> None:
+        catalog = NamespacedCache("catalog", list[EdibleProduct], 60, backend=MemoryBackend())
+        keywords = ["fruit", "chocolate", "cookies", "flowers", "sympathy", "birthday"]
+        with (
+            EdibleStub() as edible,
+            patch.object(edible_client.settings, "edible_api_url", edible.search_url),
+            patch.object(edible_client, "catalog_cache", catalog),
+        ):
+            start = time.perf_counter()
+            summary = prefetch_keywords(keywords, concurrency=3, rate_per_second=20)
+            elapsed = time.perf_counter() - start
+
+        self.assertEqual((summary["fetched"], summary["failed"]), (6, 0))
+        self.assertTrue(all(catalog.get(k) for k in keywords))
+        # A burst of 20 allowed; the rest come at 20/s
+        self.assertLess(elapsed, 2.0)
+
+    def test_rate_limiter_spaces_requests(self) -> None:
+        limiter = prewarm.RateLimiter(rate_per_second=50)
+        start = time.perf_counter()
+        for _ in range(60):
+            limiter.acquire()
+        self.assertGreaterEqual(time.perf_counter() - start, 0.15)
+
+    def test_scheduled_slot_runs_once_across_workers(self) -> None:
+        locks = NamespacedCache("prewarm-lock", str, 60, backend=MemoryBackend())
+        with (
+            patch.object(prewarm, "prewarm_locks", locks),
+            patch.object(prewarm, "hot_keywords", return_value=[("fruit", 3)]),
+            patch.object(prewarm, "prefetch_keywords", return_value={"keywords": 1, "fetched": 1}),
+        ):
+            first = prewarm.run_prewarm("2025-01-01T07:30")
+            second = prewarm.run_prewarm("2025-01-01T07:30")
+        self.assertEqual(first["fetched"], 1)
+        self.assertIsNone(second)
+
+    def test_slot_is_skipped_when_the_lock_backend_fails(self) -> None:
+        locks = NamespacedCache("prewarm-lock", str, 60, backend=MemoryBackend())
+        with (
+            patch.object(prewarm, "prewarm_locks", locks),
+            patch.object(locks.backend, "add", side_effect=CacheError("down")),
+            patch.object(prewarm, "prefetch_keywords") as prefetch,
+        ):
+            self.assertIsNone(prewarm.run_prewarm("2025-01-01T11:30"))
+        prefetch.assert_not_called()
+        cache_errors.flush(force=True)
+
+
+class CoverageTrackerTests(unittest.TestCase):
+    def test_counts_lookups_within_horizon(self) -> None:
+        tracker = CoverageTracker(horizon=timedelta(hours=1))
+        tracker.observe("fruit")  # before any run: ignored
+        tracker.start(["fruit", "chocolate"])
+        for keyword in ("fruit", "fruit", "cookies", "chocolate"):
+            tracker.observe(keyword)
+        current = tracker.snapshot()["current"]
+        self.assertEqual((current["requests"], current["warm_requests"], current["coverage"]), (4, 3, 0.75))
+
+    def test_next_run_is_the_next_scheduled_time_of_day(self) -> None:
+        times = parse_schedule("17:00, 07:30")
+        self.assertEqual(times, [(7, 30), (17, 0)])
+        self.assertEqual(next_run_at(times, datetime(2025, 1, 1, 8, 0)), datetime(2025, 1, 1, 17, 0))
+        self.assertEqual(next_run_at(times, datetime(2025, 1, 1, 18, 0)), datetime(2025, 1, 2, 7, 30))
@@ -0,0 +1,110 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+from fastapi.testclient import TestClient
+
+from app.base import Base
+from app.cache import MemoryBackend, NamespacedCache
+from app.database import engine
+from app.main import app
+from app.schemas import EdibleProduct, ExtractedIntent, Message
+from app.services.curation_service import curate_products, extract_recommended_skus
+from app.services import product_mentions
+from app.services.product_mentions import MentionMatcher, find_mentioned_product, longest_matches, words
+
+
+def _product(sku: str, name: str, price: float = 49.99) -> EdibleProduct:
+    return EdibleProduct(sku=sku, name=name, price=price, image_url="", description="Fresh and dipped.",
+                         tags=["Berries"], pdp_url=f"/{sku}")
+
+
+SHOWN = [
+    _product("1003-sm", "Chocolate Dipped Berry Box"),
+    _product("2040-lg", "Fresh Fruit Bouquet", 64.99),
+    _product("3001-std", "Dipped Berry Cake", 39.99),
+]
+HISTORY = [
+    Message(role="user", content="birthday gift for my sister"),
+    Message(role="assistant", content="\n".join(f"{p.name} (SKU: {p.sku}): a lovely pick." for p in SHOWN)),
+]
+
+
+class MentionMatcherTests(unittest.TestCase):
+    def test_overlapping_patterns_match_on_word_boundaries(self) -> None:
+        matcher = MentionMatcher()
+        for pattern in ("berry box", "dipped berry box", "box", "fruit"):
+            matcher.add(pattern, pattern)
+        tokens = words("A dipped berry box, not a blueberry boxes or fruity thing")
+        found = sorted((start, stop, value) for start, stop, value in matcher.find(tokens))
+        self.assertEqual(found, [(1, 4, "dipped berry box"), (2, 4, "berry box"), (3, 4, "box")])
+        self.assertEqual(longest_matches(found), [(1, 4, "dipped berry box")])
+
+
+class RecommendedProductTests(unittest.TestCase):
+    def test_names_match_whole_words_longest_first(self) -> None:
+        products = [_product("BB", "Berry Box"), _product("DBB", "Dipped Berry Box"), _product("FB", "Fruit Bouquet")]
+        reply = "Try the blueberry boxes, a fruit bouquet, or the dipped berry box."
+        self.assertEqual([p.sku for p in extract_recommended_skus(reply, products)], ["FB", "DBB"])
+
+    def test_only_products_sent_to_the_llm_are_recommended(self) -> None:
+        products = [_product(f"P{i}", f"Gift {i}") for i in range(15)] + [_product("LATE", "Berry Box")]
+        response = MagicMock()
+        response.choices[0].message.content = "The Berry Box (SKU: LATE) and Gift 3 are lovely."
+        with patch("app.services.curation_service.chat_completion", return_value=response):
+            _, recommended = curate_products(ExtractedIntent(), products)
+        self.assertEqual([p.sku for p in recommended], ["P3"])
+
+
+class FollowUpTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.store = NamespacedCache("product", EdibleProduct, 60, backend=MemoryBackend())
+        self.store.set_many({p.sku: p for p in SHOWN})
+        patcher = patch.object(product_mentions, "product_cache", self.store)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_shown_products_are_recognized_by_phrase_name_or_sku(self) -> None:
+        for message, sku in (
+            ("tell me more about the berry box", "1003-sm"),
+            ("The fresh fruit bouquet?", "2040-lg"),
+            ("what's in 3001-STD", "3001-std"),
+            ("3001-STD?", "3001-std"),
+        ):
+            with self.subTest(message=message):
+                self.assertEqual(find_mentioned_product(message, HISTORY).sku, sku)
+
+    def test_new_requests_and_ambiguous_mentions_run_the_full_pipeline(self) -> None:
+        for message in (
+            "something cheaper than the berry box",
+            "tell me more about the dipped berry",  # phrase shared by two shown products
+            "I need a fruit bouquet for my mom's birthday next week with a card",
+            "Can 2040-LG be delivered today to Boston for my mom's birthday?",  # SKU inside a new request
+            "tell me more about the berry box",  # nothing shown in this session
+        ):
+            with self.subTest(message=message):
+                history = [] if message == "tell me more about the berry box" else HISTORY
+                self.assertIsNone(find_mentioned_product(message, history))
+
+
+class ChatFollowUpTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        Base.metadata.create_all(bind=engine)
+
+    def test_follow_up_is_answered_from_the_stored_record(self) -> None:
+        store = NamespacedCache("product", EdibleProduct, 60, backend=MemoryBackend())
+        store.set_many({p.sku: p for p in SHOWN})
+        with (
+            patch.object(product_mentions, "product_cache", store),
+            patch("app.routers.chat.extract_intent") as extract_intent,
+        ):
+            response = TestClient(app).post("/api/chat", json={
+                "message": "Tell me more about the berry box",
+                "history": [m.model_dump() for m in HISTORY],
+            })
+
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual([p["sku"] for p in body["products"]], ["1003-sm"])
+        self.assertIn("(SKU: 1003-sm)", body["reply"])
+        extract_intent.assert_not_called()
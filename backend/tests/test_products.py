@@ -0,0 +1,52 @@
+import unittest
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from app.cache import MemoryBackend, NamespacedCache
+from app.main import app
+from app.schemas import EdibleProduct
+from app.services import edible_client
+from benchmarks.stubs import EdibleStub
+
+
+class ProductLookupTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.store = NamespacedCache("product", EdibleProduct, 60, backend=MemoryBackend())
+        self.catalog = NamespacedCache("catalog", list[EdibleProduct], 60, backend=MemoryBackend())
+        self.edible = EdibleStub().start()
+        self.patches = [
+            patch.object(edible_client.settings, "edible_api_url", self.edible.search_url),
+            patch.object(edible_client, "catalog_cache", self.catalog),
+            patch.object(edible_client, "product_cache", self.store),
+        ]
+        for p in self.patches:
+            p.start()
+        self.client = TestClient(app)
+
+    def tearDown(self) -> None:
+        for p in reversed(self.patches):
+            p.stop()
+        self.edible.stop()
+
+    def test_fetched_products_are_served_by_sku_without_upstream_calls(self) -> None:
+        products = edible_client.fetch_single_keyword("fruit")
+        requests = self.edible.requests
+        skus = [p.sku for p in products[:3]]
+
+        response = self.client.get("/api/products", params={"sku": [skus[1], "NOPE", skus[0], skus[1]]})
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual([p["sku"] for p in body["products"]], [skus[1], skus[0]])
+        self.assertEqual(body["missing"], ["NOPE"])
+        self.assertEqual(body["products"][1]["name"], products[0].name)
+
+        posted = self.client.post("/api/products", json={"skus": skus}).json()
+        self.assertEqual([p["sku"] for p in posted["products"]], skus)
+        self.assertEqual(self.edible.requests, requests)
+
+    def test_lookup_size_is_bounded(self) -> None:
+        self.assertEqual(self.client.get("/api/products").status_code, 422)
+        self.assertEqual(self.client.post("/api/products", json={"skus": []}).status_code, 422)
+        too_many = [f"SKU-{i}" for i in range(edible_client.settings.product_lookup_max_skus + 1)]
+        self.assertEqual(self.client.post("/api/products", json={"skus": too_many}).status_code, 422)
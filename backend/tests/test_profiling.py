@@ -0,0 +1,105 @@
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.config import get_settings
+from app.main import app
+from app.metrics import span
+from app.profiling import ProfileStore, ProfilingMiddleware, sign_profile_token, verify_profile_token
+
+
+def _busy_handler():
+    with span("busy_stage"):
+        deadline = time.perf_counter() + 0.1
+        while time.perf_counter() < deadline:
+            pass
+    return {"ok": True}
+
+
+class ProfilingTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = ProfileStore(self.tmp.name, max_files=3)
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def test_token_roundtrip_and_expiry(self) -> None:
+        token = sign_profile_token("secret", ttl_seconds=60, now=1000)
+        self.assertTrue(verify_profile_token("secret", token, now=1030))
+        self.assertFalse(verify_profile_token("secret", token, now=1061))
+        self.assertFalse(verify_profile_token("other", token, now=1030))
+        self.assertFalse(verify_profile_token("", token, now=1030))
+
+    def test_store_evicts_oldest_profiles(self) -> None:
+        names = []
+        for i in range(5):
+            names.append(self.store.save("GET", f"/api/item/{i}", "main 1\n"))
+            time.sleep(0.002)
+        stored = [entry["name"] for entry in self.store.list()]
+        self.assertEqual(stored, list(reversed(names[2:])))
+        self.assertIsNone(self.store.path("../../etc/passwd"))
+
+    def test_signed_request_is_profiled_including_threadpool_work(self) -> None:
+        test_app = FastAPI()
+        test_app.get("/busy")(_busy_handler)
+        test_app.get("/idle")(lambda: {"ok": True})
+        test_app.add_middleware(ProfilingMiddleware, store=self.store, secret="s3cret", interval_ms=1)
+
+        with TestClient(test_app) as client:
+            client.get("/idle")
+            client.get("/busy", headers={"X-Profile": "1.bad"})
+            self.assertEqual(self.store.list(), [])
+
+            res = client.get("/busy", headers={"X-Profile": sign_profile_token("s3cret")})
+
+        self.assertEqual(res.status_code, 200)
+        [entry] = self.store.list()
+        self.assertIn("-GET-busy-", entry["name"])
+        with open(self.store.path(entry["name"]), encoding="utf-8") as f:
+            self.assertIn("_busy_handler", f.read())
+
+    def test_profile_is_saved_off_the_event_loop(self) -> None:
+        test_app = FastAPI()
+        loop_threads = []
+
+        @test_app.get("/async")
+        async def on_loop():
+            loop_threads.append(threading.get_ident())
+            return {"ok": True}
+
+        test_app.add_middleware(ProfilingMiddleware, store=self.store, secret="s3cret", interval_ms=1)
+        save = self.store.save
+
+        def save_recording_thread(*args):
+            loop_threads.append(threading.get_ident())
+            return save(*args)
+
+        with (
+            patch.object(self.store, "save", side_effect=save_recording_thread),
+            TestClient(test_app) as client,
+        ):
+            client.get("/async", headers={"X-Profile": sign_profile_token("s3cret")})
+
+        [loop_thread, save_thread] = loop_threads
+        self.assertNotEqual(save_thread, loop_thread)
+        self.assertEqual(len(self.store.list()), 1)
+
+    def test_admin_endpoints_hidden_without_token(self) -> None:
+        client = TestClient(app)
+        self.assertEqual(client.get("/api/admin/profiles").status_code, 404)
+
+        configured = get_settings().model_copy(update={"admin_token": "adm"})
+        with patch("app.routers.admin.settings", configured), patch("app.routers.admin.profile_store", self.store):
+            name = self.store.save("POST", "/api/chat", "main;chat 3\n")
+            self.assertEqual(client.get("/api/admin/profiles", headers={"X-Admin-Token": "nope"}).status_code, 404)
+            listing = client.get("/api/admin/profiles", headers={"X-Admin-Token": "adm"}).json()
+            body = client.get(f"/api/admin/profiles/{name}", headers={"X-Admin-Token": "adm"}).text
+
+        self.assertEqual(listing["profiles"][0]["name"], name)
+        self.assertEqual(body, "main;chat 3\n")
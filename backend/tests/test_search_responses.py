@@ -0,0 +1,82 @@
+import gzip
+import json
+import unittest
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from app.cache import MemoryBackend, NamespacedCache
+from app.main import app
+from app.schemas import EdibleProduct
+from app.search_responses import EncodedResponse, SearchResponseCache
+from app.services import edible_client
+from benchmarks.stubs import EdibleStub
+from benchmarks.synthetic import edible_products
+
+
+class EncodedResponseTests(unittest.TestCase):
+    def test_body_matches_the_response_model_output(self) -> None:
+        products = edible_products(15)
+        encoded = EncodedResponse.from_products(products)
+        expected = [p.model_dump(mode="json") for p in products]
+        self.assertEqual(json.loads(encoded.bodies["identity"]), expected)
+        self.assertEqual(json.loads(gzip.decompress(encoded.bodies["gzip"])), expected)
+
+    def test_coding_follows_accept_encoding(self) -> None:
+        encoded = EncodedResponse.from_products(edible_products(15))
+        self.assertEqual(encoded.choose_coding("gzip, deflate"), "gzip")
+        self.assertEqual(encoded.choose_coding("gzip;q=0, deflate"), "identity")
+        self.assertEqual(encoded.choose_coding(None), "identity")
+        self.assertEqual(EncodedResponse(b"[]").choose_coding("gzip"), "identity")
+
+    def test_empty_results_and_expired_entries_are_not_served(self) -> None:
+        cache = SearchResponseCache(60, 10)
+        cache.put("fruit", EncodedResponse.from_products([], 60))
+        self.assertIsNone(cache.get("fruit"))
+        cache.put("Fruit ", EncodedResponse.from_products(edible_products(3), 60))
+        self.assertIsNotNone(cache.get(" fruit"))
+        with patch("app.search_responses.time.monotonic", return_value=10**10):
+            self.assertIsNone(cache.get("fruit"))
+
+
+class SearchEndpointTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.edible = EdibleStub().start()
+        self.responses = SearchResponseCache(60, 10)
+        self.patches = [
+            patch.object(edible_client.settings, "edible_api_url", self.edible.search_url),
+            patch.object(edible_client, "catalog_cache", NamespacedCache(
+                "catalog", list[EdibleProduct], 60, backend=MemoryBackend())),
+            patch("app.routers.search.search_responses", self.responses),
+        ]
+        for p in self.patches:
+            p.start()
+        self.client = TestClient(app)
+
+    def tearDown(self) -> None:
+        for p in reversed(self.patches):
+            p.stop()
+        self.edible.stop()
+
+    def test_conditional_get_is_not_modified(self) -> None:
+        first = self.client.get("/api/search", params={"keyword": "fruit"}, headers={"Accept-Encoding": "gzip"})
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.headers["content-encoding"], "gzip")
+        self.assertTrue(first.json())
+        etag = first.headers["etag"]
+
+        second = self.client.get("/api/search", params={"keyword": "Fruit"},
+                                 headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second.content, b"")
+        self.assertEqual(second.headers["etag"], etag)
+        self.assertEqual(self.edible.requests, 1)
+
+    def test_post_serves_the_same_encoded_bytes(self) -> None:
+        posted = self.client.post("/api/search", json={"keyword": "fruit"}, headers={"Accept-Encoding": "identity"})
+        fetched = self.client.get("/api/search", params={"keyword": "fruit"}, headers={"Accept-Encoding": "identity"})
+        self.assertEqual(posted.status_code, 200)
+        self.assertNotIn("content-encoding", posted.headers)
+        self.assertEqual(posted.content, fetched.content)
+        self.assertEqual(posted.headers["etag"], fetched.headers["etag"])
+        self.assertEqual(self.edible.requests, 1)
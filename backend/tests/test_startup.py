@@ -0,0 +1,71 @@
+import subprocess
+import sys
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+from fastapi.testclient import TestClient
+
+from app import main, warmup
+from app.cache import MemoryBackend, NamespacedCache
+from app.clients import ClientRegistry
+from app.schemas import EdibleProduct
+from app.services import edible_client
+from benchmarks.stubs import EdibleStub
+
+
+class ClientRegistryTests(unittest.TestCase):
+    def test_clients_are_built_once_on_first_use_and_closed(self) -> None:
+        factory, close = MagicMock(side_effect=lambda: object()), MagicMock()
+        registry = ClientRegistry()
+        registry.register("upstream", factory, close=close)
+        self.assertEqual(registry.created(), [])
+
+        first = registry.get("upstream")
+        self.assertIs(registry.get("upstream"), first)
+        self.assertEqual(factory.call_count, 1)
+
+        registry.close_all()
+        close.assert_called_once_with(first)
+        self.assertIsNot(registry.get("upstream"), first)
+
+    def test_importing_the_app_does_not_import_openai(self) -> None:
+        code = "import sys, app.main; print('openai' in sys.modules)"
+        out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+        self.assertEqual(out.stdout.strip().splitlines()[-1], "False")
+
+
+class WarmUpTests(unittest.TestCase):
+    def test_steps_report_status_and_never_raise(self) -> None:
+        def failing():
+            raise RuntimeError("upstream down")
+
+        steps = {"fast": lambda: None, "failing": failing, "slow": lambda: time.sleep(0.5)}
+        with patch.object(warmup, "WARMUP_STEPS", steps):
+            results = warmup.warm_up(timeout=0.1)
+
+        self.assertEqual(results["fast"]["status"], "ok")
+        self.assertEqual(results["failing"]["status"], "error: upstream down")
+        self.assertEqual(results["slow"]["status"], "timeout")
+
+    def test_edible_step_preloads_catalog_cache(self) -> None:
+        catalog = NamespacedCache("catalog", list[EdibleProduct], 60, backend=MemoryBackend())
+        with (
+            EdibleStub() as edible,
+            patch.object(edible_client.settings, "edible_api_url", edible.search_url),
+            patch.object(edible_client, "catalog_cache", catalog),
+            patch.object(warmup.settings, "warmup_keywords", "fruit, chocolate"),
+        ):
+            warmup.warm_edible()
+
+        self.assertTrue(catalog.get("fruit"))
+        self.assertTrue(catalog.get("chocolate"))
+
+    def test_lifespan_runs_warm_up_before_serving(self) -> None:
+        with (
+            patch.object(main.settings, "warmup_enabled", True),
+            patch("app.main.warm_up") as warm_up,
+            TestClient(main.app) as client,
+        ):
+            warm_up.assert_called_once()
+            self.assertEqual(client.get("/health").status_code, 200)
@@ -0,0 +1,113 @@
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import httpx
+from fastapi.testclient import TestClient
+from openai import OpenAI
+
+from app.base import Base
+from app.config import get_settings
+from app.database import engine
+from app.main import app
+from app.traffic import (
+    TraceWriter,
+    TrafficRecorderMiddleware,
+    anonymize_chat_request,
+    anonymize_text,
+    messages_fingerprint,
+    pseudonymize,
+)
+from benchmarks.replay import index_upstreams, replay
+from benchmarks.stubs import EdibleStub, OpenAIStub
+
+
+class AnonymizationTests(unittest.TestCase):
+    def test_contact_details_are_redacted_idempotently(self) -> None:
+        text = "Send to jane.doe@example.com or call +1 (555) 123-4567, see https://x.test/a"
+        once = anonymize_text(text)
+        self.assertEqual(once, "Send to <email> or call <number>, see <url>")
+        self.assertEqual(anonymize_text(once), once)
+
+    def test_session_pseudonyms_are_stable(self) -> None:
+        body = {"message": "hi", "session_id": "abc", "history": [{"role": "user", "content": "me@x.io"}]}
+        request = anonymize_chat_request(body)
+        self.assertEqual(request["session_id"], pseudonymize("abc"))
+        self.assertNotEqual(request["session_id"], "abc")
+        self.assertEqual(request["history"][0]["content"], "<email>")
+
+    def test_fingerprint_matches_on_anonymized_messages(self) -> None:
+        original = [{"role": "user", "content": "gift for bob@example.com"}]
+        replayed = [{"role": "user", "content": "gift for <email>"}]
+        self.assertEqual(messages_fingerprint(original), messages_fingerprint(replayed))
+
+
+class TrafficRecorderTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        Base.metadata.create_all(bind=engine)
+
+    def test_chat_request_is_recorded_with_upstream_responses(self) -> None:
+        with tempfile.TemporaryDirectory() as workdir, EdibleStub() as edible, OpenAIStub() as llm:
+            path = os.path.join(workdir, "trace.ndjson")
+            writer = TraceWriter(path)
+            recorded_app = TrafficRecorderMiddleware(app, writer, sample_rate=1.0)
+            edible_settings = get_settings().model_copy(update={"edible_api_url": edible.search_url})
+            with (
+                patch(
+                    "app.services.llm.get_openai_client",
+                    return_value=OpenAI(api_key="stub", base_url=llm.base_url, max_retries=0),
+                ),
+                patch("app.services.edible_client.settings", edible_settings),
+            ):
+                client = TestClient(recorded_app)
+                res = client.post("/api/chat", json={"message": "Birthday gift, reply to me@example.com", "history": []})
+                client.get("/health")
+            writer.close()
+
+            with open(path, encoding="utf-8") as f:
+                [trace] = [json.loads(line) for line in f]
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(trace["status"], 200)
+        self.assertEqual(trace["request"]["message"], "Birthday gift, reply to <email>")
+        self.assertIsNone(trace["request"]["session_id"])
+        self.assertEqual(trace["session_id"], pseudonymize(res.json()["session_id"]))
+        kinds = [call["upstream"] for call in trace["upstream"]]
+        self.assertEqual(kinds[0], "openai")
+        self.assertEqual(kinds[-1], "openai")
+        self.assertIn("edible", kinds)
+        self.assertEqual(trace["upstream"][0]["key"]["stage"], "intent")
+
+        recorded = index_upstreams([trace])
+        first = trace["upstream"][0]
+        self.assertIs(recorded.take(f"openai:{first['key']['messages']}", "openai:intent"), first)
+        self.assertIsNotNone(recorded.take("openai:unknown", "openai:curation"))
+        self.assertEqual(recorded.stats(), {"hits": 1, "fallbacks": 1, "misses": 0})
+
+
+class ReplayTests(unittest.TestCase):
+    def test_first_turn_is_linked_to_the_session_of_later_turns(self) -> None:
+        sent = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            body = json.loads(request.content)
+            sent.append(body["session_id"])
+            return httpx.Response(200, json={"session_id": body["session_id"] or "replayed-1"})
+
+        real_client = httpx.AsyncClient
+        traces = [
+            {"ts": 0.0, "request": {"message": "gift", "session_id": None, "history": []}, "session_id": "p1"},
+            {"ts": 0.01, "request": {"message": "for mom", "session_id": "p1", "history": []}, "session_id": "p1"},
+        ]
+        with patch(
+            "benchmarks.replay.httpx.AsyncClient",
+            lambda **kwargs: real_client(**kwargs, transport=httpx.MockTransport(handler)),
+        ):
+            report = asyncio.run(replay("http://replay.test", traces, speed=1.0, timeout=5.0))
+
+        self.assertEqual(sent, [None, "replayed-1"])
+        self.assertEqual(report["overall"]["errors"], 0)
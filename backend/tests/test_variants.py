@@ -0,0 +1,73 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+from app.schemas import EdibleProduct, ExtractedIntent
+from app.services.curation_service import curate_products
+from app.services.variants import collapse_variants, variant_key
+
+
+def _product(sku: str, name: str, price: float) -> EdibleProduct:
+    return EdibleProduct(sku=sku, name=name, price=price, image_url="", description="", tags=[], pdp_url=f"/{sku}")
+
+
+class CollapseVariantsTests(unittest.TestCase):
+    def test_variant_markers_do_not_change_the_key(self) -> None:
+        base = variant_key("Chocolate Dipped Strawberries")
+        for name in (
+            "Chocolate Dipped Strawberries - Large",
+            "Chocolate Dipped Strawberries - 12 Count",
+            "Chocolate Dipped Strawberries with Balloons",
+            "Deluxe Chocolate Dipped Strawberries",
+            "Chocolate Dipped Strawberries Half Dozen",
+        ):
+            with self.subTest(name=name):
+                self.assertEqual(variant_key(name), base)
+        self.assertNotEqual(variant_key("Strawberries Dipped Chocolate"), base)
+        self.assertNotEqual(variant_key("Chocolate Dipped Pineapple"), base)
+
+    def test_groups_keep_first_as_representative_with_variants_by_price(self) -> None:
+        products = [
+            _product("S-LG", "Chocolate Dipped Strawberries - Large", 69.99),
+            _product("FB", "Fresh Fruit Bouquet", 49.99),
+            _product("S-SM", "Chocolate Dipped Strawberries - Small", 39.99),
+            _product("S-BAL", "Chocolate Dipped Strawberries with Balloons", 79.99),
+        ]
+        collapsed = collapse_variants(products)
+
+        self.assertEqual([p.sku for p in collapsed], ["S-LG", "FB"])
+        self.assertEqual([v.sku for v in collapsed[0].variants], ["S-SM", "S-LG", "S-BAL"])
+        self.assertEqual(collapsed[1].variants, [])
+        self.assertEqual(products[0].variants, [])  # inputs are not modified
+
+    def test_names_differing_by_a_non_marker_word_are_grouped(self) -> None:
+        products = [
+            _product("BB", "Berry Bouquet", 44.99),
+            _product("CDP", "Chocolate Dipped Pineapple", 49.99),
+            _product("BBD", "Berry Bouquet Dipped", 54.99),
+            _product("CDS", "Chocolate Dipped Strawberries", 49.99),
+        ]
+        collapsed = collapse_variants(products, min_similarity=0.6)
+
+        self.assertEqual([p.sku for p in collapsed], ["BB", "CDP", "CDS"])
+        self.assertEqual([v.sku for v in collapsed[0].variants], ["BB", "BBD"])
+
+    def test_far_apart_prices_stay_separate(self) -> None:
+        products = [
+            _product("TIN", "Celebration Cookie Tin", 29.99),
+            _product("TIN-XL", "Celebration Cookie Tin - Large", 199.99),
+        ]
+        self.assertEqual(len(collapse_variants(products, max_price_ratio=3.0)), 2)
+
+    def test_variants_stay_out_of_the_curation_prompt(self) -> None:
+        collapsed = collapse_variants([
+            _product("S-LG", "Chocolate Dipped Strawberries - Large", 69.99),
+            _product("S-SM", "Chocolate Dipped Strawberries - Small", 39.99),
+        ])
+        response = MagicMock()
+        response.choices[0].message.content = "Chocolate Dipped Strawberries - Large (SKU: S-LG): a classic."
+        with patch("app.services.curation_service.chat_completion", return_value=response) as completion:
+            _, products = curate_products(ExtractedIntent(), collapsed)
+
+        prompt = completion.call_args.kwargs["messages"][1]["content"]
+        self.assertNotIn("variants", prompt)
+        self.assertEqual(len(products[0].variants), 2)
@@ -1,8 +1,9 @@
 "use client";
 
+import { useEffect, useState } from "react";
 import { EdibleProduct } from "@/types";
 import { motion } from "framer-motion";
-import { trackClick, trackConversion } from "@/lib/api";
+import { getProducts, trackClick, trackConversion } from "@/lib/api";
 
 interface ProductDetailsProps {
   product: EdibleProduct;
@@ -11,17 +12,46 @@ interface ProductDetailsProps {
 }
 
 export function ProductDetails({ product, sessionId, onClose }: ProductDetailsProps) {
+  const variants = product.variants ?? [];
+  const [selectedSku, setSelectedSku] = useState(product.sku);
+  // Current store records for the product and its variants, by SKU
+  const [records, setRecords] = useState<Record<string, EdibleProduct>>({});
+
+  const variantSkus = variants.map((v) => v.sku).join(",");
+
+  useEffect(() => {
+    let cancelled = false;
+    const skus = Array.from(new Set([product.sku, ...variantSkus.split(",").filter(Boolean)]));
+    getProducts(skus)
+      .then(({ products }) => {
+        if (!cancelled) {
+          setRecords(Object.fromEntries(products.map((p) => [p.sku, p])));
+        }
+      })
+      .catch((error) => console.error("Failed to refresh product:", error));
+    return () => {
+      cancelled = true;
+    };
+  }, [product.sku, variantSkus]);
+
+  const shown = variants.find((v) => v.sku === selectedSku) ?? product;
+  const record = records[shown.sku];
+  // The stored record wins, so the click is tracked with the SKU's current name
+  const selected = record
+    ? { ...shown, name: record.name, price: record.price, pdp_url: record.pdp_url || shown.pdp_url }
+    : shown;
+
   const handleViewOnSite = async () => {
     if (sessionId) {
       try {
-        await trackClick(sessionId, product.sku, product.name, 0);
+        await trackClick(sessionId, selected.sku, selected.name, 0);
         await trackConversion(sessionId);
       } catch (error) {
         console.error("Failed to track:", error);
       }
     }
-    if (product.pdp_url) {
-      window.open(product.pdp_url, "_blank", "noopener,noreferrer");
+    if (selected.pdp_url) {
+      window.open(selected.pdp_url, "_blank", "noopener,noreferrer");
     }
   };
 
@@ -88,17 +118,36 @@ export function ProductDetails({ product, sessionId, onClose }: ProductDetailsPr
 
           {/* Name */}
           <h2 className="font-display text-2xl font-semibold text-neutral-900">
-            {product.name}
+            {selected.name}
           </h2>
 
           {/* Price */}
           <div className="flex items-center gap-3">
             <span className="font-display text-3xl font-bold text-edible-red">
-              ${product.price.toFixed(2)}
+              ${selected.price.toFixed(2)}
             </span>
             <span className="text-sm text-neutral-500">Starting price</span>
           </div>
 
+          {/* Size / packaging options */}
+          {variants.length > 1 && (
+            <div className="flex flex-wrap gap-2">
+              {variants.map((variant) => (
+                <button
+                  key={variant.sku}
+                  onClick={() => setSelectedSku(variant.sku)}
+                  className={`px-3 py-2 rounded-xl text-sm border transition-colors ${
+                    variant.sku === selected.sku
+                      ? "border-edible-red bg-red-50 text-edible-red"
+                      : "border-neutral-200 text-neutral-700 hover:border-neutral-300"
+                  }`}
+                >
+                  {variant.name} · ${variant.price.toFixed(2)}
+                </button>
+              ))}
+            </div>
+          )}
+
           {/* Description */}
           {product.description && (
             <p className="text-neutral-600 leading-relaxed">
@@ -1,15 +1,29 @@
-import { ChatRequest, ChatResponse, EdibleProduct } from "@/types";
+import { ChatRequest, ChatResponse, EdibleProduct, ProductLookupResponse } from "@/types";
 
 const API_URL = process.env.NEXT_PUBLIC_API_URL || "http://localhost:8000/api";
 
-export async function sendChatMessage(request: ChatRequest): Promise<ChatResponse> {
-  const response = await fetch(`${API_URL}/chat`, {
-    method: "POST",
-    headers: {
-      "Content-Type": "application/json",
-    },
-    body: JSON.stringify(request),
-  });
+export async function sendChatMessage(
+  request: ChatRequest,
+  idempotencyKey: string = crypto.randomUUID(),
+): Promise<ChatResponse> {
+  // A network error is retried once with the same key, so the backend
+  // replays (or waits for) the first attempt instead of running the turn twice.
+  const send = () =>
+    fetch(`${API_URL}/chat`, {
+      method: "POST",
+      headers: {
+        "Content-Type": "application/json",
+        "Idempotency-Key": idempotencyKey,
+      },
+      body: JSON.stringify(request),
+    });
+
+  let response: Response;
+  try {
+    response = await send();
+  } catch {
+    response = await send();
+  }
 
   if (!response.ok) {
     throw new Error(`Chat request failed: ${response.statusText}`);
@@ -19,16 +33,27 @@ export async function sendChatMessage(request: ChatRequest): Promise<ChatRespons
 }
 
 export async function searchProducts(keyword: string): Promise<EdibleProduct[]> {
-  const response = await fetch(`${API_URL}/search`, {
+  // GET so the browser cache can revalidate with If-None-Match (304 when unchanged)
+  const response = await fetch(`${API_URL}/search?keyword=${encodeURIComponent(keyword)}`);
+
+  if (!response.ok) {
+    throw new Error(`Search request failed: ${response.statusText}`);
+  }
+
+  return response.json();
+}
+
+export async function getProducts(skus: string[]): Promise<ProductLookupResponse> {
+  const response = await fetch(`${API_URL}/products`, {
     method: "POST",
     headers: {
       "Content-Type": "application/json",
     },
-    body: JSON.stringify({ keyword }),
+    body: JSON.stringify({ skus }),
   });
 
   if (!response.ok) {
-    throw new Error(`Search request failed: ${response.statusText}`);
+    throw new Error(`Product lookup failed: ${response.statusText}`);
   }
 
   return response.json();
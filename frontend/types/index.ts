@@ -14,6 +14,13 @@ export interface ExtractedIntent {
   confidence: number;
 }
 
+export interface ProductVariant {
+  sku: string;
+  name: string;
+  price: number;
+  pdp_url: string;
+}
+
 export interface EdibleProduct {
   sku: string;
   name: string;
@@ -22,6 +29,12 @@ export interface EdibleProduct {
   description: string;
   tags: string[];
   pdp_url: string;
+  variants?: ProductVariant[];
+}
+
+export interface ProductLookupResponse {
+  products: EdibleProduct[];
+  missing: string[];
 }
 
 export interface Message {